@@ -178,6 +178,42 @@ def create_config_files():
     log_config_path = config_dir / "logging.json"
     log_config_path.write_text(json.dumps(log_config, indent=2))
     print(f"✅ 创建日志配置: {log_config_path}")
+    
+    # 集群监控配置示例（复制到~/.openclaw/fleet.json后运行: founder_health_monitor.py fleet）
+    fleet_config = {
+        "max_concurrency": 32,
+        "process_scan_interval": 10,
+        "defaults": {
+            "interval": 30,
+            "timeout": 5,
+            "failure_threshold": 3,
+            "restart_cooldown": 300,
+            "max_restarts_per_hour": 3
+        },
+        "targets": [
+            {
+                "name": "gateway-3000",
+                "status_url": "http://localhost:3000/status",
+                "process_pattern": "openclaw gateway start",
+                "start_command": ["openclaw", "gateway", "start"],
+                "stop_command": ["openclaw", "gateway", "stop"]
+            },
+            {
+                "name": "gateway-18789",
+                "status_url": "http://localhost:18789/status",
+                "process_pattern": "openclaw gateway --port 18789",
+                "start_command": ["openclaw", "gateway", "--port", "18789", "--verbose"]
+            },
+            {
+                "name": "remote-host-b",
+                "status_url": "http://10.0.0.12:18789/status"
+            }
+        ]
+    }
+    
+    fleet_config_path = config_dir / "fleet.example.json"
+    fleet_config_path.write_text(json.dumps(fleet_config, indent=2, ensure_ascii=False))
+    print(f"✅ 创建集群监控配置示例: {fleet_config_path}")
 
 def create_basic_scripts():
     """创建基础脚本"""
@@ -218,9 +254,9 @@ export $(grep -v '^#' .env | xargs)
 echo "🔧 启动健康监控..."
 python3 -m monitor.founder_health_monitor &
 
-# 启动网络管理
+# 启动网络管理（常驻进程，之后的命令行调用通过控制套接字交给它执行）
 echo "🌐 启动网络管理..."
-python3 -m network.founder_network_manager &
+python3 -m network.founder_network_manager daemon &
 
 # 启动Web仪表板
 echo "📊 启动监控仪表板..."
@@ -244,7 +280,7 @@ echo "🛑 停止OpenClaw自动化系统"
 
 # 停止所有相关进程
 pkill -f "founder_health_monitor" || true
-pkill -f "founder_network_manager" || true
+python3 -m network.founder_network_manager daemon stop || pkill -f "founder_network_manager" || true
 pkill -f "founder_dashboard" || true
 
 echo "✅ 系统已停止"
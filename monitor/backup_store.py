@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Founder配置备份存储
+按内容哈希寻址、压缩、去重的增量备份；索引文件记录所有版本与"最后已知正常"版本，
+列出与清理都不需要扫描目录。新版本追加写入索引日志，定期压缩回索引文件
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Tuple
+
+from monitor.status_publisher import atomic_write_bytes, atomic_write_json
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，缺失时使用gzip
+    zstandard = None
+
+INDEX_VERSION = 1
+
+
+class BackupStore:
+    """内容寻址的配置备份存储
+
+    目录结构：
+      index.json                   版本列表（按时间顺序）与last_known_good
+      index.log                    index.json之后的变更（每行一条JSON记录），每compact_every条压缩一次
+      objects/ab/abcdef....gz|zst  压缩后的配置内容，文件名为原始内容的sha256
+
+    内容与最新版本相同时不产生新版本；不同版本内容相同时共用同一个对象。
+    """
+
+    def __init__(self, root, max_versions: int = 5000, compact_every: int = 200):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.log_path = self.root / "index.log"
+        self.max_versions = max_versions
+        self.compact_every = compact_every
+        self.codec = "zst" if zstandard is not None else "gz"
+        self._lock = threading.Lock()
+        self._log_records = 0
+        self._index = self._load_index()
+        self._objects = {entry["hash"]: entry["codec"] for entry in self._index["entries"]}
+        if self._index["last_known_good"] is not None:
+            good = self._index["last_known_good"]
+            self._objects.setdefault(good["hash"], good["codec"])
+        # 回放日志后按当前上限清理，并把日志压缩回索引文件（同时丢弃崩溃时写了一半的记录）
+        self._prune_locked()
+        if self.log_path.exists() and self.log_path.stat().st_size:
+            self._compact_locked()
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != INDEX_VERSION:
+                raise ValueError(index.get("version"))
+        except (OSError, ValueError):
+            index = {"version": INDEX_VERSION, "next_id": 1, "entries": [], "last_known_good": None}
+        index.setdefault("log_seq", 0)
+        self._replay_log(index)
+        return index
+
+    def _replay_log(self, index: Dict):
+        """把index.json之后的日志记录应用到索引（已压缩进索引的记录按序号跳过）"""
+        try:
+            f = open(self.log_path, "r", encoding="utf-8")
+        except OSError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # 崩溃时写了一半的最后一行
+                if record["seq"] <= index["log_seq"]:
+                    continue
+                entry = record["entry"]
+                if record["op"] == "add":
+                    index["entries"].append(entry)
+                    index["next_id"] = max(index["next_id"], entry["id"] + 1)
+                elif record["op"] == "good":
+                    index["last_known_good"] = entry
+                index["log_seq"] = record["seq"]
+
+    def _append_log(self, op: str, entry: Dict):
+        """追加一条索引变更并落盘，累计compact_every条后压缩"""
+        self._index["log_seq"] += 1
+        record = {"seq": self._index["log_seq"], "op": op, "entry": entry}
+        with open(self.log_path, "ab") as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_records += 1
+        if self._log_records >= self.compact_every:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """把完整索引原子写入index.json后清空日志（两步之间崩溃时，日志记录按序号跳过）"""
+        atomic_write_json(self.index_path, self._index)
+        with open(self.log_path, "wb"):
+            pass
+        self._log_records = 0
+
+    def compact(self):
+        """立即压缩索引日志"""
+        with self._lock:
+            self._compact_locked()
+
+    def _object_path(self, digest: str, codec: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.{codec}"
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zst":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == "zst":
+            if zstandard is None:
+                raise RuntimeError("需要安装zstandard才能读取.zst备份")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def snapshot(self, data: bytes, reason: str = "manual") -> Tuple[Dict, bool]:
+        """保存一个版本，返回(版本条目, 是否新建)；与最新版本内容相同时不新建"""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entries = self._index["entries"]
+            if entries and entries[-1]["hash"] == digest:
+                return entries[-1], False
+
+            codec = self._objects.get(digest)
+            if codec is None:
+                codec = self.codec
+                path = self._object_path(digest, codec)
+                path.parent.mkdir(exist_ok=True)
+                atomic_write_bytes(path, self._compress(data))
+                self._objects[digest] = codec
+
+            entry = {
+                "id": self._index["next_id"],
+                "hash": digest,
+                "codec": codec,
+                "timestamp": time.time(),
+                "reason": reason,
+                "size": len(data),
+            }
+            self._index["next_id"] += 1
+            entries.append(entry)
+            self._prune_locked()
+            self._append_log("add", entry)
+            return entry, True
+
+    def snapshot_file(self, path, reason: str = "manual") -> Tuple[Dict, bool]:
+        with open(path, "rb") as f:
+            return self.snapshot(f.read(), reason)
+
+    def entries(self) -> List[Dict]:
+        """所有版本（按时间顺序）"""
+        with self._lock:
+            return list(self._index["entries"])
+
+    def latest(self) -> Optional[Dict]:
+        with self._lock:
+            entries = self._index["entries"]
+            return entries[-1] if entries else None
+
+    def find(self, digest: str) -> Optional[Dict]:
+        """按内容哈希查找最新的对应版本"""
+        with self._lock:
+            return next((e for e in reversed(self._index["entries"]) if e["hash"] == digest), None)
+
+    def mark_good(self, entry: Dict):
+        """标记版本为最后已知正常"""
+        with self._lock:
+            current = self._index["last_known_good"]
+            if current is None or current["id"] != entry["id"]:
+                self._index["last_known_good"] = dict(entry)
+                self._append_log("good", self._index["last_known_good"])
+
+    def last_known_good(self) -> Optional[Dict]:
+        """最后已知正常的版本"""
+        with self._lock:
+            return self._index["last_known_good"]
+
+    def get(self, version_id: int) -> Optional[Dict]:
+        """按版本号查找"""
+        with self._lock:
+            return next((e for e in self._index["entries"] if e["id"] == version_id), None)
+
+    def open(self, entry: Dict) -> IO[bytes]:
+        """以流的方式读取版本内容（边读边解压）"""
+        path = self._object_path(entry["hash"], entry["codec"])
+        if entry["codec"] == "zst":
+            if zstandard is None:
+                raise RuntimeError("需要安装zstandard才能读取.zst备份")
+            return zstandard.open(path, "rb")
+        return gzip.open(path, "rb")
+
+    def read(self, entry: Dict) -> bytes:
+        """读取版本内容"""
+        with open(self._object_path(entry["hash"], entry["codec"]), "rb") as f:
+            return self._decompress(f.read(), entry["codec"])
+
+    def restore(self, entry: Dict, target):
+        """把版本内容原子写回目标文件"""
+        atomic_write_bytes(target, self.read(entry))
+
+    def _prune_locked(self):
+        entries = self._index["entries"]
+        if len(entries) <= self.max_versions:
+            return
+        removed = entries[:len(entries) - self.max_versions]
+        kept = entries[len(entries) - self.max_versions:]
+
+        # 最后已知正常版本的对象永远保留
+        referenced = {e["hash"] for e in kept}
+        if self._index["last_known_good"] is not None:
+            referenced.add(self._index["last_known_good"]["hash"])
+        for entry in removed:
+            if entry["hash"] not in referenced:
+                referenced.add(entry["hash"])  # 同一对象只删除一次
+                self._objects.pop(entry["hash"], None)
+                try:
+                    self._object_path(entry["hash"], entry["codec"]).unlink()
+                except OSError:
+                    pass
+        self._index["entries"] = kept
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            entries = self._index["entries"]
+            return {
+                "versions": len(entries),
+                "objects": len({e["hash"] for e in entries}),
+                "codec": self.codec,
+                "last_known_good": (self._index["last_known_good"] or {}).get("id"),
+            }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Founder配置文件监视
+优先使用inotify监视配置所在目录（兼容编辑器的"写临时文件再rename"），不可用时按mtime轮询；
+连续写入在debounce秒内合并为一次回调
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct("iIII")
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class ConfigWatcher:
+    """配置文件变化监视器，on_change在监视线程中调用"""
+
+    def __init__(
+        self,
+        path,
+        on_change: Callable[[Path], None],
+        debounce: float = 0.5,
+        poll_interval: float = 1.0,
+        use_inotify: bool = True,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.path = Path(path)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.logger = logger or logging.getLogger("FounderMonitor")
+        self.mode: Optional[str] = None
+        self.changes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wakeup_r: Optional[int] = None
+        self._wakeup_w: Optional[int] = None
+
+    def _signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def start(self):
+        """启动监视线程"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+        inotify_fd = self._open_inotify() if self.use_inotify else None
+        self.mode = "inotify" if inotify_fd is not None else "polling"
+        target = self._run_inotify if inotify_fd is not None else self._run_polling
+        # 轮询的基准在start()返回前取得，之后的写入不会被当作初始状态
+        args = (inotify_fd,) if inotify_fd is not None else (self._signature(),)
+        self._thread = threading.Thread(target=target, args=args, name="FounderConfigWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监视线程"""
+        self._stop_event.set()
+        if self._wakeup_w is not None:
+            os.write(self._wakeup_w, b"x")
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + self.debounce + 1)
+            self._thread = None
+        for fd in (self._wakeup_r, self._wakeup_w):
+            if fd is not None:
+                os.close(fd)
+        self._wakeup_r = self._wakeup_w = None
+
+    def _open_inotify(self) -> Optional[int]:
+        libc = _load_libc()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, str(self.path.parent).encode(), WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _fire(self):
+        self.changes += 1
+        try:
+            self.on_change(self.path)
+        except Exception as e:
+            self.logger.error(f"处理配置变化失败: {e}")
+
+    def _read_events(self, fd: int) -> bool:
+        """读取inotify事件，返回是否涉及配置文件"""
+        relevant = False
+        try:
+            data = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        name = self.path.name.encode()
+        while offset + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            event_name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW or event_name == name:
+                relevant = True
+        return relevant
+
+    def _run_inotify(self, fd: int):
+        deadline = None
+        try:
+            while not self._stop_event.is_set():
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                readable, _, _ = select.select([fd, self._wakeup_r], [], [], timeout)
+                if fd in readable and self._read_events(fd):
+                    deadline = time.monotonic() + self.debounce
+                elif deadline is not None and time.monotonic() >= deadline:
+                    deadline = None
+                    self._fire()
+        finally:
+            os.close(fd)
+
+    def _run_polling(self, last: Optional[Tuple[int, int, int]]):
+        deadline = None
+        while not self._stop_event.is_set():
+            timeout = self.poll_interval if deadline is None else max(min(deadline - time.monotonic(), self.poll_interval), 0)
+            select.select([self._wakeup_r], [], [], timeout)
+            current = self._signature()
+            if current != last:
+                last = current
+                deadline = time.monotonic() + self.debounce
+            elif deadline is not None and time.monotonic() >= deadline:
+                deadline = None
+                self._fire()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Founder多Gateway集群监控
+一个监控进程、一个事件循环监视配置文件中的N个Gateway：探测并发有上限，
+每个目标独立保存状态、失败计数与重启策略；所有目标共用一次进程表扫描
+"""
+
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from monitor.gateway_restart import GatewayRestartOrchestrator
+from monitor.metrics import GatewayMetrics, MetricsRegistry
+from monitor.process_tracker import find_processes_by_patterns
+from monitor.restart_policy import RestartPolicy
+from monitor.timeseries import series_dirname
+
+TARGET_UNKNOWN = "unknown"
+TARGET_HEALTHY = "healthy"
+TARGET_UNHEALTHY = "unhealthy"
+TARGET_RESTARTING = "restarting"
+
+DEFAULT_TARGET_SETTINGS = {
+    "interval": 30.0,  # 探测间隔（秒）
+    "timeout": 5.0,  # 单次/status探测超时（秒）
+    "failure_threshold": 3,  # 连续失败多少次后重启
+    "restart": True,  # 是否允许重启（远程目标没有start_command时自动关闭）
+    "restart_cooldown": 30.0,  # 重启失败后的初始退避（秒），之后指数增长
+    "max_restarts_per_hour": 3,  # 重启令牌桶容量与每小时补充量
+    "trip_after": 5,  # 连续失败多少次后熔断
+    "open_duration": 1800.0,  # 熔断时长（秒）
+    "ready_timeout": 35.0,
+}
+
+
+class GatewayTarget:
+    """一个被监视的Gateway：配置与运行状态"""
+
+    def __init__(
+        self,
+        name: str,
+        status_url: str,
+        process_pattern: Optional[str] = None,
+        start_command: Optional[Sequence[str]] = None,
+        stop_command: Optional[Sequence[str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        log_path: Optional[str] = None,
+        **settings,
+    ):
+        unknown = set(settings) - set(DEFAULT_TARGET_SETTINGS)
+        if unknown:
+            raise ValueError(f"目标 {name} 含未知配置项: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.status_url = status_url
+        self.process_pattern = process_pattern
+        self.start_command = list(start_command) if start_command else None
+        self.stop_command = list(stop_command) if stop_command else None
+        self.env = env
+        self.log_path = Path(log_path).expanduser() if log_path else None
+        for key, default in DEFAULT_TARGET_SETTINGS.items():
+            setattr(self, key, settings.get(key, default))
+        if self.start_command is None or self.process_pattern is None:
+            self.restart = False
+
+        self.state = TARGET_UNKNOWN
+        self.consecutive_failures = 0
+        self.checks = 0
+        self.failures = 0
+        self.last_check: Optional[float] = None
+        self.last_ok: Optional[float] = None
+        self.last_latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.pids: Optional[List[int]] = None  # None表示未知（未配置进程匹配或尚未扫描）
+        self.restarts = 0
+        self.policy: Optional[RestartPolicy] = None
+        self.last_restart: Optional[Dict] = None
+        self._restarter: Optional[GatewayRestartOrchestrator] = None
+        self._metrics: Optional[GatewayMetrics] = None
+
+    @classmethod
+    def from_config(cls, config: Dict, defaults: Optional[Dict] = None) -> "GatewayTarget":
+        merged = dict(defaults or {})
+        merged.update(config)
+        if "name" not in merged or "status_url" not in merged:
+            raise ValueError(f"目标配置缺少name或status_url: {config}")
+        return cls(**merged)
+
+    def record(self, ok: bool, latency_ms: Optional[float] = None, error: Optional[str] = None):
+        """记录一次探测结果"""
+        now = time.time()
+        self.checks += 1
+        self.last_check = now
+        self.last_latency_ms = latency_ms
+        if ok:
+            self.consecutive_failures = 0
+            self.last_ok = now
+            self.last_error = None
+            self.state = TARGET_HEALTHY
+        else:
+            self.consecutive_failures += 1
+            self.failures += 1
+            self.last_error = error
+            self.state = TARGET_UNHEALTHY
+
+    def create_policy(self, state_dir: Optional[Path] = None, on_open=None, logger=None) -> RestartPolicy:
+        """按目标配置创建重启策略（state_dir下每个目标一个状态文件）"""
+        self.policy = RestartPolicy(
+            state_dir / f"{series_dirname(self.name)}.json" if state_dir else None,
+            capacity=self.max_restarts_per_hour,
+            refill_per_hour=self.max_restarts_per_hour,
+            base_backoff=self.restart_cooldown,
+            trip_after=self.trip_after,
+            open_duration=self.open_duration,
+            on_open=on_open,
+            logger=logger,
+        )
+        return self.policy
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "status_url": self.status_url,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "checks": self.checks,
+            "failures": self.failures,
+            "last_check": self.last_check,
+            "last_ok": self.last_ok,
+            "last_latency_ms": self.last_latency_ms,
+            "last_error": self.last_error,
+            "pids": self.pids,
+            "restarts": self.restarts,
+            "last_restart": self.last_restart,
+            "breaker": self.policy.breaker if self.policy is not None else None,
+        }
+
+
+def load_fleet_config(path) -> Dict:
+    """读取集群配置文件
+
+    格式：{"max_concurrency": 32, "defaults": {...}, "targets": [{"name", "status_url", ...}, ...]}
+    """
+    with open(Path(path).expanduser(), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    defaults = config.get("defaults", {})
+    targets = [GatewayTarget.from_config(item, defaults) for item in config.get("targets", [])]
+    names = [target.name for target in targets]
+    if len(names) != len(set(names)):
+        raise ValueError("目标名称重复")
+    return {
+        "targets": targets,
+        "max_concurrency": config.get("max_concurrency", 32),
+        "max_restart_workers": config.get("max_restart_workers", 4),
+        "process_scan_interval": config.get("process_scan_interval", 10.0),
+    }
+
+
+class FleetMonitor:
+    """集群监控器
+
+    - 每个目标一个协程，首次探测按间隔均匀错开，之后按间隔（加抖动）循环
+    - 同时进行的探测不超过max_concurrency个；探测走共享连接池，所有目标在同一个事件循环中
+    - 配置了process_pattern的目标由一次共享的进程表扫描判断进程是否存在
+    - 连续失败达到阈值且重启策略允许时，在有界线程池中重启，重启期间暂停探测
+    """
+
+    def __init__(
+        self,
+        targets: List[GatewayTarget],
+        http_pool,
+        max_concurrency: int = 32,
+        max_restart_workers: int = 4,
+        process_scan_interval: float = 10.0,
+        timeseries=None,
+        on_update=None,
+        state_dir=None,
+        notifier=None,
+        logger: Optional[logging.Logger] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.targets = {target.name: target for target in targets}
+        self.http_pool = http_pool
+        self.max_concurrency = max_concurrency
+        self.max_restart_workers = max_restart_workers
+        self.process_scan_interval = process_scan_interval
+        self.timeseries = timeseries
+        self.state_dir = Path(state_dir) if state_dir else None
+        self.notifier = notifier
+        self.on_update = on_update
+        self.logger = logger or logging.getLogger("FounderMonitor")
+        self.rng = random.Random()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if self.state_dir is not None:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+        for target in targets:
+            if target.process_pattern:
+                re.compile(target.process_pattern)
+            if target.restart:
+                target.create_policy(self.state_dir, self._breaker_callback(target), self.logger)
+            if metrics is not None:
+                target._metrics = self._target_metrics(metrics, target)
+
+    @staticmethod
+    def _target_metrics(metrics: MetricsRegistry, target: GatewayTarget) -> GatewayMetrics:
+        # 状态与失败计数在抓取时直接读取目标属性，探测路径上不额外更新
+        gateway_metrics = GatewayMetrics(metrics, target.name)
+        gateway_metrics.up.set_function(lambda: 1 if target.state == TARGET_HEALTHY else 0)
+        gateway_metrics.consecutive_failures.set_function(lambda: target.consecutive_failures)
+        return gateway_metrics
+
+    def _breaker_callback(self, target: GatewayTarget):
+        def on_open(snapshot: Dict):
+            message = f"连续 {snapshot['consecutive_failures']} 次重启失败，暂停自动重启"
+            self.logger.critical(f"[{target.name}] {message}")
+            self._notify("restart_breaker_open", message, "critical", target)
+        return on_open
+
+    def _notify(self, event: str, message: str, level: str, target: GatewayTarget):
+        if self.notifier is not None:
+            self.notifier.notify(event, message, level, source=target.name)
+
+    async def probe(self, target: GatewayTarget):
+        """探测一个目标并更新其状态（已知进程不存在时不发请求）"""
+        if target.pids == []:
+            target.record(False, None, "进程未运行")
+        else:
+            await self._fetch_status(target)
+
+        if self.timeseries is not None:
+            self.timeseries.append(f"fleet.{target.name}.running", 1.0 if target.state == TARGET_HEALTHY else 0.0)
+            if target.last_latency_ms is not None and target.state == TARGET_HEALTHY:
+                self.timeseries.append(f"fleet.{target.name}.status_latency_ms", target.last_latency_ms)
+
+    async def _fetch_status(self, target: GatewayTarget):
+        async with self._semaphore:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                result = await self.http_pool.fetch(target.status_url, timeout=target.timeout)
+                if result["status_code"] == 200:
+                    target.record(True, result["latency_ms"])
+                else:
+                    target.record(False, result["latency_ms"], f"HTTP {result['status_code']}")
+            except Exception as e:
+                target.record(False, None, f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+            finally:
+                self.in_flight -= 1
+        if target._metrics is not None:
+            target._metrics.observe_status(target.last_latency_ms if target.state == TARGET_HEALTHY else None)
+
+    async def _restart(self, target: GatewayTarget):
+        target.state = TARGET_RESTARTING
+        target.restarts += 1
+        self.logger.warning(f"[{target.name}] 连续失败 {target.consecutive_failures} 次，重启")
+        if target._restarter is None:
+            target._restarter = GatewayRestartOrchestrator(
+                start_command=target.start_command,
+                stop_command=target.stop_command,
+                status_url=target.status_url,
+                process_pattern=target.process_pattern,
+                env=target.env,
+                log_path=target.log_path,
+                http_pool=self.http_pool,
+                ready_timeout=target.ready_timeout,
+                logger=self.logger,
+            )
+        result = await self._loop.run_in_executor(self._executor, target._restarter.restart)
+        target.pids = None  # 进程已变化，等下一次扫描
+        target.policy.record_result(result["success"])
+        target.last_restart = {
+            "at": time.time(),
+            "success": result["success"],
+            "duration_s": result["duration_s"],
+            "error": result.get("error"),
+        }
+        if self.timeseries is not None:
+            self.timeseries.append(f"fleet.{target.name}.restart_duration_s", result["duration_s"])
+        if target._metrics is not None:
+            target._metrics.record_restart(result["success"], result["duration_s"])
+        if result["success"]:
+            self.logger.info(f"[{target.name}] 重启成功，耗时 {result['duration_s']}秒")
+            self._notify("recovered", f"已自动重启恢复（耗时 {result['duration_s']}秒）", "info", target)
+            target.record(True, result.get("latency_ms"))
+        else:
+            self.logger.error(f"[{target.name}] 重启失败: {result.get('error')}")
+            self._notify("restart_failed", f"重启失败: {result.get('error')}", "error", target)
+            target.record(False, None, f"重启失败: {result.get('error')}")
+
+    async def _run_target(self, target: GatewayTarget, offset: float):
+        delay = offset
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), delay)
+                break
+            except asyncio.TimeoutError:
+                pass
+
+            await self.probe(target)
+            if target.state == TARGET_UNHEALTHY and target.consecutive_failures >= target.failure_threshold:
+                if target.restart:
+                    allowed, reason = target.policy.acquire()
+                    if allowed:
+                        await self._restart(target)
+                    else:
+                        if target._metrics is not None:
+                            target._metrics.record_denied()
+                        if target.consecutive_failures == target.failure_threshold:
+                            self.logger.warning(f"[{target.name}] 需要重启但{reason}")
+                elif target.consecutive_failures == target.failure_threshold:
+                    self.logger.error(f"[{target.name}] 连续失败 {target.consecutive_failures} 次: {target.last_error}")
+            elif target.state == TARGET_HEALTHY and target.policy is not None:
+                target.policy.record_healthy()
+            if self.on_update is not None:
+                self.on_update(target)
+
+            jitter = target.interval * 0.1
+            delay = max(target.interval + self.rng.uniform(-jitter, jitter), 0.0)
+
+    async def _scan_processes(self):
+        patterns = {name: t.process_pattern for name, t in self.targets.items() if t.process_pattern}
+        if not patterns:
+            return
+        while not self._stop_event.is_set():
+            try:
+                matches = await self._loop.run_in_executor(self._executor, find_processes_by_patterns, patterns)
+                for name, pids in matches.items():
+                    self.targets[name].pids = pids
+            except Exception as e:
+                self.logger.error(f"扫描进程表失败: {e}")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), self.process_scan_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_async(self):
+        """运行直到stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_restart_workers, thread_name_prefix="FounderFleet")
+
+        targets = list(self.targets.values())
+        tasks = [asyncio.ensure_future(self._scan_processes())]
+        for index, target in enumerate(targets):
+            # 首次探测在一个间隔内均匀错开，避免同时发起
+            offset = target.interval * index / len(targets)
+            tasks.append(asyncio.ensure_future(self._run_target(target, offset)))
+        self.logger.info(f"集群监控启动: {len(targets)} 个目标，并发上限 {self.max_concurrency}")
+        try:
+            await self._stop_event.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._executor.shutdown(wait=False)
+            self._loop = None
+
+    def run(self):
+        """在连接池的事件循环中运行（阻塞当前线程），探测与调度共用一个循环"""
+        self.http_pool.run(self.run_async())
+
+    def stop(self):
+        """停止（线程安全）"""
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def snapshot(self) -> Dict[str, object]:
+        counts: Dict[str, int] = {}
+        for target in self.targets.values():
+            counts[target.state] = counts.get(target.state, 0) + 1
+        return {
+            "timestamp": time.time(),
+            "targets_total": len(self.targets),
+            "states": counts,
+            "max_in_flight": self.max_in_flight,
+            "targets": {name: target.snapshot() for name, target in self.targets.items()},
+        }
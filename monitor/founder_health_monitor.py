@@ -6,15 +6,42 @@ Founder健康监控系统
 
 import os
 import sys
+import math
 import time
 import json
-import logging
-import subprocess
-import threading
+import hashlib
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-import requests
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from monitor.gateway_restart import GatewayRestartOrchestrator
+from monitor.process_tracker import GATEWAY_PROCESS_PATTERN, ProcessTracker
+from monitor.backup_store import BackupStore
+from monitor.config_watcher import ConfigWatcher
+from monitor.fleet import FleetMonitor, load_fleet_config
+from monitor.json_diff import DiffCache
+from monitor.metrics import GatewayMetrics, MetricsServer, get_registry
+from monitor.restart_policy import RestartPolicy
+from monitor.responsiveness import STATE_DEGRADED, STATE_HEALTHY, STATE_HUNG, ResponsivenessDetector
+from monitor.scheduler import MonitorScheduler
+from monitor.status_publisher import StatusPublisher
+from monitor.telemetry import ResourceSampler
+from monitor.timeseries import TimeSeriesStore
+from monitor.logging_pipeline import pipeline_stats, setup_logging
+from monitor.notifications import NotificationDispatcher, channels_from_env
+from network.http_pool import get_pool_manager
+from network.proxy_router import ROUTE_DIRECT
+
+try:
+    from dotenv import load_dotenv
+except ImportError:  # 可选依赖，缺失时只读取进程环境变量
+    load_dotenv = None
 
 
 class FounderHealthMonitor:
@@ -30,24 +57,126 @@ class FounderHealthMonitor:
         self.config_path = config_path or str(self.openclaw_dir / "openclaw.json")
         self.config_backup_dir = self.openclaw_dir / "config_backups"
         
+        # Gateway状态接口
+        self.gateway_status_url = "http://localhost:3000/status"
+        
         # 状态文件
         self.status_file = self.workspace_dir / "founder_status.json"
         self.heartbeat_file = self.workspace_dir / "founder_heartbeat.json"
+        self.fleet_status_file = self.workspace_dir / "fleet_status.json"
+        
+        # 集群模式：一个进程监视多个Gateway（见monitor/fleet.py）
+        self.fleet_config_path = self.openclaw_dir / "fleet.json"
+        self.fleet_publish_interval = 5  # 集群状态文件最短写入间隔（秒）
+        self.fleet = None
+        self.timeseries_dir = self.workspace_dir / "timeseries"
         
         # 监控配置
         self.check_interval = 300  # 5分钟检查一次
-        self.timeout_threshold = 1200  # 20分钟无响应视为离线
-        self.max_retries = 3
+        self.max_retries = 3  # 进程存在但/status连续失败多少次后重启
+        self.telemetry_interval = 5  # 资源采样间隔（秒）
+        self.responsiveness_interval = 2  # /status响应性探测间隔（秒）
+        self.hang_timeout = 5  # 单次/status探测超时（秒）
+        self.degraded_restart_after = 600  # 持续降级多久后重启（秒）
+        self.restart_policy_file = self.workspace_dir / "restart_policy.json"
+        self.config_grace_period = 60  # 新配置的观察期（秒），期间不健康则回滚
+        self.config_unhealthy_after = 5  # 观察期内持续不健康多久后回滚（秒）
+        self.metrics_host = "127.0.0.1"
+        self.metrics_port = 9464  # Prometheus/OpenMetrics抓取端口（0表示不启动）
         
         # 初始化
         self._setup_directories()
         self._setup_logging()
         
+        # 状态/心跳原子批量写入，配置备份去重压缩存储
+        self.status_publisher = StatusPublisher()
+        self.backup_store = BackupStore(self.config_backup_dir)
+        self.diff_cache = DiffCache(self.config_backup_dir / "diffs")
+        
         # 当前状态
         self.last_heartbeat = None
         self.consecutive_failures = 0
         self.is_monitoring = False
         
+        # 与网络管理共用的连接池（长连接，避免每次探测重新握手）
+        self.http_pool = get_pool_manager()
+        
+        # 指标：更新只改预分配的槽位，/metrics抓取时直接渲染，不重新执行检查
+        self.metrics = get_registry()
+        self.metrics_server = None
+        self.gateway_metrics = GatewayMetrics(self.metrics, urllib.parse.urlsplit(self.gateway_status_url).netloc)
+        self.gateway_metrics.consecutive_failures.set_function(lambda: self.consecutive_failures)
+        
+        # Telegram/飞书通知：后台合并、限速发送（渠道由环境变量或项目根目录的.env配置）
+        if load_dotenv is not None:
+            load_dotenv(project_root / ".env")
+        self.notifier = NotificationDispatcher(channels_from_env(), self.http_pool, logger=self.logger)
+        
+        # Gateway进程跟踪（替代pgrep）
+        self.process_tracker = ProcessTracker(GATEWAY_PROCESS_PATTERN)
+        
+        # Gateway进程树资源采样（环形缓冲区，约1小时历史）
+        self.telemetry = ResourceSampler(
+            self.process_tracker,
+            capacity=int(3600 / self.telemetry_interval),
+            logger=self.logger
+        )
+        
+        # 检查结果、探测延迟与资源指标的历史（追加式二进制时间序列）
+        self.timeseries = TimeSeriesStore(self.timeseries_dir)
+        
+        # /status延迟直方图与降级/无响应判断
+        self.responsiveness = ResponsivenessDetector()
+        
+        # 配置变化监视：校验、备份，观察期内Gateway不健康则回滚到最后已知正常版本
+        self._pending_config = None
+        self._config_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FounderConfig")
+        self.config_watcher = ConfigWatcher(
+            self.config_path,
+            lambda path: self._config_executor.submit(self.handle_config_change),
+            logger=self.logger
+        )
+        
+        # Gateway重启编排（等待进程退出与接口就绪，不做固定等待）
+        self.gateway_restarter = GatewayRestartOrchestrator(
+            start_command=["openclaw", "gateway", "start"],
+            stop_command=["openclaw", "gateway", "stop"],
+            status_url=self.gateway_status_url,
+            process_pattern=GATEWAY_PROCESS_PATTERN,
+            http_pool=self.http_pool,
+            ready_timeout=35,
+            logger=self.logger
+        )
+        
+        # 重启策略：令牌桶预算、失败退避、连续失败熔断（熔断时回滚配置），状态跨监控重启保留
+        self.restart_policy = RestartPolicy(
+            self.restart_policy_file,
+            on_open=lambda snapshot: self._config_executor.submit(self._escalate_restart_storm, snapshot),
+            logger=self.logger
+        )
+        
+        # 调度器：心跳与状态检查各自定时（带抖动），Gateway进程退出时立即触发状态检查
+        self.scheduler = MonitorScheduler(max_workers=4, logger=self.logger, metrics=self.metrics)
+        self.scheduler.add_check(
+            "heartbeat", self.send_heartbeat,
+            interval=self.check_interval, jitter=self.check_interval * 0.05, deadline=10
+        )
+        self.scheduler.add_check(
+            "status", self.run_status_check,
+            interval=self.check_interval, jitter=self.check_interval * 0.05,
+            deadline=120, retry_interval=60
+        )
+        self.scheduler.add_check(
+            "responsiveness", self.probe_responsiveness,
+            interval=self.responsiveness_interval, jitter=self.responsiveness_interval * 0.1,
+            deadline=self.hang_timeout + 5
+        )
+        self.scheduler.add_check(
+            "telemetry", self.sample_telemetry,
+            interval=self.telemetry_interval, jitter=self.telemetry_interval * 0.1,
+            deadline=self.telemetry_interval
+        )
+        
         self.logger.info("Founder健康监控系统初始化完成")
     
     def _setup_directories(self):
@@ -56,111 +185,79 @@ class FounderHealthMonitor:
         self.workspace_dir.mkdir(exist_ok=True)
     
     def _setup_logging(self):
-        """设置日志"""
-        log_dir = self.workspace_dir / "logs"
-        log_dir.mkdir(exist_ok=True)
-        
-        log_file = log_dir / "founder_monitor.log"
-        
-        self.logger = logging.getLogger("FounderMonitor")
-        self.logger.setLevel(logging.INFO)
-        
-        # 文件处理器
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.INFO)
-        
-        # 控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        
-        # 格式
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-        
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        """设置日志（JSON Lines文件 + 控制台，经队列异步写入；多次创建实例不会重复添加处理器）"""
+        self.log_file = self.workspace_dir / "logs" / "founder_monitor.jsonl"
+        self.logger = setup_logging("FounderMonitor", "monitor", filename=self.log_file, console=True)
     
     def backup_config(self, reason: str = "manual"):
-        """备份当前配置"""
+        """备份当前配置（内容未变化时跳过）"""
         try:
             if not os.path.exists(self.config_path):
                 self.logger.warning(f"配置文件不存在: {self.config_path}")
                 return False
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"openclaw_backup_{timestamp}_{reason}.json"
-            backup_path = self.config_backup_dir / backup_name
+            with open(self.config_path, 'rb') as f:
+                data = f.read()
             
-            with open(self.config_path, 'r') as src, open(backup_path, 'w') as dst:
-                config_data = json.load(src)
-                # 添加备份元数据
-                config_data['_backup_metadata'] = {
-                    'timestamp': timestamp,
-                    'reason': reason,
-                    'backup_path': str(backup_path)
-                }
-                json.dump(config_data, dst, indent=2)
+            # 只备份可解析的配置（最新版本可能是被拒绝的无效配置，先校验再比较）
+            json.loads(data)
             
-            self.logger.info(f"配置已备份: {backup_path}")
-            
-            # 清理旧备份（保留最近10个）
-            self._cleanup_old_backups()
+            latest = self.backup_store.latest()
+            if latest and latest['hash'] == hashlib.sha256(data).hexdigest():
+                self.logger.debug(f"配置未变化，沿用备份版本 #{latest['id']}")
+                return True
             
+            entry, _ = self.backup_store.snapshot(data, reason)
+            self.logger.info(f"配置已备份: 版本 #{entry['id']} ({entry['hash'][:12]}, {reason})")
             return True
             
         except Exception as e:
             self.logger.error(f"配置备份失败: {e}")
             return False
     
-    def _cleanup_old_backups(self):
-        """清理旧备份文件"""
+    def _mark_config_good(self):
+        """Gateway运行正常时把当前配置记为最后已知正常版本
+
+        新配置在观察期内，或文件修改时间还不到一个观察期（变化尚未被处理）时不标记。
+        """
+        if self._pending_config is not None:
+            return
         try:
-            backups = list(self.config_backup_dir.glob("openclaw_backup_*.json"))
-            backups.sort(key=os.path.getmtime)
-            
-            # 保留最近10个备份
-            if len(backups) > 10:
-                for old_backup in backups[:-10]:
-                    old_backup.unlink()
-                    self.logger.info(f"清理旧备份: {old_backup.name}")
-        except Exception as e:
-            self.logger.error(f"清理备份失败: {e}")
+            if time.time() - os.path.getmtime(self.config_path) < self.config_grace_period:
+                return
+        except OSError:
+            return
+        if self.backup_config("known_good"):
+            latest = self.backup_store.latest()
+            if latest:
+                self.backup_store.mark_good(latest)
     
     def check_openclaw_status(self) -> Tuple[bool, str]:
         """检查OpenClaw状态"""
         try:
-            # 方法1: 检查进程
-            result = subprocess.run(
-                ["pgrep", "-f", "openclaw"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            # 方法1: 检查进程（进程内跟踪，不fork）
+            pids = self.process_tracker.pids()
             
-            if result.returncode == 0 and result.stdout.strip():
-                pids = result.stdout.strip().split('\n')
+            if pids:
                 self.logger.debug(f"找到OpenClaw进程: {pids}")
                 
                 # 方法2: 检查Gateway API
                 try:
-                    response = requests.get(
-                        "http://localhost:3000/status",
-                        timeout=5
+                    response = self.http_pool.fetch_sync(
+                        self.gateway_status_url,
+                        ROUTE_DIRECT,
+                        timeout=self.hang_timeout
                     )
-                    if response.status_code == 200:
+                    # 响应性统计与延迟指标只由probe_responsiveness记录，这里不重复计数
+                    if response["status_code"] == 200:
                         return True, "运行正常"
                     else:
-                        return True, f"API响应异常: {response.status_code}"
-                except requests.RequestException:
+                        return True, f"API响应异常: {response['status_code']}"
+                except Exception:
                     return True, "进程存在但API不可达"
             else:
                 return False, "未找到运行进程"
                 
-        except subprocess.TimeoutExpired:
-            return False, "进程检查超时"
         except Exception as e:
             self.logger.error(f"状态检查异常: {e}")
             return False, f"检查异常: {str(e)}"
@@ -175,10 +272,10 @@ class FounderHealthMonitor:
         }
         
         try:
-            with open(self.heartbeat_file, 'w') as f:
-                json.dump(heartbeat_data, f, indent=2)
+            self.status_publisher.publish(self.heartbeat_file, heartbeat_data)
             
             self.last_heartbeat = datetime.now()
+            self.timeseries.append("monitor.heartbeat", 1.0)
             self.logger.debug("心跳信号已发送")
             
         except Exception as e:
@@ -186,6 +283,10 @@ class FounderHealthMonitor:
     
     def check_heartbeat_age(self) -> Optional[float]:
         """检查心跳年龄（返回秒数）"""
+        # 本进程发送的心跳直接从内存计算
+        if self.last_heartbeat is not None:
+            return (datetime.now() - self.last_heartbeat).total_seconds()
+        
         try:
             if not self.heartbeat_file.exists():
                 return None
@@ -202,132 +303,420 @@ class FounderHealthMonitor:
             self.logger.error(f"检查心跳年龄失败: {e}")
             return None
     
-    def restart_openclaw(self, force: bool = False) -> bool:
-        """重启OpenClaw"""
+    def restart_openclaw(self, force: bool = False, bypass_policy: bool = False) -> bool:
+        """重启OpenClaw（自动重启需经过重启策略许可；手动重启与配置回滚可绕过）"""
+        if not bypass_policy:
+            allowed, reason = self.restart_policy.acquire()
+            if not allowed:
+                self.gateway_metrics.record_denied()
+                self.logger.warning(f"跳过自动重启: {reason}")
+                return False
+        
         try:
             self.logger.info(f"开始重启OpenClaw (force={force})")
             
-            # 先尝试正常停止
-            if not force:
-                try:
-                    subprocess.run(
-                        ["openclaw", "gateway", "stop"],
-                        capture_output=True,
-                        text=True,
-                        timeout=30
-                    )
-                    time.sleep(2)
-                except Exception as e:
-                    self.logger.warning(f"正常停止失败: {e}")
-            
-            # 强制停止所有相关进程
-            subprocess.run(
-                ["pkill", "-f", "openclaw"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            time.sleep(1)
-            
-            # 启动Gateway
-            self.logger.info("启动OpenClaw Gateway...")
-            
-            # 在后台启动
-            subprocess.Popen(
-                ["openclaw", "gateway", "start"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            
-            # 等待启动
-            time.sleep(5)
+            # 停止、等待进程退出、启动、轮询状态接口直到就绪
+            result = self.gateway_restarter.restart(force=force)
+            self.restart_policy.record_result(result["success"])
+            self.gateway_metrics.record_restart(result["success"], result["duration_s"])
+            self.timeseries.append("gateway.restart_duration_s", result["duration_s"] if result["success"] else math.nan)
+            self.process_tracker.invalidate()
+            self.responsiveness.reset()
             
-            # 检查是否启动成功
-            for i in range(10):
-                is_running, message = self.check_openclaw_status()
-                if is_running:
-                    self.logger.info(f"OpenClaw重启成功: {message}")
-                    
-                    # 发送Telegram通知
-                    self.send_recovery_notification()
-                    
-                    return True
+            if result["success"]:
+                self.logger.info(
+                    f"OpenClaw重启成功: PID {result['pid']}, 耗时 {result['duration_s']}s "
+                    f"(探测{result['attempts']}次)"
+                )
                 
-                self.logger.info(f"等待启动... ({i+1}/10)")
-                time.sleep(3)
+                # 发送Telegram/飞书通知
+                self.send_recovery_notification(result['duration_s'])
+                
+                return True
             
-            self.logger.error("OpenClaw启动失败")
+            self.logger.error(f"OpenClaw启动失败: {result.get('error', '')} (耗时 {result['duration_s']}s)")
+            self.notifier.notify("restart_failed", f"Gateway重启失败: {result.get('error', '')}", "error")
             return False
             
         except Exception as e:
+            self.restart_policy.record_result(False)
+            self.gateway_metrics.record_restart(False)
             self.logger.error(f"重启失败: {e}")
             return False
     
-    def send_recovery_notification(self):
-        """发送恢复通知"""
+    def _escalate_restart_storm(self, snapshot: Dict):
+        """重启熔断后的升级处理：当前配置不是最后已知正常版本时回滚"""
+        self.timeseries.append("gateway.restart_breaker_open", 1.0)
+        message = (
+            f"Gateway连续 {snapshot['consecutive_failures']} 次重启失败，"
+            f"自动重启暂停到 {datetime.fromtimestamp(snapshot['open_until']).strftime('%H:%M:%S')}"
+        )
+        self.logger.critical(message)
+        self.notifier.notify("restart_breaker_open", message, "critical")
+        good = self.backup_store.last_known_good()
         try:
-            # 这里可以集成Telegram通知
-            # 暂时先记录日志
-            self.logger.info("发送恢复通知")
+            with open(self.config_path, 'rb') as f:
+                current = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            current = None
+        if good is not None and good['hash'] != current:
+            self.rollback_config("重启熔断")
+    
+    def send_recovery_notification(self, duration_s: Optional[float] = None):
+        """发送恢复通知（进入通知队列，不阻塞检查）"""
+        message = "OpenClaw Gateway已自动恢复"
+        if duration_s is not None:
+            message += f"（重启耗时 {duration_s}秒）"
+        if self.notifier.notify("recovered", message, "info"):
+            self.logger.info("已提交恢复通知")
+    
+    def run_status_check(self):
+        """执行一次状态检查，必要时尝试恢复
+
+        进程确认不存在时直接重启；进程存在但/status失败时，由响应性检测判定无响应，
+        或连续失败达到max_retries次后才重启，单次慢响应或503不会重启Gateway。
+        """
+        is_running, message = self.check_openclaw_status()
+        
+        if message != "运行正常":
+            self.consecutive_failures += 1
+            self.logger.warning(
+                f"OpenClaw状态异常 ({self.consecutive_failures}): {message}"
+            )
+            
+            # 经重启策略许可后重启（预算、退避与熔断由策略负责；检查本身出错时不据此重启）
+            if message == "未找到运行进程":
+                self.logger.error("Gateway进程不存在，尝试恢复...")
+                self._recover_gateway()
+            elif is_running:
+                if self.consecutive_failures >= self.max_retries:
+                    self.logger.error(f"/status连续失败{self.consecutive_failures}次，尝试恢复...")
+                    self._recover_gateway()
+                else:
+                    self._restart_if_unresponsive()
+        else:
+            if self.consecutive_failures > 0:
+                self.logger.info("状态恢复正常")
+                self.consecutive_failures = 0
             
-            # 可以在这里调用Telegram API发送消息
-            # 需要配置Telegram bot token
+            self.logger.debug(f"状态正常: {message}")
             
+            # 进程存在但无响应（或长时间降级）时同样重启
+            if self._restart_if_unresponsive() == STATE_HEALTHY:
+                self.restart_policy.record_healthy()
+                self._mark_config_good()
+        
+        # 保存状态
+        self.gateway_metrics.up.set(1 if is_running else 0)
+        self.timeseries.append("gateway.running", 1.0 if is_running else 0.0)
+        self.save_status(is_running, message)
+        
+        # 监视当前的Gateway进程，退出时立即重新检查
+        self._watch_gateway_processes()
+    
+    def _recover_gateway(self):
+        """重启Gateway，成功后清零连续失败计数"""
+        if self.restart_openclaw():
+            self.consecutive_failures = 0
+            self.logger.info("恢复成功")
+        else:
+            self.logger.error("恢复失败")
+    
+    def _restart_if_unresponsive(self) -> str:
+        """响应性检测判定无响应或持续降级时重启，返回当前响应状态"""
+        responsiveness = self.responsiveness.evaluate()
+        state = responsiveness["state"]
+        degraded_for = time.time() - responsiveness["state_since"]
+        if state == STATE_HUNG or (state == STATE_DEGRADED and degraded_for > self.degraded_restart_after):
+            label = "无响应" if state == STATE_HUNG else "持续降级"
+            self.logger.error(f"Gateway{label} ({responsiveness['reason']})，尝试重启...")
+            self._recover_gateway()
+        return state
+    
+    def probe_responsiveness(self):
+        """探测一次/status并更新响应性状态，进入无响应状态时立即触发状态检查"""
+        if not self.process_tracker.pids():
+            self._check_config_grace(healthy=False)
+            return
+        
+        try:
+            response = self.http_pool.fetch_sync(self.gateway_status_url, ROUTE_DIRECT, timeout=self.hang_timeout)
+            latency = response["latency_ms"] if response["status_code"] == 200 else None
+        except Exception:
+            latency = None
+        self.responsiveness.record(latency)
+        self.gateway_metrics.observe_status(latency)
+        self.timeseries.append("gateway.status_latency_ms", latency if latency is not None else math.nan)
+        
+        previous = self.responsiveness.state
+        result = self.responsiveness.evaluate()
+        rolling_back = self._check_config_grace(healthy=result["state"] != STATE_HUNG)
+        if result["state"] != previous:
+            if result["state"] in (STATE_HUNG, STATE_DEGRADED):
+                self.logger.warning(f"Gateway响应状态: {previous} -> {result['state']} ({result['reason']})")
+            else:
+                self.logger.info(f"Gateway响应状态: {previous} -> {result['state']}")
+            if result["state"] == STATE_HUNG and not rolling_back:
+                self.scheduler.trigger("status")
+    
+    def handle_config_change(self):
+        """配置文件变化：校验并备份新配置，进入观察期
+
+        无效配置也先保存（reason为rejected）便于事后查看，同样进入观察期：
+        期间修正配置则以新配置为准，观察期结束或Gateway不健康时回滚。
+        """
+        try:
+            with open(self.config_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.logger.error("配置文件被删除，回滚到最后已知正常版本")
+            self.rollback_config("配置文件被删除")
+            return
+        
+        digest = hashlib.sha256(data).hexdigest()
+        good = self.backup_store.last_known_good()
+        if good and good['hash'] == digest:
+            self._pending_config = None
+            self.logger.debug("配置与最后已知正常版本一致")
+            return
+        pending = self._pending_config
+        if pending and pending['entry']['hash'] == digest:
+            return
+        
+        try:
+            config = json.loads(data)
+            if not isinstance(config, dict):
+                raise ValueError("顶层必须是JSON对象")
+        except ValueError as e:
+            entry, _ = self.backup_store.snapshot(data, reason="rejected")
+            self._pending_config = {
+                'entry': entry,
+                'deadline': time.time() + self.config_grace_period,
+                'unhealthy_since': None,
+                'error': str(e)
+            }
+            self.timeseries.append("config.rejected", 1.0)
+            self.logger.error(
+                f"新配置无效: {e}，已保存为版本 #{entry['id']}；"
+                f"{self.config_grace_period}秒内未修正或Gateway不健康时回滚"
+            )
+            return
+        
+        if not self.backup_config("config_change"):
+            return
+        entry = self.backup_store.latest()
+        self._pending_config = {
+            'entry': entry,
+            'deadline': time.time() + self.config_grace_period,
+            'unhealthy_since': None,
+            'error': None
+        }
+        self.timeseries.append("config.change", 1.0)
+        self.logger.info(f"检测到配置变化 (版本 #{entry['id']})，观察{self.config_grace_period}秒")
+        self.scheduler.trigger("responsiveness")
+    
+    def _check_config_grace(self, healthy: bool) -> bool:
+        """观察期内检查Gateway健康状况，返回是否已开始回滚"""
+        pending = self._pending_config
+        if pending is None:
+            return False
+        
+        now = time.time()
+        if healthy:
+            pending['unhealthy_since'] = None
+            if now < pending['deadline']:
+                return False
+            self._pending_config = None
+            if pending['error'] is None:
+                self.backup_store.mark_good(pending['entry'])
+                self.logger.info(f"新配置运行正常，记为最后已知正常版本 #{pending['entry']['id']}")
+                return False
+            self.logger.error(f"无效配置 (版本 #{pending['entry']['id']}) 在观察期内未修正，回滚")
+            self._config_executor.submit(self.rollback_config, f"配置无效: {pending['error']}")
+            return True
+        
+        if pending['unhealthy_since'] is None:
+            pending['unhealthy_since'] = now
+        if now - pending['unhealthy_since'] < self.config_unhealthy_after:
+            return False
+        
+        self._pending_config = None
+        self.logger.error(f"新配置 (版本 #{pending['entry']['id']}) 生效后Gateway不健康，回滚")
+        self._config_executor.submit(self.rollback_config, "观察期内Gateway不健康")
+        return True
+    
+    def rollback_config(self, reason: str) -> bool:
+        """原子回滚到最后已知正常的配置，Gateway未运行或无响应时重启"""
+        good = self.backup_store.last_known_good()
+        if good is None:
+            self.logger.error("没有最后已知正常的配置版本，无法回滚")
+            return False
+        
+        try:
+            self.backup_store.restore(good, self.config_path)
         except Exception as e:
-            self.logger.error(f"发送通知失败: {e}")
+            self.logger.error(f"配置回滚失败: {e}")
+            return False
+        
+        self.timeseries.append("config.rollback", 1.0)
+        self.logger.warning(f"配置已回滚到版本 #{good['id']} ({reason})")
+        self.notifier.notify("config_rollback", f"配置已回滚到版本 #{good['id']}（{reason}）", "warning")
+        
+        if not self.process_tracker.pids() or self.responsiveness.state == STATE_HUNG:
+            return self.restart_openclaw(bypass_policy=True)
+        return True
+    
+    def _resolve_config_version(self, spec: str) -> Tuple[str, str, Callable]:
+        """解析版本标识：live（当前配置）、good（最后已知正常）、latest或备份版本号
+
+        返回(描述, 内容sha256, 打开二进制流的函数)
+        """
+        if spec == "live":
+            hasher = hashlib.sha256()
+            with open(self.config_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+            return "live", hasher.hexdigest(), lambda: open(self.config_path, 'rb')
+        
+        if spec == "good":
+            entry = self.backup_store.last_known_good()
+        elif spec == "latest":
+            entry = self.backup_store.latest()
+        else:
+            entry = self.backup_store.get(int(spec.lstrip('#')))
+        if entry is None:
+            raise ValueError(f"找不到配置版本: {spec}")
+        return f"#{entry['id']}", entry['hash'], lambda: self.backup_store.open(entry)
+    
+    def diff_configs(self, old: str = "good", new: str = "live") -> Dict:
+        """流式比较两个配置版本，返回JSON-Patch操作（按内容哈希对缓存）"""
+        old_name, old_hash, open_old = self._resolve_config_version(old)
+        new_name, new_hash, open_new = self._resolve_config_version(new)
+        operations = self.diff_cache.diff(old_hash, new_hash, open_old, open_new)
+        return {
+            "from": old_name,
+            "to": new_name,
+            "from_hash": old_hash,
+            "to_hash": new_hash,
+            "operations": operations,
+        }
+    
+    def sample_telemetry(self):
+        """采样Gateway资源并写入时间序列"""
+        totals = self.telemetry.sample()
+        if totals:
+            for name, value in totals.items():
+                self.timeseries.append(f"gateway.{name}", value)
+    
+    def build_report(self, days: int = 30) -> Dict:
+        """按天汇总最近days天的可用性、/status延迟与重启次数"""
+        end = time.time()
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = (today - timedelta(days=days - 1)).timestamp()
+        running = self.timeseries.aggregate("gateway.running", start, end, 86400)
+        latency = {b["start"]: b for b in self.timeseries.aggregate("gateway.status_latency_ms", start, end, 86400)}
+        restarts = {b["start"]: b for b in self.timeseries.aggregate("gateway.restart_duration_s", start, end, 86400)}
+        
+        report = []
+        for bucket in running:
+            day_latency = latency.get(bucket["start"], {})
+            day_restarts = restarts.get(bucket["start"], {})
+            report.append({
+                "date": datetime.fromtimestamp(bucket["start"]).strftime("%Y-%m-%d"),
+                "availability": round(bucket["mean"], 4) if bucket["mean"] is not None else None,
+                "status_checks": bucket["count"],
+                "latency_mean_ms": round(day_latency["mean"], 2) if day_latency.get("mean") is not None else None,
+                "latency_max_ms": day_latency.get("max"),
+                "probe_failures": day_latency.get("count", 0) - day_latency.get("valid", 0),
+                "restarts": day_restarts.get("count", 0),
+            })
+        return {"days": days, "daily": report}
+    
+    def _watch_gateway_processes(self):
+        """为尚未监视的Gateway进程注册退出通知"""
+        watched = set(self.scheduler.watched_pids)
+        for pid in self.process_tracker.pids():
+            if pid not in watched:
+                self.scheduler.watch_pid(pid, self._on_gateway_exit)
+    
+    def _on_gateway_exit(self, pid: int):
+        """Gateway进程退出回调"""
+        self.logger.warning(f"Gateway进程已退出 (PID: {pid})，立即检查状态")
+        self.scheduler.trigger("status")
+    
+    def start_metrics_server(self) -> Optional[MetricsServer]:
+        """启动/metrics端点（端口为0或已被占用时不启动，不影响监控）"""
+        if self.metrics_server is not None or not self.metrics_port:
+            return self.metrics_server
+        try:
+            self.metrics_server = MetricsServer(
+                self.metrics, self.metrics_host, self.metrics_port, logger=self.logger
+            ).start()
+        except OSError as e:
+            self.logger.warning(f"指标端点启动失败 ({self.metrics_host}:{self.metrics_port}): {e}")
+        return self.metrics_server
+    
+    def stop_metrics_server(self):
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
     
     def monitor_loop(self):
-        """监控主循环"""
+        """监控主循环（事件驱动，阻塞直到stop_monitoring）"""
         self.is_monitoring = True
         self.logger.info("开始健康监控循环")
         
-        while self.is_monitoring:
-            try:
-                # 发送心跳
-                self.send_heartbeat()
-                
-                # 检查状态
-                is_running, message = self.check_openclaw_status()
-                
-                if not is_running:
-                    self.consecutive_failures += 1
-                    self.logger.warning(
-                        f"OpenClaw状态异常 ({self.consecutive_failures}): {message}"
-                    )
-                    
-                    # 检查心跳年龄
-                    heartbeat_age = self.check_heartbeat_age()
-                    if heartbeat_age and heartbeat_age > self.timeout_threshold:
-                        self.logger.error(
-                            f"心跳超时 ({heartbeat_age:.0f}秒)，尝试恢复..."
-                        )
-                        
-                        # 尝试重启
-                        success = self.restart_openclaw()
-                        if success:
-                            self.consecutive_failures = 0
-                            self.logger.info("恢复成功")
-                        else:
-                            self.logger.error("恢复失败")
-                else:
-                    if self.consecutive_failures > 0:
-                        self.logger.info("状态恢复正常")
-                        self.consecutive_failures = 0
-                    
-                    self.logger.debug(f"状态正常: {message}")
-                
-                # 保存状态
-                self.save_status(is_running, message)
-                
-                # 等待下一次检查
-                time.sleep(self.check_interval)
-                
-            except KeyboardInterrupt:
-                self.logger.info("监控被用户中断")
-                break
-            except Exception as e:
-                self.logger.error(f"监控循环异常: {e}")
-                time.sleep(60)  # 异常后等待1分钟
+        self.start_metrics_server()
+        self.config_watcher.start()
+        self.logger.info(f"配置监视已启动 ({self.config_watcher.mode})")
+        try:
+            self.scheduler.run()
+        except KeyboardInterrupt:
+            self.logger.info("监控被用户中断")
+        finally:
+            self.config_watcher.stop()
+            self.is_monitoring = False
+            self.stop_metrics_server()
+            self.notifier.stop(timeout=10)
+    
+    def run_fleet(self, config_path: Optional[str] = None):
+        """集群模式：按配置文件监视多个Gateway（阻塞直到stop_monitoring）"""
+        config = load_fleet_config(config_path or self.fleet_config_path)
+        last_publish = 0.0
+        
+        def publish(target):
+            nonlocal last_publish
+            now = time.monotonic()
+            if now - last_publish >= self.fleet_publish_interval:
+                last_publish = now
+                self.status_publisher.publish(self.fleet_status_file, self.fleet.snapshot())
+        
+        self.fleet = FleetMonitor(
+            config["targets"],
+            self.http_pool,
+            max_concurrency=config["max_concurrency"],
+            max_restart_workers=config["max_restart_workers"],
+            process_scan_interval=config["process_scan_interval"],
+            timeseries=self.timeseries,
+            on_update=publish,
+            state_dir=self.workspace_dir / "fleet_state",
+            notifier=self.notifier,
+            logger=self.logger,
+            metrics=self.metrics
+        )
+        self.is_monitoring = True
+        self.start_metrics_server()
+        try:
+            self.fleet.run()
+        except KeyboardInterrupt:
+            self.logger.info("集群监控被用户中断")
+        finally:
+            self.fleet.stop()
+            self.is_monitoring = False
+            self.stop_metrics_server()
+            self.status_publisher.publish(self.fleet_status_file, self.fleet.snapshot())
+            self.status_publisher.flush()
+            self.notifier.stop(timeout=10)
     
     def save_status(self, is_running: bool, message: str):
         """保存状态到文件"""
@@ -337,14 +726,17 @@ class FounderHealthMonitor:
             'message': message,
             'consecutive_failures': self.consecutive_failures,
             'heartbeat_age': self.check_heartbeat_age(),
-            'monitor_running': self.is_monitoring
+            'monitor_running': self.is_monitoring,
+            'restart_metrics': self.gateway_restarter.metrics,
+            'restart_policy': self.restart_policy.snapshot(),
+            'notifications': self.notifier.stats(),
+            'logging': pipeline_stats("FounderMonitor"),
+            'telemetry': self.telemetry.summary(),
+            'resource_warnings': self.telemetry.active_warnings,
+            'responsiveness': self.responsiveness.evaluate()
         }
         
-        try:
-            with open(self.status_file, 'w') as f:
-                json.dump(status_data, f, indent=2)
-        except Exception as e:
-            self.logger.error(f"保存状态失败: {e}")
+        self.status_publisher.publish(self.status_file, status_data)
     
     def get_status_report(self) -> Dict:
         """获取状态报告"""
@@ -360,9 +752,29 @@ class FounderHealthMonitor:
     def stop_monitoring(self):
         """停止监控"""
         self.is_monitoring = False
+        self.scheduler.stop()
+        if self.fleet is not None:
+            self.fleet.stop()
+        self.timeseries.flush()
+        self.status_publisher.flush()
+        self.stop_metrics_server()
+        self.notifier.stop(timeout=10)
         self.logger.info("停止健康监控")
 
 
+def report_days(argv: List[str]) -> int:
+    """解析report命令的天数参数（默认30），参数无效时抛出ValueError"""
+    if not argv:
+        return 30
+    try:
+        days = int(argv[0])
+    except ValueError:
+        days = 0
+    if days < 1:
+        raise ValueError(f"report的天数必须是正整数: {argv[0]}")
+    return days
+
+
 def main():
     """主函数"""
     print("=" * 60)
@@ -398,12 +810,52 @@ def main():
         
         elif command == "restart":
             print("重启OpenClaw...")
-            if monitor.restart_openclaw():
+            if monitor.restart_openclaw(bypass_policy=True):
                 print("✅ 重启成功")
             else:
                 print("❌ 重启失败")
             return
         
+        elif command == "report":
+            try:
+                days = report_days(sys.argv[2:])
+            except ValueError as e:
+                print(f"用法错误: {e}", file=sys.stderr)
+                sys.exit(2)
+            print(json.dumps(monitor.build_report(days), indent=2, ensure_ascii=False))
+            return
+        
+        elif command == "breaker":
+            # breaker [reset]：查看或手动复位重启熔断器
+            if len(sys.argv) > 2 and sys.argv[2] == "reset":
+                monitor.restart_policy.reset()
+                print("✅ 重启熔断器已复位")
+            print(json.dumps(monitor.restart_policy.snapshot(), indent=2, ensure_ascii=False))
+            return
+        
+        elif command == "fleet":
+            config_path = sys.argv[2] if len(sys.argv) > 2 else None
+            print(f"集群模式，配置文件: {config_path or monitor.fleet_config_path}")
+            print(f"状态文件: {monitor.fleet_status_file}")
+            try:
+                monitor.run_fleet(config_path)
+            except (OSError, ValueError) as e:
+                print(f"❌ 集群配置无效: {e}")
+            return
+        
+        elif command == "diff":
+            # diff [旧版本] [新版本]，默认比较最后已知正常版本与当前配置
+            old = sys.argv[2] if len(sys.argv) > 2 else "good"
+            new = sys.argv[3] if len(sys.argv) > 3 else "live"
+            try:
+                result = monitor.diff_configs(old, new)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"❌ 比较失败: {e}")
+                return
+            print(f"比较 {result['from']} -> {result['to']}: {len(result['operations'])} 处差异")
+            print(json.dumps(result['operations'], indent=2, ensure_ascii=False))
+            return
+        
         elif command == "test":
             print("运行测试...")
             # 测试各种功能
@@ -417,10 +869,11 @@ def main():
     # 如果没有特定命令，启动监控
     print("启动健康监控系统...")
     print(f"检查间隔: {monitor.check_interval}秒")
-    print(f"超时阈值: {monitor.timeout_threshold}秒")
-    print(f"日志文件: {monitor.workspace_dir}/logs/founder_monitor.log")
+    print(f"日志文件: {monitor.log_file}")
     print(f"状态文件: {monitor.status_file}")
     print(f"心跳文件: {monitor.heartbeat_file}")
+    if monitor.metrics_port:
+        print(f"指标端点: http://{monitor.metrics_host}:{monitor.metrics_port}/metrics")
     print("\n按 Ctrl+C 停止监控")
     print("=" * 60)
     
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Founder Gateway重启编排
+等待进程真正退出后再启动，按指数退避轮询/status，Gateway就绪即返回
+"""
+
+import logging
+import os
+import select
+import signal
+import subprocess
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import psutil
+
+from monitor.process_tracker import find_processes
+
+
+def wait_for_exit(pids: Sequence[int], timeout: float) -> List[int]:
+    """等待进程退出，返回超时后仍存活的PID
+
+    优先使用pidfd（Linux 5.3+，对非子进程同样有效），否则退回psutil轮询。
+    """
+    deadline = time.monotonic() + timeout
+    alive = []
+    for pid in pids:
+        remaining = max(deadline - time.monotonic(), 0)
+        try:
+            pidfd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            continue
+        except (AttributeError, OSError):
+            try:
+                psutil.Process(pid).wait(remaining)
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.TimeoutExpired:
+                alive.append(pid)
+            continue
+
+        try:
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+            if not poller.poll(remaining * 1000):
+                alive.append(pid)
+        finally:
+            os.close(pidfd)
+    return alive
+
+
+class GatewayRestartOrchestrator:
+    """Gateway重启编排器
+
+    1. 可选地执行正常停止命令
+    2. 向匹配的进程发送SIGTERM，通过pidfd等待退出，超时后SIGKILL
+    3. 启动Gateway，按指数退避（从initial_backoff开始，最长max_backoff）轮询状态接口
+    4. 状态接口返回200即视为就绪；启动命令以非零退出码结束则立即失败
+
+    每次重启的耗时记录在metrics中。
+    """
+
+    def __init__(
+        self,
+        start_command: Sequence[str],
+        status_url: str,
+        process_pattern: str,
+        stop_command: Optional[Sequence[str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        log_path: Optional[Path] = None,
+        http_pool=None,
+        stop_timeout: float = 10.0,
+        ready_timeout: float = 30.0,
+        initial_backoff: float = 0.05,
+        max_backoff: float = 1.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.start_command = list(start_command)
+        self.status_url = status_url
+        self.process_pattern = process_pattern
+        self.stop_command = list(stop_command) if stop_command else None
+        self.env = env
+        self.log_path = log_path
+        self.stop_timeout = stop_timeout
+        self.ready_timeout = ready_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.logger = logger or logging.getLogger("FounderMonitor")
+
+        if http_pool is None:
+            from network.http_pool import get_pool_manager
+            http_pool = get_pool_manager()
+        self.http_pool = http_pool
+
+        self.metrics = {
+            "restarts_total": 0,
+            "restart_failures_total": 0,
+            "last_restart_duration_s": None,
+            "last_restart_at": None,
+        }
+        self.restart_durations = deque(maxlen=100)
+
+    def stop(self, graceful: bool = True) -> float:
+        """停止Gateway，返回耗时（秒）"""
+        start = time.monotonic()
+
+        if graceful and self.stop_command:
+            try:
+                subprocess.run(self.stop_command, capture_output=True, text=True, timeout=self.stop_timeout)
+            except Exception as e:
+                self.logger.warning(f"正常停止失败: {e}")
+
+        processes = find_processes(self.process_pattern)
+        if processes:
+            sig = signal.SIGTERM if graceful else signal.SIGKILL
+            for process in processes:
+                try:
+                    process.send_signal(sig)
+                except psutil.NoSuchProcess:
+                    pass
+
+            alive = wait_for_exit([p.pid for p in processes], self.stop_timeout)
+            if alive:
+                self.logger.warning(f"进程未在{self.stop_timeout}秒内退出，强制结束: {alive}")
+                for pid in alive:
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                wait_for_exit(alive, 5)
+
+        return time.monotonic() - start
+
+    def _launch(self) -> subprocess.Popen:
+        if self.log_path is not None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "ab") as log_file:
+                return subprocess.Popen(
+                    self.start_command,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                    env=self.env,
+                    start_new_session=True,
+                )
+        return subprocess.Popen(
+            self.start_command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=self.env,
+            start_new_session=True,
+        )
+
+    def _log_tail(self, size: int = 200) -> str:
+        if self.log_path is None or not self.log_path.exists():
+            return ""
+        with open(self.log_path, "rb") as f:
+            f.seek(max(self.log_path.stat().st_size - size, 0))
+            return f.read().decode("utf-8", errors="replace")
+
+    def probe_ready(self, timeout: float = 1.0) -> Optional[float]:
+        """探测状态接口，就绪时返回延迟（毫秒），否则返回None"""
+        try:
+            response = self.http_pool.fetch_sync(self.status_url, timeout=timeout)
+        except Exception:
+            return None
+        return response["latency_ms"] if response["status_code"] == 200 else None
+
+    def wait_ready(self, process: Optional[subprocess.Popen] = None, timeout: Optional[float] = None) -> Dict:
+        """指数退避轮询状态接口直到就绪或超时"""
+        deadline = time.monotonic() + (timeout or self.ready_timeout)
+        backoff = self.initial_backoff
+        attempts = 0
+
+        while True:
+            attempts += 1
+            remaining = deadline - time.monotonic()
+            latency = self.probe_ready(timeout=max(min(remaining, 2.0), 0.1))
+            if latency is not None:
+                return {"ready": True, "attempts": attempts, "latency_ms": latency}
+
+            if process is not None and process.poll() not in (None, 0):
+                return {
+                    "ready": False,
+                    "attempts": attempts,
+                    "error": f"启动进程退出 (退出码: {process.returncode}) {self._log_tail()}".strip(),
+                }
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"ready": False, "attempts": attempts, "error": "等待就绪超时"}
+            time.sleep(min(backoff, remaining))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def restart(self, force: bool = False) -> Dict:
+        """重启Gateway，返回结果与各阶段耗时"""
+        start = time.monotonic()
+        result: Dict = {"success": False, "pid": None}
+        try:
+            stop_seconds = self.stop(graceful=not force)
+
+            process = self._launch()
+            result["pid"] = process.pid
+
+            ready_start = time.monotonic()
+            readiness = self.wait_ready(process)
+            result.update(readiness)
+            result["success"] = readiness["ready"]
+            result["phases"] = {
+                "stop_s": round(stop_seconds, 3),
+                "ready_s": round(time.monotonic() - ready_start, 3),
+            }
+        except Exception as e:
+            result["error"] = str(e)
+
+        duration = time.monotonic() - start
+        result["duration_s"] = round(duration, 3)
+
+        self.metrics["restarts_total"] += 1
+        if not result["success"]:
+            self.metrics["restart_failures_total"] += 1
+        self.metrics["last_restart_duration_s"] = result["duration_s"]
+        self.metrics["last_restart_at"] = time.time()
+        self.restart_durations.append(duration)
+        return result
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Founder JSON结构化差异
+流式解析两个JSON文档，按层计算子树哈希，只深入哈希不同的子树，输出JSON-Patch风格的操作。
+内存占用与差异所在容器的宽度成正比，与文档大小无关；结果按内容哈希对缓存
+"""
+
+import codecs
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path as FilePath
+from typing import IO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from monitor.status_publisher import atomic_write_json
+
+Path = Tuple
+StreamOpener = Callable[[], IO[bytes]]
+
+_TOKEN_BODY = (
+    r'\s*(?:([{}\[\]:,])|("[^"\\]*(?:\\.[^"\\]*)*")|(-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)|(true|false|null))'
+)
+_TOKEN = re.compile(f"({_TOKEN_BODY})", re.DOTALL)
+# 缓冲区开头最长的连续合法记号序列，整块交给findall在C层切分
+_TOKEN_RUN = re.compile(f"(?:{_TOKEN_BODY})*", re.DOTALL)
+_LITERALS = {"true": True, "false": False, "null": None}
+_MAX_INLINE_SCALAR = 256
+_MISSING = object()
+# 容器哈希算法变化时递增，使旧版本缓存的差异失效
+DIFF_CACHE_VERSION = 2
+
+
+def iter_token_batches(stream: IO[bytes], chunk_size: int = 256 * 1024) -> Iterator[List[Tuple[str, ...]]]:
+    """增量词法分析，按块返回记号列表，每个记号为(原文, 标点, 字符串, 数字, 字面量)"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    eof = False
+    while not eof:
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += decoder.decode(chunk, final=eof)
+        end = _TOKEN_RUN.match(buffer).end()
+        tokens = _TOKEN.findall(buffer, 0, end)
+        # 最后一个记号可能被块边界截断（如"15."），留到下一块再解析
+        if not eof and tokens:
+            end -= len(tokens.pop()[0])
+        if eof and buffer[end:].strip():
+            raise ValueError(f"JSON语法错误: {buffer[end:end + 40]!r}")
+        buffer = buffer[end:]
+        if tokens:
+            yield tokens
+
+
+def _scalar(string: str, number: str, literal: str) -> Tuple[object, str]:
+    """解析标量，返回(值, 规范化文本)"""
+    if string:
+        if "\\" not in string:
+            return string[1:-1], string
+        value = json.loads(string)
+        return value, json.dumps(value, ensure_ascii=False)
+    if number:
+        if "." in number or "e" in number or "E" in number:
+            value = float(number)
+            return value, repr(value)
+        return int(number), number
+    return _LITERALS[literal], literal
+
+
+def _scalar_digest(text: str) -> str:
+    if len(text) <= _MAX_INLINE_SCALAR:
+        return "s" + text
+    return "h" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _container_digest(is_map: bool, parts: List[str]) -> str:
+    # 对象的哈希与键顺序无关；类型写入哈希内容，空对象与空数组的哈希不同
+    if is_map:
+        parts.sort()
+        content = "m|" + "m".join(parts)
+    else:
+        content = "a|" + "a".join(parts)
+    return "c" + hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def scan_document(
+    stream: IO[bytes], targets: Set[Path], extract: Set[Path] = frozenset()
+) -> Tuple[Optional[Tuple[str, str]], Dict[Path, Dict], Dict[Path, object]]:
+    """单次流式扫描
+
+    返回根节点(类型, 哈希)；targets中每个容器的子节点{键: (类型, 哈希, 短标量值)}；
+    以及extract中每个路径上的完整值。
+    """
+    extract_parents = {path[:-1] for path in extract if path}
+    root: Optional[Tuple[str, str]] = None
+    found: Dict[Path, Dict] = {}
+    values: Dict[Path, object] = {}
+    # 栈帧: [路径, 是否对象, 子节点摘要, 下标, 当前键, 记录的子节点, 正在构建的值, 是否提取子节点, 等待键]
+    stack: List[list] = []
+    frame: Optional[list] = None
+
+    for tokens in iter_token_batches(stream):
+        for _, punct, string, number, literal in tokens:
+            if punct:
+                if punct == ",":
+                    if frame[1]:
+                        frame[8] = True
+                    continue
+                if punct == ":":
+                    continue
+                if punct in "{[":
+                    if frame is None:
+                        path = ()
+                    else:
+                        path = frame[0] + ((frame[4],) if frame[1] else (frame[3],))
+                    building = None
+                    if path in extract or (frame is not None and frame[6] is not None):
+                        building = {} if punct == "{" else []
+                    if frame is not None:
+                        stack.append(frame)
+                    frame = [
+                        path, punct == "{", [], 0, None, {} if path in targets else None,
+                        building, path in extract_parents, punct == "{",
+                    ]
+                    continue
+
+                # 容器结束
+                if frame is None or frame[1] != (punct == "}"):
+                    raise ValueError("JSON语法错误: 括号不匹配")
+                path, is_map, parts, _, _, children, building = frame[:7]
+                kind = "map" if is_map else "array"
+                digest = _container_digest(is_map, parts)
+                if children is not None:
+                    found[path] = children
+                frame = stack.pop() if stack else None
+                if frame is None:
+                    root = (kind, digest)
+                    if building is not None:
+                        values[path] = building
+                    continue
+                value, inline = building, _MISSING
+            else:
+                if frame is not None and frame[8]:
+                    frame[4] = string[1:-1] if "\\" not in string else json.loads(string)
+                    frame[8] = False
+                    continue
+                value, text = _scalar(string, number, literal)
+                kind = "scalar"
+                digest = _scalar_digest(text)
+                inline = value if len(text) <= _MAX_INLINE_SCALAR else _MISSING
+                if frame is None:
+                    root = (kind, digest)
+                    if () in extract:
+                        values[()] = value
+                    continue
+
+            # 把子节点计入父容器
+            key = frame[4] if frame[1] else frame[3]
+            if frame[1]:
+                frame[2].append(f"{len(key)}:{key}{digest}")
+            else:
+                frame[2].append(f"{len(digest)}:{digest}")
+                frame[3] += 1
+            if frame[5] is not None:
+                frame[5][key] = (kind, digest, inline)
+            if frame[6] is not None:
+                if frame[1]:
+                    frame[6][key] = value
+                else:
+                    frame[6].append(value)
+            elif frame[7]:
+                path = frame[0] + (key,)
+                if path in extract:
+                    values[path] = value
+
+    if frame is not None:
+        raise ValueError("JSON语法错误: 文档不完整")
+    return root, found, values
+
+
+def json_pointer(path: Path) -> str:
+    """路径转为JSON Pointer（RFC 6901）"""
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in path)
+
+
+def iter_json_diff(open_a: StreamOpener, open_b: StreamOpener) -> Iterator[Dict[str, object]]:
+    """逐层比较两个文档，产出JSON-Patch操作
+
+    open_a/open_b每次调用返回一个新的二进制流；每一层差异各扫描一次两个文档，
+    上一层需要的长值在扫描文档B时顺带提取。数组按下标比较。
+    """
+    level: Set[Path] = {()}
+    pending: List[Tuple[str, Path, object]] = []
+    first = True
+    while level or pending:
+        extract = {path for op, path, value in pending if op != "remove" and value is _MISSING}
+        children_a: Dict[Path, Dict] = {}
+        children_b: Dict[Path, Dict] = {}
+        extracted: Dict[Path, object] = {}
+        if level:
+            with open_a() as stream:
+                root_a, children_a, _ = scan_document(stream, level)
+        if level or extract:
+            with open_b() as stream:
+                root_b, children_b, extracted = scan_document(stream, level, extract)
+
+        for op, path, value in pending:
+            operation = {"op": op, "path": json_pointer(path)}
+            if op != "remove":
+                operation["value"] = extracted[path] if value is _MISSING else value
+            yield operation
+        pending = []
+
+        if first:
+            first = False
+            if root_a == root_b:
+                return
+            if root_a[0] != root_b[0] or root_a[0] == "scalar":
+                pending.append(("replace", (), _MISSING))
+                level = set()
+                continue
+
+        next_level: Set[Path] = set()
+        for parent in sorted(level, key=lambda path: [str(part) for part in path]):
+            a = children_a.get(parent, {})
+            b = children_b.get(parent, {})
+            removed = [key for key in a if key not in b]
+            # 数组从尾部开始删除，下标才不会错位
+            if removed and isinstance(removed[0], int):
+                removed.sort(reverse=True)
+            for key in removed:
+                pending.append(("remove", parent + (key,), None))
+            for key, (kind_b, digest_b, inline_b) in b.items():
+                if key not in a:
+                    pending.append(("add", parent + (key,), inline_b))
+                    continue
+                kind_a, digest_a, _ = a[key]
+                if digest_a == digest_b:
+                    continue
+                if kind_a == kind_b and kind_a != "scalar":
+                    next_level.add(parent + (key,))
+                else:
+                    pending.append(("replace", parent + (key,), inline_b))
+        level = next_level
+
+
+class DiffCache:
+    """按(哈希A, 哈希B)缓存差异结果，内存保留最近max_memory项，磁盘保留最近max_files项"""
+
+    def __init__(self, root, max_memory: int = 32, max_files: int = 256):
+        self.root = FilePath(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_memory = max_memory
+        self.max_files = max_files
+        self._memory: "OrderedDict[Tuple[str, str], List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, hash_a: str, hash_b: str) -> FilePath:
+        return self.root / f"{hash_a}-{hash_b}.v{DIFF_CACHE_VERSION}.json"
+
+    def get(self, hash_a: str, hash_b: str) -> Optional[List[Dict]]:
+        key = (hash_a, hash_b)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        try:
+            with open(self._path(hash_a, hash_b), "r", encoding="utf-8") as f:
+                operations = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        self._remember(key, operations)
+        with self._lock:
+            self.hits += 1
+        return operations
+
+    def put(self, hash_a: str, hash_b: str, operations: List[Dict]):
+        self._remember((hash_a, hash_b), operations)
+        atomic_write_json(self._path(hash_a, hash_b), operations, fsync=False)
+        files = sorted(self.root.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in files[:max(len(files) - self.max_files, 0)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _remember(self, key: Tuple[str, str], operations: List[Dict]):
+        with self._lock:
+            self._memory[key] = operations
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def diff(self, hash_a: str, hash_b: str, open_a: StreamOpener, open_b: StreamOpener) -> List[Dict]:
+        """返回缓存的差异，未命中时计算并缓存"""
+        operations = self.get(hash_a, hash_b)
+        if operations is None:
+            operations = [] if hash_a == hash_b else list(iter_json_diff(open_a, open_b))
+            self.put(hash_a, hash_b, operations)
+        return operations
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Founder日志管道
+健康监控与网络管理共用：记录在调用线程中只做采样判断和入队，格式化与磁盘I/O由
+QueueListener线程完成；文件输出为JSON Lines，按config/logging.json中的配置轮转
+"""
+
+import atexit
+import importlib
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+LOGGING_CONFIG_PATH = PROJECT_ROOT / "config" / "logging.json"
+
+# 与examples/basic_setup.py生成的config/logging.json相同，配置文件不存在时使用
+DEFAULT_LOGGING_CONFIG = {
+    "version": 1,
+    "formatters": {
+        "detailed": {"format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"},
+        "simple": {"format": "%(levelname)s: %(message)s"},
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "level": "INFO",
+            "formatter": "simple",
+            "stream": "ext://sys.stdout",
+        },
+        "file": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "level": "DEBUG",
+            "formatter": "detailed",
+            "filename": "logs/system.log",
+            "maxBytes": 10485760,
+            "backupCount": 5,
+        },
+    },
+    "loggers": {
+        "monitor": {"level": "DEBUG", "handlers": ["file"], "propagate": False},
+        "network": {"level": "DEBUG", "handlers": ["file"], "propagate": False},
+    },
+}
+
+# LogRecord自带的属性，其余属性（logger.info(..., extra={...})传入的）作为结构化字段输出
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_pipelines: Dict[str, "LogPipeline"] = {}
+_pipelines_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条记录一行JSON：时间、级别、logger、消息、线程，以及extra传入的字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """重复DEBUG记录采样
+
+    按(logger, 消息模板)计数：每个window秒内前burst条全部保留，之后每sample_every条保留一条，
+    保留的记录带sampled_out字段，表示上次保留以来丢弃的条数。INFO及以上不采样。
+    过滤器在各个记录日志的线程中调用，计数在锁内更新。
+    """
+
+    def __init__(self, burst: int = 10, sample_every: int = 100, window: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.sample_every = sample_every
+        self.window = window
+        self._counters: Dict[tuple, list] = {}  # key -> [窗口起点, 窗口内条数, 未输出条数]
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, record.msg)
+        now = record.created
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                if len(self._counters) > 10000:
+                    self._counters.clear()
+                suppressed = counter[2] if counter is not None else 0
+                counter = self._counters[key] = [now, 0, 0]
+                if suppressed:
+                    record.sampled_out = suppressed
+            counter[1] += 1
+            if counter[1] <= self.burst or counter[1] % self.sample_every == 0:
+                if counter[2]:
+                    record.sampled_out = counter[2]
+                    counter[2] = 0
+                return True
+            counter[2] += 1
+            self.dropped += 1
+            return False
+
+
+class TimedQueueHandler(logging.handlers.QueueHandler):
+    """入队处理器：只合并消息参数，不在调用线程格式化；统计每条记录的入队开销"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.records = 0
+        self.dropped = 0
+        self.total_seconds = 0.0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 异常信息在这里转成文本（traceback对象不能跨线程长期持有）
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record: logging.LogRecord):
+        start = time.perf_counter()
+        super().emit(record)
+        self.total_seconds += time.perf_counter() - start
+        self.records += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # 队列已满时等待后台线程腾出空间，保证停止时写完所有记录
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """一个logger的日志管道（QueueHandler -> 队列 -> QueueListener -> 各输出处理器）"""
+
+    def __init__(self, logger: logging.Logger, handler: TimedQueueHandler, sampler: DebugSampler,
+                 listener: _QueueListener, outputs: List[str], filename: Optional[Path] = None):
+        self.logger = logger
+        self.filename = filename
+        self.handler = handler
+        self.sampler = sampler
+        self.listener = listener
+        self.outputs = outputs
+        self.stopped = False
+
+    def stats(self) -> Dict[str, object]:
+        records = self.handler.records
+        return {
+            "records": records,
+            "avg_enqueue_us": round(self.handler.total_seconds / records * 1e6, 2) if records else None,
+            "queue_dropped": self.handler.dropped,
+            "debug_sampled_out": self.sampler.dropped,
+            "queued": self.handler.queue.qsize(),
+            "outputs": self.outputs,
+        }
+
+    def stop(self):
+        """停止后台线程并写完队列中的记录（可重复调用）"""
+        if self.stopped:
+            return
+        self.stopped = True
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+def load_logging_config(path: Optional[Path] = None) -> Dict:
+    """读取日志配置（与logging.config.dictConfig格式相同），不存在时使用默认配置"""
+    path = Path(path) if path else LOGGING_CONFIG_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return DEFAULT_LOGGING_CONFIG
+
+
+def _resolve(name: str):
+    module, _, attr = name.rpartition(".")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _build_handler(spec: Dict, formatters: Dict, filename: Optional[Path]) -> logging.Handler:
+    kwargs = {k: v for k, v in spec.items() if k not in ("class", "level", "formatter", "filters")}
+    if isinstance(kwargs.get("stream"), str) and kwargs["stream"].startswith("ext://"):
+        kwargs["stream"] = _resolve(kwargs["stream"][len("ext://"):])
+    if "filename" in kwargs:
+        path = filename or Path(kwargs["filename"])
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        kwargs["filename"] = str(path)
+        kwargs.setdefault("encoding", "utf-8")
+    handler = _resolve(spec["class"])(**kwargs)
+    handler.setLevel(spec.get("level", "NOTSET"))
+
+    # 写文件的处理器输出JSON Lines，控制台沿用配置中的文本格式
+    if "filename" in kwargs:
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        fmt = formatters.get(spec.get("formatter"), {})
+        handler.setFormatter(logging.Formatter(fmt.get("format"), fmt.get("datefmt")))
+    return handler
+
+
+def setup_logging(
+    name: str,
+    section: str,
+    filename: Optional[Path] = None,
+    console: bool = False,
+    config_path: Optional[Path] = None,
+    queue_size: int = 10000,
+) -> logging.Logger:
+    """为logger建立日志管道（同一进程内重复调用返回同一个logger，不会重复添加处理器）
+
+    section为配置文件loggers中的条目（"monitor"或"network"），决定级别与输出处理器；
+    filename覆盖文件处理器的路径；console为True时即使配置中没有也输出到控制台。
+    输出在第一次调用时确定：之后以不同的filename调用仍写入原文件，并在日志中记一条警告。
+    """
+    with _pipelines_lock:
+        pipeline = _pipelines.get(name)
+        if pipeline is not None:
+            if filename is not None and pipeline.filename is not None and Path(filename) != pipeline.filename:
+                pipeline.logger.warning(
+                    f"日志管道{name}已写入{pipeline.filename}，忽略新的日志文件{filename}"
+                )
+            return pipeline.logger
+
+        config = load_logging_config(config_path)
+        logger_config = config.get("loggers", {}).get(section, {})
+        handler_names = list(logger_config.get("handlers", ["file"]))
+        if console and "console" not in handler_names and "console" in config.get("handlers", {}):
+            handler_names.append("console")
+
+        outputs = []
+        handlers = []
+        for handler_name in handler_names:
+            spec = config["handlers"][handler_name]
+            handler = _build_handler(spec, config.get("formatters", {}), filename)
+            handlers.append(handler)
+            outputs.append(getattr(handler, "baseFilename", handler_name))
+
+        log_queue: queue.Queue = queue.Queue(queue_size)
+        listener = _QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+        queue_handler = TimedQueueHandler(log_queue)
+        sampler = DebugSampler()
+        queue_handler.addFilter(sampler)
+
+        logger = logging.getLogger(name)
+        for existing in list(logger.handlers):
+            logger.removeHandler(existing)
+        logger.addHandler(queue_handler)
+        logger.setLevel(logger_config.get("level", "INFO"))
+        logger.propagate = logger_config.get("propagate", False)
+
+        pipeline = LogPipeline(
+            logger, queue_handler, sampler, listener, outputs, Path(filename) if filename is not None else None
+        )
+        _pipelines[name] = pipeline
+        atexit.register(pipeline.stop)
+        return logger
+
+
+def pipeline_stats(name: str) -> Optional[Dict[str, object]]:
+    """日志管道统计（入队开销、采样丢弃数等）"""
+    pipeline = _pipelines.get(name)
+    return pipeline.stats() if pipeline is not None else None
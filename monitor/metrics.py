@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Founder指标导出
+标准库实现的Prometheus/OpenMetrics文本格式导出：每个标签组合在首次使用时分配一个槽位
+（预先生成好输出行前缀），之后的更新只在该槽位自己的锁内改数值；
+抓取时只读取这些数值拼接文本，不触发任何健康检查
+"""
+
+import bisect
+import logging
+import math
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# 探测延迟（秒）与重启耗时（秒）的桶边界
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RESTART_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _CounterValue:
+    __slots__ = ("_value", "_lock", "_line")
+
+    def __init__(self, line: str):
+        self._value = 0
+        self._lock = threading.Lock()
+        self._line = line
+
+    def inc(self, amount: float = 1):
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+    def render(self, lines: List[str]):
+        lines.append(self._line + _format_value(self._value))
+
+
+class _GaugeValue:
+    __slots__ = ("_value", "_lock", "_line", "_function")
+
+    def __init__(self, line: str):
+        self._value = 0
+        self._lock = threading.Lock()
+        self._line = line
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """抓取时调用function取值（只应读取已有状态，不能做I/O）"""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is None:
+            return self._value
+        try:
+            return self._function()
+        except Exception:
+            return math.nan
+
+    def render(self, lines: List[str]):
+        lines.append(self._line + _format_value(self.get()))
+
+
+class _HistogramValue:
+    __slots__ = ("_upper", "_counts", "_sum", "_lock", "_bucket_lines", "_sum_line", "_count_line")
+
+    def __init__(self, upper: Tuple[float, ...], bucket_lines: List[str], sum_line: str, count_line: str):
+        self._upper = upper
+        self._counts = [0] * (len(upper) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+        self._bucket_lines = bucket_lines
+        self._sum_line = sum_line
+        self._count_line = count_line
+
+    def observe(self, value: float):
+        # 桶上界包含等于的值（le），最后一个槽位是+Inf
+        index = bisect.bisect_left(self._upper, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+    def render(self, lines: List[str]):
+        counts, total = self.snapshot()
+        cumulative = 0
+        for line, count in zip(self._bucket_lines, counts):
+            cumulative += count
+            lines.append(line + str(cumulative))
+        lines.append(self._sum_line + _format_value(total))
+        lines.append(self._count_line + str(cumulative))
+
+
+class _Metric:
+    """指标族：按标签值元组保存各时间序列的槽位"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> object:
+        """取得（必要时创建）一个标签组合的槽位；热路径上应保存返回值重复使用"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}")
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child(key)
+        return child
+
+    def remove(self, *values):
+        with self._lock:
+            self._children.pop(tuple(str(value) for value in values), None)
+
+    def _new_child(self, key: Tuple[str, ...]) -> object:
+        raise NotImplementedError
+
+    def _type_name(self, openmetrics: bool) -> str:
+        return self.name
+
+    def render(self, lines: List[str], openmetrics: bool):
+        with self._lock:
+            children = list(self._children.values())
+        type_name = self._type_name(openmetrics)
+        lines.append(f"# HELP {type_name} {_escape(self.documentation)}")
+        lines.append(f"# TYPE {type_name} {self.kind}")
+        for child in children:
+            child.render(lines)
+
+
+class Counter(_Metric):
+    """单调递增计数器，输出为<name>_total"""
+
+    kind = "counter"
+
+    def _new_child(self, key: Tuple[str, ...]) -> _CounterValue:
+        return _CounterValue(f"{self.name}_total{_labels_text(self.labelnames, key)} ")
+
+    def _type_name(self, openmetrics: bool) -> str:
+        # OpenMetrics的TYPE行使用不带_total的族名
+        return self.name if openmetrics else f"{self.name}_total"
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """可增可减的数值，或抓取时由回调读取"""
+
+    kind = "gauge"
+
+    def _new_child(self, key: Tuple[str, ...]) -> _GaugeValue:
+        return _GaugeValue(f"{self.name}{_labels_text(self.labelnames, key)} ")
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    """固定桶直方图"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bucket) for bucket in buckets if not math.isinf(bucket)))
+
+    def _new_child(self, key: Tuple[str, ...]) -> _HistogramValue:
+        bucket_lines = [
+            self.name + "_bucket" + _labels_text(self.labelnames, key, 'le="%s"' % _format_value(bound)) + " "
+            for bound in self.buckets + (math.inf,)
+        ]
+        labels = _labels_text(self.labelnames, key)
+        return _HistogramValue(self.buckets, bucket_lines, f"{self.name}_sum{labels} ", f"{self.name}_count{labels} ")
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+class MetricsRegistry:
+    """指标注册表（同名指标重复注册时返回已有的指标族）"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.scrapes = 0
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同类型或标签注册")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self, openmetrics: bool = False) -> str:
+        """按文本格式输出全部指标（openmetrics为True时输出OpenMetrics 1.0格式）"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+            self.scrapes += 1
+        lines: List[str] = []
+        for metric in metrics:
+            metric.render(lines, openmetrics)
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """进程内共享的指标注册表（健康监控与网络管理共用）"""
+    return _registry
+
+
+class GatewayMetrics:
+    """一个Gateway的指标槽位（健康监控、集群模式与网络管理共用同一组指标族）"""
+
+    def __init__(self, registry: MetricsRegistry, target: str):
+        up = registry.gauge("founder_gateway_up", "Gateway最近一次检查是否正常", ("target",))
+        failures = registry.gauge("founder_gateway_consecutive_failures", "Gateway连续检查失败次数", ("target",))
+        latency = registry.histogram(
+            "founder_gateway_status_latency_seconds", "Gateway状态接口响应延迟", ("target",), LATENCY_BUCKETS
+        )
+        probes = registry.counter("founder_gateway_status_probes", "Gateway状态接口探测次数", ("target", "result"))
+        restarts = registry.counter("founder_gateway_restarts", "Gateway重启次数", ("target", "result"))
+        duration = registry.histogram(
+            "founder_gateway_restart_duration_seconds", "Gateway重启耗时（停止到就绪）", ("target", "result"),
+            RESTART_BUCKETS
+        )
+        self.up = up.labels(target)
+        self.consecutive_failures = failures.labels(target)
+        self.status_latency = latency.labels(target)
+        self.probes_ok = probes.labels(target, "success")
+        self.probes_failed = probes.labels(target, "failure")
+        self.restarts = {result: restarts.labels(target, result) for result in ("success", "failure", "denied")}
+        self.restart_duration = {result: duration.labels(target, result) for result in ("success", "failure")}
+
+    def observe_status(self, latency_ms: Optional[float]):
+        """记录一次状态接口探测（None表示失败）"""
+        if latency_ms is None:
+            self.probes_failed.inc()
+        else:
+            self.probes_ok.inc()
+            self.status_latency.observe(latency_ms / 1000.0)
+
+    def record_restart(self, success: bool, duration_s: Optional[float] = None):
+        result = "success" if success else "failure"
+        self.restarts[result].inc()
+        if duration_s is not None:
+            self.restart_duration[result].observe(duration_s)
+
+    def record_denied(self):
+        """重启策略拒绝的重启"""
+        self.restarts["denied"].inc()
+
+
+class MetricsServer:
+    """内嵌的/metrics HTTP端点（后台线程，按Accept头选择Prometheus或OpenMetrics格式）"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, host: str = "127.0.0.1", port: int = 9464,
+                 logger: Optional[logging.Logger] = None):
+        self.registry = registry or get_registry()
+        self.host = host
+        self.port = port
+        self.logger = logger or logging.getLogger("FounderMonitor")
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urllib.parse.urlsplit(self.path).path
+                if path not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = registry.render(openmetrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MetricsServer":
+        if self._server is not None:
+            return self
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="FounderMetrics", daemon=True)
+        self._thread.start()
+        self.logger.info(f"指标端点已启动: {self.url}")
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
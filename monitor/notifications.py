@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Founder通知推送
+notify()只把事件放入有界队列，不阻塞检查；后台在连接池事件循环中把一段时间内的事件
+合并为一条摘要，按平台限速发送到Telegram/飞书，失败时退避重试
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from network.proxy_router import ROUTE_DIRECT
+
+LEVEL_ICONS = {"critical": "🔴", "error": "🔴", "warning": "🟡", "info": "🟢"}
+
+
+class NotificationChannel:
+    """通知渠道基类：限速（令牌桶）与重试策略，子类负责构造请求和解析响应"""
+
+    name = "channel"
+    max_length = 4000
+
+    def __init__(
+        self,
+        base_url: str,
+        rate_per_minute: float,
+        burst: int,
+        route: str = ROUTE_DIRECT,
+        max_attempts: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        timeout: float = 10.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.route = route
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.last_error: Optional[str] = None
+
+    def build_request(self, text: str) -> Tuple[str, Dict]:
+        raise NotImplementedError
+
+    def parse_response(self, response: Dict) -> Tuple[bool, Optional[float], Optional[str]]:
+        """返回(是否成功, 需要等待的秒数（None表示不可重试）, 错误信息)"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _retry_after(response: Dict, default: float = 0.0) -> float:
+        try:
+            return float(response["headers"].get("Retry-After", default))
+        except (TypeError, ValueError):
+            return default
+
+    async def wait_for_slot(self):
+        """令牌桶限速：没有令牌时等待补充"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_minute / 60.0)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * 60.0 / self.rate_per_minute)
+
+    async def deliver(self, http_pool, text: str, logger: logging.Logger) -> bool:
+        """发送一条消息（含限速与重试），返回是否成功"""
+        url, payload = self.build_request(text[:self.max_length])
+        backoff = self.initial_backoff
+        for attempt in range(1, self.max_attempts + 1):
+            await self.wait_for_slot()
+            try:
+                response = await http_pool.post_json(url, payload, route=self.route, timeout=self.timeout)
+                ok, wait, error = self.parse_response(response)
+            except Exception as e:
+                ok, wait, error = False, 0.0, f"{type(e).__name__}: {e}"
+            if ok:
+                self.sent += 1
+                return True
+
+            self.last_error = error
+            if wait is None or attempt == self.max_attempts:
+                break
+            self.retries += 1
+            delay = max(wait, backoff)
+            logger.warning(f"{self.name}通知发送失败（第{attempt}次）: {error}，{delay:.1f}秒后重试")
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, self.max_backoff)
+
+        self.failed += 1
+        logger.error(f"{self.name}通知发送失败: {self.last_error}")
+        return False
+
+    def stats(self) -> Dict[str, object]:
+        return {"sent": self.sent, "failed": self.failed, "retries": self.retries, "last_error": self.last_error}
+
+
+class TelegramChannel(NotificationChannel):
+    """Telegram Bot API（同一会话约每分钟20条）"""
+
+    name = "Telegram"
+    max_length = 4096
+
+    def __init__(self, token: str, chat_id: str, base_url: str = "https://api.telegram.org", **kwargs):
+        kwargs.setdefault("rate_per_minute", 20)
+        kwargs.setdefault("burst", 3)
+        super().__init__(base_url, **kwargs)
+        self.token = token
+        self.chat_id = chat_id
+
+    def build_request(self, text: str) -> Tuple[str, Dict]:
+        url = f"{self.base_url}/bot{self.token}/sendMessage"
+        return url, {"chat_id": self.chat_id, "text": text, "disable_web_page_preview": True}
+
+    def parse_response(self, response: Dict) -> Tuple[bool, Optional[float], Optional[str]]:
+        data = response["json"] or {}
+        status = response["status_code"]
+        if status == 200 and data.get("ok"):
+            return True, None, None
+        error = f"HTTP {status}: {data.get('description', '')}"
+        if status == 429:
+            retry_after = (data.get("parameters") or {}).get("retry_after")
+            return False, float(retry_after) if retry_after else self._retry_after(response, 1.0), error
+        if status >= 500:
+            return False, 0.0, error
+        return False, None, error
+
+
+class FeishuChannel(NotificationChannel):
+    """飞书自定义机器人Webhook（每分钟100条、每秒5条）"""
+
+    name = "飞书"
+    max_length = 20000
+
+    def __init__(self, token: str, base_url: str = "https://open.feishu.cn", **kwargs):
+        kwargs.setdefault("rate_per_minute", 100)
+        kwargs.setdefault("burst", 5)
+        super().__init__(base_url, **kwargs)
+        self.token = token
+
+    def build_request(self, text: str) -> Tuple[str, Dict]:
+        url = f"{self.base_url}/open-apis/bot/v2/hook/{self.token}"
+        return url, {"msg_type": "text", "content": {"text": text}}
+
+    def parse_response(self, response: Dict) -> Tuple[bool, Optional[float], Optional[str]]:
+        data = response["json"] or {}
+        status = response["status_code"]
+        code = data.get("code", data.get("StatusCode", 0 if status == 200 else None))
+        if status == 200 and code == 0:
+            return True, None, None
+        error = f"HTTP {status}, code {code}: {data.get('msg', data.get('StatusMessage', ''))}"
+        # 9499/11232为频率限制
+        if status == 429 or code in (9499, 11232):
+            return False, self._retry_after(response, 1.0), error
+        if status >= 500:
+            return False, 0.0, error
+        return False, None, error
+
+
+def channels_from_env(env: Optional[Mapping[str, str]] = None) -> List[NotificationChannel]:
+    """根据环境变量创建渠道（与.env.example一致）
+
+    TELEGRAM_BOT_TOKEN + TELEGRAM_CHAT_ID；FEISHU_BOT_TOKEN（Webhook地址最后一段）；
+    TELEGRAM_API_BASE / FEISHU_API_BASE可覆盖接口地址（如指向本地桩服务），
+    TELEGRAM_ROUTE / FEISHU_ROUTE指定连接池路由（direct / http_proxy / socks5_proxy）
+    """
+    env = os.environ if env is None else env
+    channels: List[NotificationChannel] = []
+    if env.get("TELEGRAM_BOT_TOKEN") and env.get("TELEGRAM_CHAT_ID"):
+        kwargs = {"route": env.get("TELEGRAM_ROUTE", ROUTE_DIRECT)}
+        if env.get("TELEGRAM_API_BASE"):
+            kwargs["base_url"] = env["TELEGRAM_API_BASE"]
+        channels.append(TelegramChannel(env["TELEGRAM_BOT_TOKEN"], env["TELEGRAM_CHAT_ID"], **kwargs))
+    if env.get("FEISHU_BOT_TOKEN"):
+        kwargs = {"route": env.get("FEISHU_ROUTE", ROUTE_DIRECT)}
+        if env.get("FEISHU_API_BASE"):
+            kwargs["base_url"] = env["FEISHU_API_BASE"]
+        channels.append(FeishuChannel(env["FEISHU_BOT_TOKEN"], **kwargs))
+    return channels
+
+
+class NotificationDispatcher:
+    """异步、合并、限速的通知分发器
+
+    - notify()线程安全、不阻塞：事件进入最多max_queue条的队列，满时丢弃最旧的事件
+    - 收到第一条事件后等待coalesce_window秒，期间的所有事件合并为一条摘要；
+      相同(来源, 事件, 内容)只显示一次并计数，网关反复抖动时只发一条消息
+    - 每个渠道一个发送协程与一个小队列，某个渠道限速或重试不影响其他渠道
+    """
+
+    def __init__(
+        self,
+        channels: List[NotificationChannel],
+        http_pool,
+        title: str = "Founder监控",
+        max_queue: int = 1000,
+        coalesce_window: float = 10.0,
+        max_digest_lines: int = 20,
+        max_channel_backlog: int = 20,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.channels = channels
+        self.http_pool = http_pool
+        self.title = title
+        self.coalesce_window = coalesce_window
+        self.max_digest_lines = max_digest_lines
+        self.max_channel_backlog = max_channel_backlog
+        self.logger = logger or logging.getLogger("FounderMonitor")
+        self._events: deque = deque(maxlen=max_queue)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._wakeup_pending = False
+        self._stopping = False
+        self._task = None
+        self._channel_queues: List[asyncio.Queue] = []
+        self.received = 0
+        self.dropped = 0
+        self.digests = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.channels)
+
+    def notify(self, event: str, message: str, level: str = "warning", source: Optional[str] = None) -> bool:
+        """提交一条事件（线程安全，立即返回）；没有配置渠道时返回False"""
+        if not self.channels:
+            return False
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append((time.time(), level, source, event, message))
+            self.received += 1
+            if self._task is None:
+                self._loop = self.http_pool.loop
+                self._task = asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+                return True
+            if self._wakeup_pending:
+                return True
+            self._wakeup_pending = True
+        self._loop.call_soon_threadsafe(self._wake)
+        return True
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _drain(self) -> List[Tuple]:
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self._wakeup_pending = False
+        return events
+
+    def format_digest(self, events: List[Tuple]) -> str:
+        """把一批事件合并为一条文本"""
+        groups: "OrderedDict[Tuple, List]" = OrderedDict()
+        for timestamp, level, source, event, message in events:
+            key = (source, event, message)
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [level, 1, timestamp, timestamp]
+            else:
+                group[1] += 1
+                group[3] = timestamp
+
+        if len(events) == 1:
+            header = self.title
+        else:
+            start = time.strftime("%H:%M:%S", time.localtime(events[0][0]))
+            end = time.strftime("%H:%M:%S", time.localtime(events[-1][0]))
+            header = f"{self.title}: {len(events)}条事件 ({start}-{end})"
+
+        lines = [header]
+        for (source, event, message), (level, count, first, last) in list(groups.items())[:self.max_digest_lines]:
+            prefix = f"[{source}] " if source else ""
+            suffix = f" ×{count}" if count > 1 else ""
+            lines.append(f"{LEVEL_ICONS.get(level, '•')} {prefix}{message}{suffix}")
+        if len(groups) > self.max_digest_lines:
+            lines.append(f"…另有{len(groups) - self.max_digest_lines}类事件")
+        return "\n".join(lines)
+
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        self._channel_queues = [asyncio.Queue() for _ in self.channels]
+        senders = [
+            asyncio.ensure_future(self._run_channel(channel, queue))
+            for channel, queue in zip(self.channels, self._channel_queues)
+        ]
+        try:
+            while True:
+                if not self._events:
+                    if self._stopping:
+                        break
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                    continue
+                # 收集窗口内的后续事件
+                if not self._stopping:
+                    try:
+                        await asyncio.wait_for(self._stop_requested(), self.coalesce_window)
+                    except asyncio.TimeoutError:
+                        pass
+                events = self._drain()
+                if not events:
+                    continue
+                text = self.format_digest(events)
+                self.digests += 1
+                for queue in self._channel_queues:
+                    if queue.qsize() >= self.max_channel_backlog:
+                        queue.get_nowait()
+                        self.dropped += 1
+                    queue.put_nowait(text)
+        finally:
+            for queue in self._channel_queues:
+                queue.put_nowait(None)
+            await asyncio.gather(*senders, return_exceptions=True)
+
+    async def _stop_requested(self):
+        while not self._stopping:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+    async def _run_channel(self, channel: NotificationChannel, queue: asyncio.Queue):
+        while True:
+            text = await queue.get()
+            if text is None:
+                return
+            await channel.deliver(self.http_pool, text, self.logger)
+
+    def stop(self, timeout: float = 30.0):
+        """立即发送已收集的事件并等待发送完成（最多timeout秒）"""
+        with self._lock:
+            task = self._task
+            self._stopping = True
+        if task is None:
+            return
+        self._loop.call_soon_threadsafe(self._wake)
+        try:
+            task.result(timeout)
+        except Exception as e:
+            self.logger.error(f"通知发送未完成: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "channels": {channel.name: channel.stats() for channel in self.channels},
+            "received": self.received,
+            "dropped": self.dropped,
+            "digests": self.digests,
+            "queued": len(self._events),
+        }
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Founder进程跟踪
+进程内扫描进程表（psutil读取/proc，不fork），按启动时间跟踪Gateway进程以识别PID复用，
+仅在跟踪的进程消失时重新扫描
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, List
+
+import psutil
+
+# openclaw可执行文件（或openclaw.js）的gateway子命令；不会匹配路径中含openclaw的其他进程
+GATEWAY_PROCESS_PATTERN = r"(^|[\s/])openclaw(\.m?js)?\s+gateway\b"
+
+
+def _own_lineage() -> set:
+    """当前进程及其所有祖先进程的PID"""
+    pids = {os.getpid()}
+    try:
+        pids.update(parent.pid for parent in psutil.Process().parents())
+    except psutil.Error:
+        pids.add(os.getppid())
+    return pids
+
+
+def find_processes(pattern: str) -> List[psutil.Process]:
+    """按命令行正则查找进程（排除当前进程及其祖先）"""
+    regex = re.compile(pattern)
+    own_pids = _own_lineage()
+    matches = []
+    for process in psutil.process_iter(["pid", "cmdline"]):
+        if process.info["pid"] in own_pids:
+            continue
+        cmdline = " ".join(process.info["cmdline"] or [])
+        if cmdline and regex.search(cmdline):
+            matches.append(process)
+    return matches
+
+
+def find_processes_by_patterns(patterns: Dict[str, str]) -> Dict[str, List[int]]:
+    """一次扫描进程表，按名称返回每个命令行正则匹配到的PID（排除当前进程及其祖先）"""
+    regexes = {name: re.compile(pattern) for name, pattern in patterns.items()}
+    own_pids = _own_lineage()
+    matches: Dict[str, List[int]] = {name: [] for name in patterns}
+    for process in psutil.process_iter(["pid", "cmdline"]):
+        if process.info["pid"] in own_pids:
+            continue
+        cmdline = " ".join(process.info["cmdline"] or [])
+        if not cmdline:
+            continue
+        for name, regex in regexes.items():
+            if regex.search(cmdline):
+                matches[name].append(process.info["pid"])
+    return matches
+
+
+class ProcessTracker:
+    """缓存式进程跟踪器
+
+    跟踪集合中的每个进程都保存了psutil.Process对象，is_running()会比较启动时间，
+    因此PID被复用时能识别出来。检查时只验证已跟踪的进程，仅在以下情况全量扫描：
+      - 有跟踪的进程退出或PID被复用
+      - 跟踪集合为空（最多每min_scan_interval秒一次）
+      - 距上次全量扫描超过rescan_interval秒（发现新增的工作进程）
+    """
+
+    def __init__(self, pattern: str = GATEWAY_PROCESS_PATTERN, rescan_interval: float = 30.0, min_scan_interval: float = 0.5):
+        self.pattern = pattern
+        self.rescan_interval = rescan_interval
+        self.min_scan_interval = min_scan_interval
+        self._tracked: Dict[int, psutil.Process] = {}
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+        self.scan_count = 0
+
+    def scan(self) -> List[int]:
+        """全量扫描进程表"""
+        with self._lock:
+            return self._scan()
+
+    def _scan(self) -> List[int]:
+        self._tracked = {process.pid: process for process in find_processes(self.pattern)}
+        self._last_scan = time.monotonic()
+        self.scan_count += 1
+        return sorted(self._tracked)
+
+    def pids(self) -> List[int]:
+        """当前存活的Gateway进程PID"""
+        with self._lock:
+            now = time.monotonic()
+            if not self._tracked:
+                if now - self._last_scan >= self.min_scan_interval:
+                    return self._scan()
+                return []
+
+            if now - self._last_scan >= self.rescan_interval:
+                return self._scan()
+
+            for process in self._tracked.values():
+                try:
+                    alive = process.is_running() and process.status() != psutil.STATUS_ZOMBIE
+                except psutil.Error:
+                    alive = False
+                if not alive:
+                    return self._scan()
+            return sorted(self._tracked)
+
+    def processes(self) -> List[psutil.Process]:
+        """当前存活的Gateway进程对象"""
+        pids = self.pids()
+        with self._lock:
+            return [self._tracked[pid] for pid in pids if pid in self._tracked]
+
+    def invalidate(self):
+        """丢弃缓存，下次检查时全量扫描（例如重启Gateway之后）"""
+        with self._lock:
+            self._tracked = {}
+            self._last_scan = 0.0
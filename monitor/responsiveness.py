@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Founder Gateway响应性检测
+HDR风格的对数-线性延迟直方图（O(1)记录、内存固定），按滑动窗口统计/status的p99与超时率，
+据此判断Gateway是正常、降级还是无响应
+"""
+
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+STATE_UNKNOWN = "unknown"
+STATE_HEALTHY = "healthy"
+STATE_DEGRADED = "degraded"
+STATE_HUNG = "hung"
+
+
+class LatencyHistogram:
+    """HDR风格延迟直方图
+
+    以微秒为单位：小于2^sub_bucket_bits的值精确记录，更大的值按2的幂分组，
+    每组2^(sub_bucket_bits-1)个线性子桶，相对误差约为1/2^(sub_bucket_bits-1)。
+    默认5位，60秒上限时共约370个桶。
+    """
+
+    def __init__(self, highest_ms: float = 60000.0, sub_bucket_bits: int = 5):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+        self.highest_us = int(highest_ms * 1000)
+        max_shift = max(self.highest_us.bit_length() - sub_bucket_bits, 0)
+        self.counts = array("I", [0] * (max_shift * self.sub_bucket_half + self.sub_bucket_count))
+        self.total = 0
+
+    def _index(self, value_us: int) -> int:
+        if value_us < self.sub_bucket_count:
+            return value_us
+        shift = value_us.bit_length() - self.sub_bucket_bits
+        return shift * self.sub_bucket_half + (value_us >> shift)
+
+    def _upper_bound_us(self, index: int) -> int:
+        if index < self.sub_bucket_count:
+            return index
+        shift = index // self.sub_bucket_half - 1
+        sub_bucket = index - shift * self.sub_bucket_half
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, latency_ms: float):
+        value_us = min(max(int(latency_ms * 1000), 0), self.highest_us)
+        self.counts[self._index(value_us)] += 1
+        self.total += 1
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+
+    def reset(self):
+        self.counts = array("I", bytes(len(self.counts) * self.counts.itemsize))
+        self.total = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """分位数（毫秒，取桶上界，偏保守）"""
+        if not self.total:
+            return None
+        target = max(int(self.total * q + 0.5), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self._upper_bound_us(index) / 1000
+        return self.highest_us / 1000
+
+    def memory_bytes(self) -> int:
+        return len(self.counts) * self.counts.itemsize
+
+
+class WindowedHistogram:
+    """滑动窗口直方图：窗口切成slices段，每段一个直方图，过期段被清空复用"""
+
+    def __init__(self, window: float = 300.0, slices: int = 30, **histogram_kwargs):
+        self.window = window
+        self.slice_seconds = window / slices
+        self.histogram_kwargs = histogram_kwargs
+        self.histograms: List[LatencyHistogram] = [LatencyHistogram(**histogram_kwargs) for _ in range(slices)]
+        self.failures = array("I", [0] * slices)
+        self.slice_ids = array("q", [-1] * slices)
+
+    def _slot(self, now: float) -> int:
+        slice_id = int(now // self.slice_seconds)
+        slot = slice_id % len(self.histograms)
+        if self.slice_ids[slot] != slice_id:
+            self.histograms[slot].reset()
+            self.failures[slot] = 0
+            self.slice_ids[slot] = slice_id
+        return slot
+
+    def record(self, latency_ms: float, now: float):
+        self.histograms[self._slot(now)].record(latency_ms)
+
+    def record_failure(self, now: float):
+        self.failures[self._slot(now)] += 1
+
+    def snapshot(self, now: float, window: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """合并最近window秒（默认整个窗口）的数据"""
+        current = int(now // self.slice_seconds)
+        count = len(self.histograms) if window is None else max(int(window / self.slice_seconds), 1)
+        merged = LatencyHistogram(**self.histogram_kwargs)
+        failures = 0
+        for slot, slice_id in enumerate(self.slice_ids):
+            if current - count < slice_id <= current:
+                merged.merge(self.histograms[slot])
+                failures += self.failures[slot]
+        attempts = merged.total + failures
+        return {
+            "samples": attempts,
+            "failure_rate": failures / attempts if attempts else None,
+            "p50_ms": merged.percentile(0.5),
+            "p99_ms": merged.percentile(0.99),
+            "max_ms": merged.percentile(1.0),
+        }
+
+    def memory_bytes(self) -> int:
+        return sum(h.memory_bytes() for h in self.histograms) + self.failures.itemsize * len(self.failures) * 2
+
+
+class ResponsivenessDetector:
+    """根据/status响应延迟判断Gateway状态
+
+    - hung：连续hung_consecutive次超时/失败，或短窗口内失败率不低于hung_failure_rate
+    - degraded：长窗口p99超过degraded_p99_ms，或失败率不低于degraded_failure_rate
+    - 其余为healthy；样本不足min_samples时为unknown
+    """
+
+    def __init__(
+        self,
+        short_window: float = 60.0,
+        long_window: float = 300.0,
+        min_samples: int = 5,
+        degraded_p99_ms: float = 2000.0,
+        degraded_failure_rate: float = 0.1,
+        hung_failure_rate: float = 0.5,
+        hung_consecutive: int = 3,
+    ):
+        self.short_window = short_window
+        self.min_samples = min_samples
+        self.degraded_p99_ms = degraded_p99_ms
+        self.degraded_failure_rate = degraded_failure_rate
+        self.hung_failure_rate = hung_failure_rate
+        self.hung_consecutive = hung_consecutive
+        self.window = WindowedHistogram(window=long_window, slices=30)
+        self.consecutive_failures = 0
+        self.state = STATE_UNKNOWN
+        self.state_since = time.time()
+        self.reason = ""
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: Optional[float], now: Optional[float] = None):
+        """记录一次探测，latency_ms为None表示超时或失败"""
+        now = now or time.time()
+        with self._lock:
+            if latency_ms is None:
+                self.window.record_failure(now)
+                self.consecutive_failures += 1
+            else:
+                self.window.record(latency_ms, now)
+                self.consecutive_failures = 0
+
+    def reset(self):
+        """清空统计（例如重启Gateway之后）"""
+        with self._lock:
+            self.window = WindowedHistogram(window=self.window.window, slices=len(self.window.histograms))
+            self.consecutive_failures = 0
+            self._set_state(STATE_UNKNOWN, "", time.time())
+
+    def _set_state(self, state: str, reason: str, now: float):
+        if state != self.state:
+            self.state = state
+            self.state_since = now
+        self.reason = reason
+
+    def evaluate(self, now: Optional[float] = None) -> Dict[str, object]:
+        """重新计算状态"""
+        now = now or time.time()
+        with self._lock:
+            short = self.window.snapshot(now, self.short_window)
+            long = self.window.snapshot(now)
+
+            if self.consecutive_failures >= self.hung_consecutive:
+                self._set_state(STATE_HUNG, f"连续{self.consecutive_failures}次无响应", now)
+            elif short["samples"] >= self.min_samples and short["failure_rate"] >= self.hung_failure_rate:
+                self._set_state(STATE_HUNG, f"{self.short_window:.0f}秒内失败率 {short['failure_rate']:.0%}", now)
+            elif long["samples"] < self.min_samples:
+                self._set_state(STATE_UNKNOWN, "样本不足", now)
+            elif long["failure_rate"] >= self.degraded_failure_rate:
+                self._set_state(STATE_DEGRADED, f"失败率 {long['failure_rate']:.0%}", now)
+            elif long["p99_ms"] is not None and long["p99_ms"] > self.degraded_p99_ms:
+                self._set_state(STATE_DEGRADED, f"p99 {long['p99_ms']:.0f}ms", now)
+            else:
+                self._set_state(STATE_HEALTHY, "", now)
+
+            return {
+                "state": self.state,
+                "reason": self.reason,
+                "state_since": self.state_since,
+                "consecutive_failures": self.consecutive_failures,
+                "short_window": short,
+                "long_window": long,
+            }
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Founder重启策略
+防止重启风暴：令牌桶限制重启预算，连续失败按指数退避（带抖动），
+连续失败过多时熔断（open）并升级处理（回滚配置、通知），状态持久化，监控重启后继续生效
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from monitor.status_publisher import atomic_write_json
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+STATE_VERSION = 1
+
+
+class RestartPolicy:
+    """重启策略引擎
+
+    - 令牌桶：最多capacity个令牌，每小时补充refill_per_hour个，每次重启消耗一个
+    - 退避：连续失败n次后，下次重启至少等待 min(base_backoff * 2^(n-1), max_backoff)，
+      再乘以[1 - jitter, 1]之间的随机系数
+    - 重启成功后stable_after秒内又需要重启，视为上一次重启失败（启动后很快崩溃）
+    - 连续失败达到trip_after次时熔断：open_duration秒内拒绝重启并调用on_open升级处理；
+      到期后进入half_open，允许试探一次，成功则恢复closed，失败则重新熔断且时长加倍（最长max_open_duration）
+    - 试探重启报告成功只是暂定的：Gateway稳定运行（record_healthy）之前又申请重启，视为试探失败；
+      试探超过trial_timeout秒仍没有结果同样视为失败，不会一直停在half_open
+    - 时间使用墙上时钟，状态在每次变化后原子写入state_path
+    """
+
+    def __init__(
+        self,
+        state_path=None,
+        capacity: float = 3.0,
+        refill_per_hour: float = 3.0,
+        base_backoff: float = 10.0,
+        max_backoff: float = 600.0,
+        jitter: float = 0.2,
+        stable_after: float = 120.0,
+        trip_after: int = 5,
+        open_duration: float = 1800.0,
+        max_open_duration: float = 6 * 3600.0,
+        trial_timeout: float = 600.0,
+        on_open: Optional[Callable[[Dict], None]] = None,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.state_path = Path(state_path) if state_path else None
+        self.capacity = capacity
+        self.refill_per_hour = refill_per_hour
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.stable_after = stable_after
+        self.trip_after = trip_after
+        self.open_duration = open_duration
+        self.max_open_duration = max_open_duration
+        self.trial_timeout = trial_timeout
+        self.on_open = on_open
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.logger = logger or logging.getLogger("FounderMonitor")
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _initial_state(self) -> Dict:
+        return {
+            "version": STATE_VERSION,
+            "tokens": self.capacity,
+            "refilled_at": self.clock(),
+            "breaker": BREAKER_CLOSED,
+            "consecutive_failures": 0,
+            "next_allowed_at": 0.0,
+            "opened_at": None,
+            "open_until": None,
+            "open_count": 0,
+            "last_attempt_at": None,
+            "last_success_at": None,
+            "attempts_total": 0,
+            "denied_total": 0,
+        }
+
+    def _load(self) -> Dict:
+        state = self._initial_state()
+        if self.state_path is None:
+            return state
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == STATE_VERSION:
+                state.update(saved)
+        except (OSError, ValueError):
+            pass
+        return state
+
+    def _save(self):
+        if self.state_path is None:
+            return
+        try:
+            atomic_write_json(self.state_path, self._state)
+        except OSError as e:
+            self.logger.error(f"保存重启策略状态失败: {e}")
+
+    def _refill(self, now: float):
+        state = self._state
+        elapsed = max(now - state["refilled_at"], 0.0)
+        state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.refill_per_hour / 3600.0)
+        state["refilled_at"] = now
+
+    def _backoff(self, failures: int) -> float:
+        delay = min(self.base_backoff * (2 ** max(failures - 1, 0)), self.max_backoff)
+        return delay * (1 - self.jitter * self.rng.random())
+
+    def _trip(self, now: float) -> Dict:
+        state = self._state
+        duration = min(self.open_duration * (2 ** state["open_count"]), self.max_open_duration)
+        state["breaker"] = BREAKER_OPEN
+        state["opened_at"] = now
+        state["open_until"] = now + duration
+        state["open_count"] += 1
+        self.logger.error(
+            f"重启熔断: 连续失败 {state['consecutive_failures']} 次，{duration:.0f}秒内不再自动重启"
+        )
+        return dict(state)
+
+    def _record_failure_locked(self, now: float) -> Optional[Dict]:
+        """记一次失败，触发熔断时返回状态快照"""
+        state = self._state
+        state["consecutive_failures"] += 1
+        state["next_allowed_at"] = now + self._backoff(state["consecutive_failures"])
+        if state["breaker"] == BREAKER_HALF_OPEN or state["consecutive_failures"] >= self.trip_after:
+            return self._trip(now)
+        return None
+
+    def acquire(self) -> Tuple[bool, str]:
+        """申请一次重启，返回(是否允许, 原因)；允许时已消耗令牌"""
+        tripped = None
+        with self._lock:
+            now = self.clock()
+            state = self._state
+            self._refill(now)
+
+            # 上一次"成功"的重启没能稳定运行
+            if state["last_success_at"] is not None and now - state["last_success_at"] < self.stable_after:
+                state["last_success_at"] = None
+                tripped = self._record_failure_locked(now)
+
+            if state["breaker"] == BREAKER_OPEN:
+                if now < state["open_until"]:
+                    allowed, reason = False, f"熔断中，{state['open_until'] - now:.0f}秒后试探"
+                else:
+                    state["breaker"] = BREAKER_HALF_OPEN
+                    self.logger.warning("重启熔断到期，试探一次重启")
+                    allowed, reason = True, "half_open"
+            elif state["breaker"] == BREAKER_HALF_OPEN:
+                trial_expired = now - (state["last_attempt_at"] or 0.0) >= self.trial_timeout
+                if state["last_success_at"] is not None or trial_expired:
+                    # 试探重启后Gateway没有稳定下来（或试探一直没有结果）：按失败处理，重新熔断
+                    state["last_success_at"] = None
+                    tripped = self._record_failure_locked(now)
+                    allowed, reason = False, f"试探失败，{state['open_until'] - now:.0f}秒后再次试探"
+                else:
+                    allowed, reason = False, "正在试探"
+            elif now < state["next_allowed_at"]:
+                allowed, reason = False, f"退避中，{state['next_allowed_at'] - now:.0f}秒后重试"
+            elif state["tokens"] < 1:
+                wait = (1 - state["tokens"]) * 3600.0 / self.refill_per_hour if self.refill_per_hour else float("inf")
+                allowed, reason = False, f"重启预算已用完，{wait:.0f}秒后补充"
+            else:
+                allowed, reason = True, "ok"
+
+            if allowed:
+                state["tokens"] = max(state["tokens"] - 1, 0.0)
+                state["last_attempt_at"] = now
+                state["attempts_total"] += 1
+            else:
+                state["denied_total"] += 1
+            # 被拒绝的申请很频繁，只在状态真正变化时落盘
+            if allowed or tripped is not None:
+                self._save()
+
+        if tripped is not None:
+            self._escalate(tripped)
+        return allowed, reason
+
+    def record_result(self, success: bool):
+        """记录重启结果"""
+        tripped = None
+        with self._lock:
+            now = self.clock()
+            state = self._state
+            if success:
+                # 是否真的稳定由之后的acquire/record_healthy判断（半开状态保持到稳定为止）
+                state["last_success_at"] = now
+            else:
+                state["last_success_at"] = None
+                tripped = self._record_failure_locked(now)
+            self._save()
+
+        if tripped is not None:
+            self._escalate(tripped)
+
+    def record_healthy(self):
+        """Gateway持续正常：超过stable_after后清零连续失败并关闭熔断器"""
+        with self._lock:
+            now = self.clock()
+            state = self._state
+            last_success = state["last_success_at"]
+            if last_success is not None and now - last_success < self.stable_after:
+                return
+            # 熔断期间有人手动修复：同样要先稳定运行一段时间
+            if state["breaker"] == BREAKER_OPEN and now - state["opened_at"] < self.stable_after:
+                return
+            if state["consecutive_failures"] or state["breaker"] != BREAKER_CLOSED or last_success is not None:
+                if state["breaker"] != BREAKER_CLOSED:
+                    self.logger.info("Gateway已稳定运行，重启熔断恢复")
+                state["consecutive_failures"] = 0
+                state["next_allowed_at"] = 0.0
+                state["breaker"] = BREAKER_CLOSED
+                state["open_count"] = 0
+                state["last_success_at"] = None
+                self._save()
+
+    def reset(self):
+        """手动复位（清零失败计数、关闭熔断器、补满令牌）"""
+        with self._lock:
+            self._state = self._initial_state()
+            self._save()
+
+    def _escalate(self, snapshot: Dict):
+        if self.on_open is None:
+            return
+        try:
+            self.on_open(snapshot)
+        except Exception as e:
+            self.logger.error(f"重启熔断升级处理失败: {e}")
+
+    @property
+    def breaker(self) -> str:
+        return self._state["breaker"]
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            self._refill(self.clock())
+            state = dict(self._state)
+        state["tokens"] = round(state["tokens"], 3)
+        return state
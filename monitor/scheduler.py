@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Founder监控调度器
+基于asyncio的事件驱动调度：每项检查独立的间隔、抖动和截止时间，
+检查在有界线程池中并发执行；被监视进程退出时立即触发相关检查
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+from monitor.metrics import MetricsRegistry
+
+
+class ScheduledCheck:
+    """一项周期性检查"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], object],
+        interval: float,
+        jitter: float = 0.0,
+        deadline: Optional[float] = None,
+        retry_interval: Optional[float] = None,
+        run_on_start: bool = True,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_interval = retry_interval
+        self.run_on_start = run_on_start
+
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Optional[asyncio.Future] = None
+        self._metrics: Optional[Dict[str, object]] = None  # 调度器预分配的指标槽位
+
+    def next_delay(self, failed: bool, rng: random.Random) -> float:
+        """下一次执行前的等待时间（失败时使用retry_interval）"""
+        base = self.retry_interval if failed and self.retry_interval is not None else self.interval
+        if self.jitter:
+            base += rng.uniform(-self.jitter, self.jitter)
+        return max(base, 0.0)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_run": self.last_run,
+            "last_duration_ms": round(self.last_duration * 1000, 2) if self.last_duration is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class MonitorScheduler:
+    """事件驱动的监控调度器
+
+    - 每项检查在自己的协程中按间隔（加随机抖动）休眠，空闲时不占用CPU
+    - 检查函数在最多max_workers个线程中执行，超过deadline记为失败；
+      上一次尚未结束时跳过本次，避免同一检查堆积
+    - trigger()可以从任意线程立即唤醒某项检查
+    - watch_pid()通过pidfd在进程退出时立即回调（不支持pidfd时按poll_interval轮询）
+    - 传入metrics（MetricsRegistry）时记录每项检查的耗时直方图与按结果分类的执行次数
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        poll_interval: float = 1.0,
+        logger: Optional[logging.Logger] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.logger = logger or logging.getLogger("FounderMonitor")
+        self.checks: Dict[str, ScheduledCheck] = {}
+        self.rng = random.Random()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._watched: Dict[int, Callable[[int], None]] = {}
+        self._pidfds: Dict[int, int] = {}
+        self.metrics = metrics
+        if metrics is not None:
+            self._check_duration = metrics.histogram("founder_check_duration_seconds", "检查耗时", ("check",))
+            self._check_runs = metrics.counter("founder_check_runs", "检查执行次数", ("check", "result"))
+
+    def add_check(self, name: str, func: Callable[[], object], interval: float, **kwargs) -> ScheduledCheck:
+        """注册检查，需在run()之前调用"""
+        check = ScheduledCheck(name, func, interval, **kwargs)
+        if self.metrics is not None:
+            check._metrics = {
+                "duration": self._check_duration.labels(name),
+                **{result: self._check_runs.labels(name, result) for result in ("ok", "error", "timeout", "skipped")},
+            }
+        self.checks[name] = check
+        return check
+
+    def trigger(self, name: str):
+        """立即执行指定检查（线程安全）"""
+        check = self.checks.get(name)
+        if check is None or self._loop is None or check._wakeup is None:
+            return
+        self._loop.call_soon_threadsafe(check._wakeup.set)
+
+    def watch_pid(self, pid: int, on_exit: Callable[[int], None]) -> bool:
+        """监视进程退出，退出时在事件循环中调用on_exit(pid)（线程安全）
+
+        返回False表示进程已不存在。
+        """
+        if not psutil.pid_exists(pid):
+            return False
+        if self._loop is None:
+            self._watched[pid] = on_exit
+            return True
+        self._loop.call_soon_threadsafe(self._watch_pid, pid, on_exit)
+        return True
+
+    @property
+    def watched_pids(self) -> List[int]:
+        return list(self._watched)
+
+    def _watch_pid(self, pid: int, on_exit: Callable[[int], None]):
+        if pid in self._watched and pid in self._pidfds:
+            self._watched[pid] = on_exit
+            return
+        self._watched[pid] = on_exit
+        try:
+            pidfd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            self._pid_exited(pid)
+            return
+        except (AttributeError, OSError):
+            # 不支持pidfd时由_poll_watched轮询
+            return
+        self._pidfds[pid] = pidfd
+        self._loop.add_reader(pidfd, self._pid_exited, pid)
+
+    def _pid_exited(self, pid: int):
+        pidfd = self._pidfds.pop(pid, None)
+        if pidfd is not None:
+            self._loop.remove_reader(pidfd)
+            os.close(pidfd)
+        on_exit = self._watched.pop(pid, None)
+        if on_exit is not None:
+            try:
+                on_exit(pid)
+            except Exception as e:
+                self.logger.error(f"进程退出回调异常: {e}")
+
+    async def _poll_watched(self):
+        while not self._stop_event.is_set():
+            for pid in [pid for pid in self._watched if pid not in self._pidfds]:
+                if not psutil.pid_exists(pid):
+                    self._pid_exited(pid)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, check: ScheduledCheck) -> bool:
+        """执行一次检查，返回是否成功"""
+        if check._running is not None and not check._running.done():
+            check.skipped += 1
+            if check._metrics is not None:
+                check._metrics["skipped"].inc()
+            self.logger.warning(f"检查 {check.name} 上一次尚未完成，跳过")
+            return False
+
+        start = time.monotonic()
+        result = "error"
+        check._running = self._loop.run_in_executor(self._executor, check.func)
+        try:
+            await asyncio.wait_for(asyncio.shield(check._running), check.deadline)
+            check.last_error = None
+            result = "ok"
+            return True
+        except asyncio.TimeoutError:
+            check.last_error = f"超过截止时间 {check.deadline}秒"
+            result = "timeout"
+        except Exception as e:
+            check.last_error = str(e)
+        finally:
+            check.runs += 1
+            check.last_run = time.time()
+            check.last_duration = time.monotonic() - start
+            if check._metrics is not None:
+                check._metrics["duration"].observe(check.last_duration)
+                check._metrics[result].inc()
+
+        check.failures += 1
+        self.logger.error(f"检查 {check.name} 失败: {check.last_error}")
+        return False
+
+    async def _run_check(self, check: ScheduledCheck):
+        check._wakeup = asyncio.Event()
+        delay = 0.0 if check.run_on_start else check.next_delay(False, self.rng)
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(check._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            if self._stop_event.is_set():
+                break
+            check._wakeup.clear()
+            succeeded = await self._execute(check)
+            delay = check.next_delay(not succeeded, self.rng)
+
+    async def run_async(self):
+        """运行调度器直到stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="FounderCheck")
+
+        pending = dict(self._watched)
+        self._watched.clear()
+        for pid, on_exit in pending.items():
+            self._watch_pid(pid, on_exit)
+
+        tasks = [asyncio.ensure_future(self._run_check(check)) for check in self.checks.values()]
+        tasks.append(asyncio.ensure_future(self._poll_watched()))
+        try:
+            await self._stop_event.wait()
+        finally:
+            for check in self.checks.values():
+                if check._wakeup is not None:
+                    check._wakeup.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for pid in list(self._pidfds):
+                pidfd = self._pidfds.pop(pid)
+                self._loop.remove_reader(pidfd)
+                os.close(pidfd)
+            self._executor.shutdown(wait=False)
+            self._loop = None
+
+    def run(self):
+        """在当前线程运行调度器（阻塞）"""
+        asyncio.run(self.run_async())
+
+    def stop(self):
+        """停止调度器（线程安全）"""
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        return {name: check.stats() for name, check in self.checks.items()}
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Founder状态发布
+原子写入（临时文件 + fsync + rename），读取方永远不会看到写了一半的文件；
+同一时刻完成的多项检查合并为一次写入
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+
+
+def atomic_write_bytes(path, data: bytes, fsync: bool = True):
+    """原子替换文件内容"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_write_json(path, data, fsync: bool = True):
+    """原子写入JSON（紧凑格式）"""
+    atomic_write_bytes(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), fsync)
+
+
+class StatusPublisher:
+    """批量、原子的状态文件发布器
+
+    publish()只记录每个文件的最新内容，后台线程等待batch_delay秒收集同一轮的其他更新后统一写入。
+    fsync策略：always每次落盘，interval最多每fsync_interval秒落盘一次，never交给操作系统。
+    """
+
+    def __init__(self, fsync_policy: str = FSYNC_INTERVAL, fsync_interval: float = 30.0, batch_delay: float = 0.05):
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.batch_delay = batch_delay
+        self._pending: Dict[Path, object] = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._last_fsync = 0.0
+        self._writer: Optional[threading.Thread] = None
+        self.writes = 0
+        self.batches = 0
+        self.last_error: Optional[str] = None
+        atexit.register(self.flush)
+
+    def publish(self, path, data):
+        """提交文件的新内容（异步写入）"""
+        with self._condition:
+            self._pending[Path(path)] = data
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="FounderStatusWriter", daemon=True)
+                self._writer.start()
+            self._condition.notify()
+
+    def _should_fsync(self) -> bool:
+        if self.fsync_policy == FSYNC_ALWAYS:
+            return True
+        if self.fsync_policy == FSYNC_INTERVAL and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            return True
+        return False
+
+    def flush(self):
+        """立即写入所有待发布的内容"""
+        with self._flush_lock:
+            with self._condition:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+
+            fsync = self._should_fsync()
+            for path, data in pending.items():
+                try:
+                    atomic_write_json(path, data, fsync=fsync)
+                    self.writes += 1
+                except (OSError, TypeError, ValueError) as e:
+                    self.last_error = f"{path}: {e}"
+            if fsync:
+                self._last_fsync = time.monotonic()
+            self.batches += 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            time.sleep(self.batch_delay)
+            self.flush()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Founder资源遥测
+按固定频率采样Gateway进程树的CPU、内存、文件描述符、线程数与I/O，
+保存在定长数组环形缓冲区中（内存占用恒定），计算滚动分位数与趋势，提前发现泄漏
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import psutil
+
+METRICS = ("cpu_percent", "rss_mb", "num_fds", "num_threads", "read_bytes_per_s", "write_bytes_per_s")
+
+
+class RingBuffer:
+    """array支撑的定长环形缓冲区"""
+
+    def __init__(self, capacity: int, typecode: str = "d"):
+        self.capacity = capacity
+        self._data = array(typecode, [0] * capacity)
+        self._start = 0
+        self._size = 0
+
+    def append(self, value: float):
+        index = (self._start + self._size) % self.capacity
+        self._data[index] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def values(self) -> List[float]:
+        """按时间顺序返回缓冲区内容"""
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._data[self._start:end].tolist()
+        return self._data[self._start:].tolist() + self._data[:end - self.capacity].tolist()
+
+    def last(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return self._data[(self._start + self._size - 1) % self.capacity]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def memory_bytes(self) -> int:
+        return self._data.buffer_info()[1] * self._data.itemsize
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """线性插值分位数（输入需已排序）"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def linear_trend(xs: Sequence[float], ys: Sequence[float]) -> Tuple[float, float]:
+    """最小二乘斜率与相关系数r"""
+    n = len(xs)
+    if n < 2:
+        return 0.0, 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    if sxx == 0:
+        return 0.0, 0.0
+    slope = sxy / sxx
+    r = sxy / math.sqrt(sxx * syy) if syy else 0.0
+    return slope, r
+
+
+class ResourceSampler:
+    """Gateway进程树资源采样器
+
+    每次sample()汇总跟踪到的Gateway进程及其所有子进程；每项指标一个环形缓冲区，
+    capacity个样本（默认5秒一次共1小时）。泄漏检测在最近leak_window秒内做线性回归，
+    斜率超过阈值且相关系数r不低于min_correlation（持续增长而非波动）时告警。
+    """
+
+    def __init__(
+        self,
+        tracker,
+        capacity: int = 720,
+        leak_window: float = 1800.0,
+        min_leak_samples: int = 30,
+        rss_leak_mb_per_hour: float = 100.0,
+        fd_leak_per_hour: float = 200.0,
+        thread_leak_per_hour: float = 50.0,
+        min_correlation: float = 0.9,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.tracker = tracker
+        self.capacity = capacity
+        self.leak_window = leak_window
+        self.min_leak_samples = min_leak_samples
+        self.leak_thresholds = {
+            "rss_mb": rss_leak_mb_per_hour,
+            "num_fds": fd_leak_per_hour,
+            "num_threads": thread_leak_per_hour,
+        }
+        self.min_correlation = min_correlation
+        self.logger = logger or logging.getLogger("FounderMonitor")
+
+        self.timestamps = RingBuffer(capacity)
+        self.series: Dict[str, RingBuffer] = {name: RingBuffer(capacity) for name in METRICS}
+        self._processes: Dict[int, psutil.Process] = {}
+        self._last_io: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self.active_warnings: Dict[str, str] = {}
+
+    def _process_tree(self) -> List[psutil.Process]:
+        tree: Dict[int, psutil.Process] = {}
+        for process in self.tracker.processes():
+            tree[process.pid] = process
+            try:
+                for child in process.children(recursive=True):
+                    tree.setdefault(child.pid, child)
+            except psutil.Error:
+                pass
+
+        # 复用Process对象，cpu_percent才能计算两次采样之间的占用
+        processes = []
+        for pid, process in tree.items():
+            cached = self._processes.get(pid)
+            if cached is not None and cached.is_running():
+                processes.append(cached)
+            else:
+                process.cpu_percent(None)
+                processes.append(process)
+        self._processes = {process.pid: process for process in processes}
+        return processes
+
+    def sample(self) -> Optional[Dict[str, float]]:
+        """采样一次，Gateway未运行时返回None"""
+        with self._lock:
+            processes = self._process_tree()
+            if not processes:
+                self._last_io = None
+                return None
+
+            now = time.time()
+            totals = dict.fromkeys(("cpu_percent", "rss_mb", "num_fds", "num_threads"), 0.0)
+            read_bytes = write_bytes = 0
+            for process in processes:
+                try:
+                    with process.oneshot():
+                        totals["cpu_percent"] += process.cpu_percent(None)
+                        totals["rss_mb"] += process.memory_info().rss / 1024 / 1024
+                        totals["num_fds"] += process.num_fds()
+                        totals["num_threads"] += process.num_threads()
+                        io = process.io_counters()
+                        read_bytes += io.read_bytes
+                        write_bytes += io.write_bytes
+                except (psutil.Error, AttributeError):
+                    continue
+
+            if self._last_io is not None and now > self._last_io[0]:
+                elapsed = now - self._last_io[0]
+                totals["read_bytes_per_s"] = max(read_bytes - self._last_io[1], 0) / elapsed
+                totals["write_bytes_per_s"] = max(write_bytes - self._last_io[2], 0) / elapsed
+            else:
+                totals["read_bytes_per_s"] = totals["write_bytes_per_s"] = 0.0
+            self._last_io = (now, read_bytes, write_bytes)
+
+            self.timestamps.append(now)
+            for name in METRICS:
+                self.series[name].append(totals[name])
+
+        self.check_leaks()
+        return totals
+
+    def _window(self, name: str, window: Optional[float]) -> Tuple[List[float], List[float]]:
+        xs = self.timestamps.values()
+        ys = self.series[name].values()
+        if window is not None and xs:
+            start = bisect.bisect_left(xs, xs[-1] - window)
+            xs, ys = xs[start:], ys[start:]
+        return xs, ys
+
+    def summary(self, window: Optional[float] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """各指标的最新值、p50/p95/p99、最大值与每小时趋势"""
+        with self._lock:
+            result = {}
+            for name in METRICS:
+                xs, ys = self._window(name, window)
+                ordered = sorted(ys)
+                slope, _ = linear_trend(xs, ys)
+                result[name] = {
+                    "last": ys[-1] if ys else None,
+                    "p50": percentile(ordered, 0.5),
+                    "p95": percentile(ordered, 0.95),
+                    "p99": percentile(ordered, 0.99),
+                    "max": ordered[-1] if ordered else None,
+                    "trend_per_hour": round(slope * 3600, 3),
+                }
+            result["samples"] = len(self.timestamps)
+            return result
+
+    def check_leaks(self) -> Dict[str, str]:
+        """检测持续增长的指标，返回当前告警（指标 -> 描述）"""
+        warnings = {}
+        with self._lock:
+            for name, threshold in self.leak_thresholds.items():
+                xs, ys = self._window(name, self.leak_window)
+                if len(xs) < self.min_leak_samples:
+                    continue
+                slope, r = linear_trend(xs, ys)
+                per_hour = slope * 3600
+                if per_hour > threshold and r >= self.min_correlation:
+                    warnings[name] = f"{name}持续增长 {per_hour:.1f}/小时 (r={r:.2f}, 当前 {ys[-1]:.1f})"
+
+        for name, message in warnings.items():
+            if name not in self.active_warnings:
+                self.logger.warning(f"疑似资源泄漏: {message}")
+        for name in self.active_warnings:
+            if name not in warnings:
+                self.logger.info(f"{name}增长趋势已解除")
+        self.active_warnings = warnings
+        return warnings
+
+    def memory_bytes(self) -> int:
+        return self.timestamps.memory_bytes() + sum(buffer.memory_bytes() for buffer in self.series.values())
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Founder时间序列存储
+只追加的定长二进制记录（时间戳 + 数值，各8字节），每个序列一个目录，按时间切分段文件，
+段文件名即段起始时间，范围查询先二分定位段再在段内二分定位记录，支持轮转与保留期清理。
+多个进程可以共用同一个存储目录：落盘与轮转在每个序列的文件锁（fcntl.flock）内进行，
+由后台线程完成，append()只写内存缓冲，可以在事件循环中调用
+"""
+
+import atexit
+import bisect
+import math
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # 非POSIX平台没有flock，只保证单进程内的一致性
+    fcntl = None
+
+RECORD = struct.Struct("<dd")
+SEGMENT_SUFFIX = ".seg"
+LOCK_NAME = ".lock"
+
+
+def series_dirname(series: str) -> str:
+    """序列名转为目录名（只保留字母、数字、点、横线和下划线）"""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", series)
+
+
+class _Segment:
+    __slots__ = ("start", "path")
+
+    def __init__(self, start: float, path: Path):
+        self.start = start
+        self.path = path
+
+
+class _SeriesWriter:
+    """单个序列的追加写入状态
+
+    段列表缓存在内存中，目录的修改时间变化（其他进程轮转或清理了段）时重新读取
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.segments: List[_Segment] = []
+        self.listed_mtime: Optional[int] = None
+        self.buffer = bytearray()
+        self.last_timestamp = 0.0
+        self.lock_fd: Optional[int] = None
+
+    def refresh(self):
+        """目录有变化时重新读取段列表"""
+        mtime = self.directory.stat().st_mtime_ns
+        if mtime == self.listed_mtime:
+            return
+        segments = []
+        for path in self.directory.glob(f"*{SEGMENT_SUFFIX}"):
+            try:
+                segments.append(_Segment(float(path.stem), path))
+            except ValueError:
+                continue
+        segments.sort(key=lambda segment: segment.start)
+        self.segments = segments
+        self.listed_mtime = mtime
+
+    def read_tail(self) -> Tuple[float, int]:
+        """返回末段最后一条记录的时间戳与末段大小（需持有序列锁）"""
+        if not self.segments:
+            return 0.0, 0
+        try:
+            with open(self.segments[-1].path, "r+b") as f:
+                size = os.fstat(f.fileno()).st_size
+                # 截掉异常退出时写了一半的记录
+                if size % RECORD.size:
+                    size -= size % RECORD.size
+                    f.truncate(size)
+                if not size:
+                    return 0.0, 0
+                f.seek(size - RECORD.size)
+                return RECORD.unpack(f.read(RECORD.size))[0], size
+        except FileNotFoundError:
+            return 0.0, 0
+
+
+class TimeSeriesStore:
+    """追加式时间序列存储
+
+    - append()只写入内存缓冲，不做磁盘I/O也不等待文件锁；后台线程每flush_interval秒
+      （缓冲超过flush_bytes字节时立即）落盘（单次write，O_APPEND），flush()可同步落盘
+    - 段文件跨度超过segment_seconds或大小超过max_segment_bytes时轮转，轮转时删除超过保留期的段
+    - 同一序列内时间戳单调不减（时钟回拨或其他进程已写入更晚的记录时沿用上一条的时间戳），段内可直接二分
+    - 落盘、轮转与清理持有序列目录下的.lock文件锁，以磁盘上的末段为准，多个进程写同一序列也不会交错或丢段
+    - 段列表缓存在内存中，只在目录修改时间变化时重新扫描
+    """
+
+    def __init__(
+        self,
+        root,
+        segment_seconds: float = 86400.0,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        retention_days: float = 400.0,
+        flush_interval: float = 1.0,
+        flush_bytes: int = 64 * 1024,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_seconds = segment_seconds
+        self.max_segment_bytes = max_segment_bytes
+        self.retention_seconds = retention_days * 86400
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._writers: Dict[str, _SeriesWriter] = {}
+        self._condition = threading.Condition()  # 保护序列表与各序列的内存缓冲，只在内存操作期间持有
+        self._io_lock = threading.RLock()  # 落盘与读取（磁盘I/O、文件锁）互斥
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        self.last_error: Optional[str] = None
+        atexit.register(self.flush)
+
+    def _writer(self, series: str) -> _SeriesWriter:
+        """返回序列的写入状态（不访问磁盘，目录与末段在第一次落盘时读取）"""
+        writer = self._writers.get(series)
+        if writer is None:
+            writer = self._writers[series] = _SeriesWriter(self.root / series_dirname(series))
+        return writer
+
+    @contextmanager
+    def _series_lock(self, writer: _SeriesWriter):
+        """跨进程的序列锁（同一进程内由self._io_lock保证互斥）"""
+        if writer.lock_fd is None:
+            writer.directory.mkdir(exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        if writer.lock_fd is None:
+            writer.lock_fd = os.open(writer.directory / LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(writer.lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(writer.lock_fd, fcntl.LOCK_UN)
+
+    def append(self, series: str, value: float, timestamp: Optional[float] = None):
+        """追加一个样本（value可以是NaN，表示失败/缺失），只写内存缓冲"""
+        with self._condition:
+            writer = self._writer(series)
+            timestamp = max(timestamp if timestamp is not None else time.time(), writer.last_timestamp)
+            writer.last_timestamp = timestamp
+            writer.buffer += RECORD.pack(timestamp, value)
+            if self._flusher is None and not self._closed:
+                self._flusher = threading.Thread(target=self._run, name="FounderTimeSeriesFlush", daemon=True)
+                self._flusher.start()
+            if len(writer.buffer) >= self.flush_bytes or self.flush_interval <= 0:
+                self._condition.notify()
+
+    def _run(self):
+        """后台落盘线程"""
+        while True:
+            with self._condition:
+                if not self._closed:
+                    self._condition.wait(self.flush_interval if self.flush_interval > 0 else None)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except OSError as e:
+                self.last_error = str(e)
+
+    def _take_buffer(self, writer: _SeriesWriter) -> bytes:
+        with self._condition:
+            data = bytes(writer.buffer)
+            writer.buffer.clear()
+        return data
+
+    def _restore_buffer(self, writer: _SeriesWriter, data: bytes):
+        """落盘失败时把数据放回缓冲头部，下次重试"""
+        with self._condition:
+            writer.buffer[0:0] = data
+
+    def _write(self, writer: _SeriesWriter, data: bytes):
+        """在序列锁内把数据追加到磁盘上的末段，需要时轮转（需持有self._io_lock）"""
+        if not data:
+            return
+        try:
+            self._append_records(writer, data)
+        except BaseException:
+            self._restore_buffer(writer, data)
+            raise
+
+    def _append_records(self, writer: _SeriesWriter, data: bytes):
+        with self._series_lock(writer):
+            writer.refresh()
+            last_timestamp, size = writer.read_tail()
+            chunk = bytearray()
+            for timestamp, value in RECORD.iter_unpack(data):
+                timestamp = max(timestamp, last_timestamp)
+                if (
+                    not writer.segments
+                    or timestamp - writer.segments[-1].start >= self.segment_seconds
+                    or size + len(chunk) >= self.max_segment_bytes
+                ):
+                    self._append_chunk(writer, chunk)
+                    self._rotate(writer, timestamp)
+                    size = 0
+                chunk += RECORD.pack(timestamp, value)
+                last_timestamp = timestamp
+            self._append_chunk(writer, chunk)
+            writer.listed_mtime = writer.directory.stat().st_mtime_ns
+        with self._condition:
+            writer.last_timestamp = max(writer.last_timestamp, last_timestamp)
+
+    @staticmethod
+    def _append_chunk(writer: _SeriesWriter, chunk: bytearray):
+        if chunk and writer.segments:
+            with open(writer.segments[-1].path, "ab") as f:
+                f.write(chunk)
+        chunk.clear()
+
+    def _rotate(self, writer: _SeriesWriter, timestamp: float):
+        if writer.segments and writer.segments[-1].start >= timestamp:
+            return  # 同一时间戳不能再起新段
+        path = writer.directory / f"{timestamp:.6f}{SEGMENT_SUFFIX}"
+        path.touch()
+        writer.segments.append(_Segment(timestamp, path))
+        self._apply_retention(writer, timestamp)
+
+    def _apply_retention(self, writer: _SeriesWriter, now: float):
+        cutoff = now - self.retention_seconds
+        # 段的结束时间即下一段的起始时间
+        while len(writer.segments) > 1 and writer.segments[1].start < cutoff:
+            expired = writer.segments.pop(0)
+            try:
+                expired.path.unlink()
+            except OSError:
+                pass
+
+    def flush(self):
+        """把所有缓冲同步写入磁盘"""
+        with self._io_lock:
+            with self._condition:
+                writers = list(self._writers.values())
+            for writer in writers:
+                self._write(writer, self._take_buffer(writer))
+
+    def series(self) -> List[str]:
+        """已有的序列（目录名）"""
+        return sorted(path.name for path in self.root.iterdir() if path.is_dir())
+
+    def _read_range(self, series: str, start: float, end: float) -> Iterator[array]:
+        """按段返回[start, end)内的记录，交替存放时间戳与数值"""
+        with self._io_lock:
+            with self._condition:
+                if series not in self._writers and not (self.root / series_dirname(series)).is_dir():
+                    return
+                writer = self._writer(series)
+            self._write(writer, self._take_buffer(writer))
+            if not writer.directory.is_dir():
+                return
+            writer.refresh()
+            segments = list(writer.segments)
+
+        starts = [segment.start for segment in segments]
+        first = max(bisect.bisect_right(starts, start) - 1, 0)
+        for segment in segments[first:]:
+            if segment.start >= end:
+                break
+            try:
+                with open(segment.path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            data = data[:len(data) - len(data) % RECORD.size]
+            values = array("d")
+            values.frombytes(data)
+            timestamps = values[0::2]
+            lo = bisect.bisect_left(timestamps, start)
+            hi = bisect.bisect_left(timestamps, end)
+            if lo < hi:
+                yield values[lo * 2:hi * 2]
+
+    def query(self, series: str, start: float, end: float) -> Iterator[Tuple[float, float]]:
+        """返回[start, end)内的(时间戳, 数值)"""
+        for chunk in self._read_range(series, start, end):
+            yield from zip(chunk[0::2], chunk[1::2])
+
+    def aggregate(self, series: str, start: float, end: float, bucket_seconds: float) -> List[Dict[str, float]]:
+        """按时间桶聚合：样本数、有效数（非NaN）、最小、最大、平均"""
+        buckets: Dict[int, List[float]] = {}
+        for chunk in self._read_range(series, start, end):
+            timestamps = chunk[0::2]
+            values = chunk[1::2]
+            lo = 0
+            while lo < len(timestamps):
+                index = int((timestamps[lo] - start) // bucket_seconds)
+                hi = bisect.bisect_left(timestamps, start + (index + 1) * bucket_seconds, lo)
+                window = values[lo:hi]
+                total = sum(window)
+                if total != total:  # 含NaN时才逐个过滤
+                    window = array("d", [value for value in window if value == value])
+                    total = sum(window)
+
+                bucket = buckets.get(index)
+                if bucket is None:
+                    bucket = buckets[index] = [0, 0, math.inf, -math.inf, 0.0]
+                bucket[0] += hi - lo
+                if window:
+                    bucket[1] += len(window)
+                    bucket[2] = min(bucket[2], min(window))
+                    bucket[3] = max(bucket[3], max(window))
+                    bucket[4] += total
+                lo = hi
+
+        return [
+            {
+                "start": start + index * bucket_seconds,
+                "count": count,
+                "valid": valid,
+                "min": low if valid else None,
+                "max": high if valid else None,
+                "mean": total / valid if valid else None,
+            }
+            for index, (count, valid, low, high, total) in sorted(buckets.items())
+        ]
+
+    def disk_bytes(self, series: str) -> int:
+        with self._io_lock:
+            with self._condition:
+                writer = self._writer(series)
+            if not writer.directory.is_dir():
+                return 0
+            writer.refresh()
+            return sum(segment.path.stat().st_size for segment in writer.segments if segment.path.exists())
+
+    def close(self):
+        """停止后台线程并落盘剩余缓冲"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+        atexit.unregister(self.flush)
+        with self._io_lock:
+            for writer in self._writers.values():
+                if writer.lock_fd is not None:
+                    os.close(writer.lock_fd)
+                    writer.lock_fd = None
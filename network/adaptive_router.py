@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Founder自适应路由
+按域名和路由维护指数加权的建连延迟与成功率统计，据此在直连、HTTP代理、SOCKS5之间选择
+
+延迟统一使用建连耗时（TCP连接加代理隧道建立，不含DNS解析、TLS握手与响应），
+转发代理的上游建连与探测引擎的connect_ms阶段口径一致，可以放在同一个统计里比较。
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from network.proxy_router import ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY
+
+
+class RouteStats:
+    """单个域名单条路由的统计"""
+
+    __slots__ = ("latency_ms", "success_rate", "samples", "updated_at")
+
+    def __init__(self):
+        self.latency_ms = 0.0
+        self.success_rate = 1.0
+        self.samples = 0
+        self.updated_at = 0.0
+
+    def update(self, latency_ms: float, success: bool, alpha: float, now: float):
+        if success:
+            if self.latency_ms == 0.0:
+                self.latency_ms = latency_ms
+            else:
+                self.latency_ms += alpha * (latency_ms - self.latency_ms)
+        self.success_rate += alpha * ((1.0 if success else 0.0) - self.success_rate)
+        self.samples += 1
+        self.updated_at = now
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "latency_ms": round(self.latency_ms, 2),
+            "success_rate": round(self.success_rate, 3),
+            "samples": self.samples,
+        }
+
+
+class AdaptiveRouter:
+    """自适应路由选择器
+
+    - 真实流量只走已有足够样本（至少min_samples个、stale_after秒内更新过）的路由中
+      得分最低的一条（得分 = 平滑延迟 / 平滑成功率），得分相同时优先静态规则给出的路由；
+      还没有这样的路由时沿用静态规则的结果
+    - 样本不足或统计过时的路由，以及以explore_rate的概率随机抽取的其他路由，
+      由exploration_targets交给调用方在后台探测，不占用真实请求
+    - 同一域名同一路由同时只有一个探测，探测结果记录后（或超过probe_timeout秒）才会再次探测
+    - 最多保存max_domains个域名，超出后按LRU淘汰，内存占用固定
+    """
+
+    def __init__(
+        self,
+        routes: Sequence[str] = (ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY),
+        max_domains: int = 10000,
+        alpha: float = 0.2,
+        explore_rate: float = 0.05,
+        min_samples: int = 3,
+        stale_after: float = 600.0,
+        failure_penalty_ms: float = 10000.0,
+        probe_timeout: float = 30.0,
+        rng: Optional[random.Random] = None,
+    ):
+        self.routes = tuple(routes)
+        self.max_domains = max_domains
+        self.alpha = alpha
+        self.explore_rate = explore_rate
+        self.min_samples = min_samples
+        self.stale_after = stale_after
+        self.failure_penalty_ms = failure_penalty_ms
+        self.probe_timeout = probe_timeout
+        self.rng = rng or random.Random()
+        self._domains: "OrderedDict[str, Dict[str, RouteStats]]" = OrderedDict()
+        self._probing: Dict[Tuple[str, str], float] = {}  # (域名, 路由) -> 探测开始时间
+        self._lock = threading.Lock()
+
+    def _stats_for(self, domain: str) -> Dict[str, RouteStats]:
+        stats = self._domains.get(domain)
+        if stats is None:
+            stats = {route: RouteStats() for route in self.routes}
+            self._domains[domain] = stats
+            while len(self._domains) > self.max_domains:
+                self._domains.popitem(last=False)
+        else:
+            self._domains.move_to_end(domain)
+        return stats
+
+    def _ready(self, route_stats: RouteStats, now: float) -> bool:
+        return route_stats.samples >= self.min_samples and now - route_stats.updated_at <= self.stale_after
+
+    def choose(self, domain: str, preferred: str = ROUTE_DIRECT, routes: Optional[Sequence[str]] = None) -> str:
+        """为域名选择路由，preferred为静态规则给出的路由，routes限定调用方可用的路由（默认全部）"""
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats_for(domain)
+
+            allowed = self.routes if routes is None else routes
+            candidates = [preferred] + [route for route in allowed if route != preferred]
+            ready = [route for route in candidates if route in stats and self._ready(stats[route], now)]
+            if not ready:
+                return preferred
+
+            def score(route: str) -> float:
+                route_stats = stats[route]
+                # 从未成功过的路由没有延迟数据，按惩罚延迟计算
+                latency = route_stats.latency_ms or self.failure_penalty_ms
+                return latency / max(route_stats.success_rate, 0.01)
+
+            return min(ready, key=score)
+
+    def exploration_targets(self, domain: str, chosen: str, routes: Optional[Sequence[str]] = None) -> List[str]:
+        """返回需要后台探测的路由（chosen之外，限于routes），并登记为探测中"""
+        now = time.monotonic()
+        with self._lock:
+            stats = self._domains.get(domain)
+            if stats is None:
+                return []
+            for key, started in list(self._probing.items()):
+                if now - started > self.probe_timeout:
+                    del self._probing[key]
+
+            allowed = self.routes if routes is None else routes
+            others = [route for route in allowed if route != chosen and route in stats]
+            targets = [route for route in others if not self._ready(stats[route], now)]
+            if not targets and others and self.rng.random() < self.explore_rate:
+                targets = [self.rng.choice(others)]
+            targets = [route for route in targets if (domain, route) not in self._probing]
+            for route in targets:
+                self._probing[(domain, route)] = now
+            return targets
+
+    def record(self, domain: str, route: str, latency_ms: float, success: bool):
+        """记录一次请求结果"""
+        if route not in self.routes:
+            return
+        with self._lock:
+            self._probing.pop((domain, route), None)
+            self._stats_for(domain)[route].update(latency_ms, success, self.alpha, time.monotonic())
+
+    def snapshot(self, domain: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """导出统计（指定域名时只导出该域名）"""
+        with self._lock:
+            domains = [domain] if domain is not None else list(self._domains)
+            return {
+                name: {route: stats.to_dict() for route, stats in self._domains[name].items()}
+                for name in domains
+                if name in self._domains
+            }
+
+    def __len__(self) -> int:
+        return len(self._domains)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Founder网络管理控制接口（客户端）
+常驻进程在Unix域套接字上接受命令（每行一个JSON请求，每行一个JSON响应，服务端见control_server.py），
+命令行作为瘦客户端转发命令，复用常驻进程中已预热的管理器、连接池与缓存。
+本模块只使用json/socket，客户端路径不加载asyncio与网络管理的其他依赖
+"""
+
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SOCKET_PATH = Path(
+    os.environ.get("FOUNDER_NETWORK_SOCKET", Path.home() / ".openclaw" / "run" / "founder_network.sock")
+)
+
+# 可以交给常驻进程执行的命令（proxy/daemon始终在本进程执行）
+DAEMON_COMMANDS = ("status", "pon", "poff", "test", "restart", "health")
+
+
+class ControlError(Exception):
+    """常驻进程执行命令失败"""
+
+
+class DaemonNotRunning(ConnectionError):
+    """连接不到常驻进程（命令尚未发出）"""
+
+
+class ControlClient:
+    """控制接口客户端（阻塞套接字，不使用事件循环）"""
+
+    def __init__(self, socket_path=None, timeout: float = 60.0):
+        self.socket_path = Path(socket_path) if socket_path else DEFAULT_SOCKET_PATH
+        self.timeout = timeout
+
+    def call(self, command: str, **args) -> Any:
+        """发送命令并返回结果
+
+        常驻进程未运行时抛出DaemonNotRunning；命令已发出后连接中断或超时抛出OSError，
+        命令执行失败时抛出ControlError。
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            try:
+                sock.connect(str(self.socket_path))
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                raise DaemonNotRunning(f"常驻进程未运行: {self.socket_path}") from e
+            request = {"command": command, "args": args}
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            buffer = b""
+            while not buffer.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    raise ConnectionError("常驻进程关闭了连接")
+                buffer += chunk
+        finally:
+            sock.close()
+        response = json.loads(buffer)
+        if not response.get("ok"):
+            raise ControlError(response.get("error", "未知错误"))
+        return response.get("result")
+
+
+def print_command_result(command: str, result: Dict[str, Any]):
+    """按命令输出结果（本地执行与常驻进程执行共用同一输出格式）"""
+    if command == "status":
+        print(f"🌐 当前代理状态: {result['proxy_state']}")
+        print(f"📅 最后切换时间: {result['last_switch_time']}")
+    elif command in ("pon", "poff"):
+        action = "启用" if command == "pon" else "关闭"
+        print(f"{'✅' if result['success'] else '❌'} 代理{action}{'成功' if result['success'] else '失败'}")
+    elif command == "test":
+        for title, key in (("测试国内连接...", "domestic"), ("\n测试国际连接...", "international")):
+            print(f"{title} (代理: {result[key]['proxy_state']})")
+            for probe in result[key]["results"]:
+                status = "✅" if probe["success"] else "❌"
+                print(f"{status} {probe['name']}: {probe['latency_ms']}ms ({probe.get('route') or 'direct'})")
+    elif command == "restart":
+        print("✅ Gateway重启成功" if result["success"] else "❌ Gateway重启失败")
+    elif command == "health":
+        print(result["report"])
+    else:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+def command_args(command: str, argv: List[str]) -> Dict[str, Any]:
+    """把命令行参数解析为命令参数（转发与本地执行共用），参数无效时抛出ValueError"""
+    args: Dict[str, Any] = {}
+    if command == "health" and argv:
+        try:
+            max_age = float(argv[0])
+        except ValueError:
+            max_age = -1.0
+        if not 0 <= max_age < float("inf"):
+            raise ValueError(f"health的最大数据年龄必须是非负秒数: {argv[0]}")
+        args["max_age"] = max_age
+    return args
+
+
+def forward_cli(argv: List[str], socket_path=None) -> Optional[int]:
+    """常驻进程在运行时把命令交给它执行并输出结果，返回退出码；
+    命令不能转发或常驻进程未运行时返回None，由调用方在本进程执行"""
+    if not argv or argv[0].lower() not in DAEMON_COMMANDS:
+        return None
+    command = argv[0].lower()
+    try:
+        args = command_args(command, argv[1:])
+    except ValueError as e:
+        print(f"用法错误: {e}", file=sys.stderr)
+        return 2
+    try:
+        result = ControlClient(socket_path).call(command, **args)
+    except DaemonNotRunning:
+        return None
+    except (ControlError, OSError, ValueError) as e:
+        # 命令可能已经执行，不再回退到本进程重复执行
+        print(f"❌ 常驻进程执行失败: {e}", file=sys.stderr)
+        return 1
+    print_command_result(command, result)
+    return 0
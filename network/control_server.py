@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Founder网络管理控制接口（服务端）
+在共享连接池的事件循环中监听Unix域套接字，按行读取JSON命令，在线程池中执行处理函数
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from network.control import DEFAULT_SOCKET_PATH
+
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+class ControlServer:
+    """控制接口服务端
+
+    handlers为{命令: 处理函数(参数字典) -> 可JSON序列化的结果}。处理函数是同步的，
+    在线程池中执行，不阻塞事件循环（其中可以同步等待连接池事件循环上的探测）。
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+        socket_path=None,
+        max_workers: int = 4,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.handlers = handlers
+        self.socket_path = Path(socket_path) if socket_path else DEFAULT_SOCKET_PATH
+        self.max_workers = max_workers
+        self.logger = logger or logging.getLogger("FounderNetworkManager")
+        self.requests_total = 0
+        self.errors_total = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _remove_stale_socket(self):
+        if not self.socket_path.exists():
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.socket_path))
+        except (ConnectionRefusedError, FileNotFoundError):
+            # 上一个常驻进程异常退出留下的套接字文件
+            self.socket_path.unlink()
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"常驻进程已在运行: {self.socket_path}")
+
+    async def start(self):
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_socket()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="FounderControl")
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=str(self.socket_path), limit=MAX_REQUEST_BYTES
+        )
+        # 只允许当前用户连接
+        os.chmod(self.socket_path, 0o600)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self._respond(writer, {"ok": False, "error": "请求过大"})
+                    return
+                if not line:
+                    return
+                await self._respond(writer, await self._dispatch(line))
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, line: bytes) -> Dict[str, Any]:
+        self.requests_total += 1
+        try:
+            request = json.loads(line)
+            command = request["command"]
+            args = request.get("args") or {}
+            if not isinstance(command, str):
+                raise TypeError("command")
+            if not isinstance(args, dict):
+                raise TypeError("args")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.errors_total += 1
+            return {"ok": False, "error": "无效请求"}
+        handler = self.handlers.get(command)
+        if handler is None:
+            self.errors_total += 1
+            return {"ok": False, "error": f"未知命令: {command}"}
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, handler, args)
+            return {"ok": True, "result": result}
+        except Exception as e:
+            self.errors_total += 1
+            self.logger.error(f"控制命令 {command} 执行失败: {e}")
+            return {"ok": False, "error": str(e) or type(e).__name__}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, response: Dict[str, Any]):
+        writer.write(json.dumps(response, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "socket": str(self.socket_path),
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+        }
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Founder DNS解析缓存
+直接向系统配置的DNS服务器查询A/AAAA记录以获得TTL，按TTL缓存解析结果（含否定缓存），
+提供同步接口（路由判断）与异步接口（连接池）。
+按resolv.conf的search/ndots展开短名，应答被截断时改用TCP重查，
+DNS查不到的名称（NSS提供的主机名等）交给系统getaddrinfo
+"""
+
+import asyncio
+import random
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from aiohttp.abc import AbstractResolver
+
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_AAAA = 28
+RCODE_NXDOMAIN = 3
+FLAG_TC = 0x0200
+DNS_PORT = 53
+# 单个查询的失败（超时、连接错误、畸形应答），不影响同一服务器上另一类型的查询
+QUERY_ERRORS = (OSError, ValueError, struct.error, IndexError, asyncio.IncompleteReadError)
+
+
+def read_nameservers(resolv_conf: str = "/etc/resolv.conf") -> List[str]:
+    """读取系统DNS服务器列表"""
+    nameservers = []
+    try:
+        with open(resolv_conf, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    nameservers.append(parts[1])
+    except OSError:
+        pass
+    return nameservers
+
+
+def read_search_config(resolv_conf: str = "/etc/resolv.conf") -> Tuple[List[str], int]:
+    """读取search域列表与ndots（与libc一致：后出现的search/domain覆盖之前的）"""
+    search: List[str] = []
+    ndots = 1
+    try:
+        with open(resolv_conf, "r") as f:
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0] in ("search", "domain"):
+                    search = [domain.rstrip(".") for domain in parts[1:] if domain.rstrip(".")]
+                elif parts[0] == "options":
+                    for option in parts[1:]:
+                        if option.startswith("ndots:"):
+                            try:
+                                ndots = min(max(int(option[6:]), 0), 15)
+                            except ValueError:
+                                pass
+    except OSError:
+        pass
+    return search, ndots
+
+
+def read_hosts_file(hosts_file: str = "/etc/hosts") -> Dict[str, List[str]]:
+    """读取hosts文件，返回主机名到地址列表的映射"""
+    hosts: Dict[str, List[str]] = {}
+    try:
+        with open(hosts_file, "r") as f:
+            for line in f:
+                parts = line.split("#", 1)[0].split()
+                for name in parts[1:]:
+                    hosts.setdefault(name.lower(), []).append(parts[0])
+    except OSError:
+        pass
+    return hosts
+
+
+def build_query(host: str, qtype: int) -> Tuple[int, bytes]:
+    """构造DNS查询报文，返回(事务ID, 报文)"""
+    query_id = random.getrandbits(16)
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)  # 期望递归
+    qname = b"".join(bytes([len(label)]) + label.encode("idna") for label in host.rstrip(".").split(".")) + b"\0"
+    return query_id, header + qname + struct.pack("!HH", qtype, 1)
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:  # 压缩指针
+            return offset + 2
+        if length == 0:
+            return offset + 1
+        offset += length + 1
+
+
+def parse_response(data: bytes, query_id: int) -> Tuple[int, List[str], Optional[int]]:
+    """解析DNS应答，返回(rcode, 地址列表, 最小TTL)"""
+    response_id, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    if response_id != query_id:
+        raise ValueError("DNS应答事务ID不匹配")
+    rcode = flags & 0x000F
+
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+
+    addresses = []
+    min_ttl = None
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, ttl, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        rdata = data[offset:offset + rdlength]
+        offset += rdlength
+        if rtype == QTYPE_A and rdlength == 4:
+            addresses.append(socket.inet_ntop(socket.AF_INET, rdata))
+        elif rtype == QTYPE_AAAA and rdlength == 16:
+            addresses.append(socket.inet_ntop(socket.AF_INET6, rdata))
+        elif rtype != QTYPE_CNAME:
+            continue
+        min_ttl = ttl if min_ttl is None else min(min_ttl, ttl)
+    return rcode, addresses, min_ttl
+
+
+def is_truncated(data: bytes) -> bool:
+    """应答是否设置了TC位（UDP应答被截断，需要改用TCP）"""
+    return len(data) >= 4 and bool(struct.unpack("!H", data[2:4])[0] & FLAG_TC)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("DNS服务器关闭了TCP连接")
+        data += chunk
+    return data
+
+
+def query_dns_tcp(
+    host: str, qtype: int, nameserver: str, timeout: float = 2.0, port: int = DNS_PORT
+) -> Tuple[int, List[str], Optional[int]]:
+    """向指定DNS服务器发起一次TCP查询（报文前加2字节长度）"""
+    query_id, packet = build_query(host, qtype)
+    with socket.create_connection((nameserver, port), timeout=timeout) as sock:
+        sock.sendall(struct.pack("!H", len(packet)) + packet)
+        length = struct.unpack("!H", _recv_exactly(sock, 2))[0]
+        data = _recv_exactly(sock, length)
+    return parse_response(data, query_id)
+
+
+def query_dns(
+    host: str, qtype: int, nameserver: str, timeout: float = 2.0, port: int = DNS_PORT
+) -> Tuple[int, List[str], Optional[int]]:
+    """向指定DNS服务器发起一次UDP查询，应答被截断时改用TCP"""
+    query_id, packet = build_query(host, qtype)
+    family = socket.AF_INET6 if ":" in nameserver else socket.AF_INET
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(packet, (nameserver, port))
+        data, _ = sock.recvfrom(4096)
+    if is_truncated(data):
+        return query_dns_tcp(host, qtype, nameserver, timeout, port)
+    return parse_response(data, query_id)
+
+
+class TTLResolverCache:
+    """按TTL缓存的同步DNS解析器
+
+    先查hosts文件，再直接查询DNS服务器以获得真实TTL，TTL限制在[min_ttl, max_ttl]内；
+    点数少于ndots的名称先依次拼接search域查询（与libc顺序一致）。
+    无法直接查询、或所有候选名称都没有地址（NXDOMAIN、NSS提供的主机名）时
+    退回系统getaddrinfo，使用fallback_ttl。
+    解析失败的结果按negative_ttl缓存，避免反复查询不存在的域名。
+    """
+
+    def __init__(
+        self,
+        nameservers: Optional[List[str]] = None,
+        search: Optional[List[str]] = None,
+        ndots: Optional[int] = None,
+        port: int = DNS_PORT,
+        timeout: float = 2.0,
+        min_ttl: float = 5.0,
+        max_ttl: float = 3600.0,
+        fallback_ttl: float = 60.0,
+        negative_ttl: float = 30.0,
+        max_entries: int = 4096,
+    ):
+        self.nameservers = nameservers if nameservers is not None else read_nameservers()
+        default_search, default_ndots = read_search_config()
+        self.search = search if search is not None else default_search
+        self.ndots = ndots if ndots is not None else default_ndots
+        self.port = port
+        self.timeout = timeout
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.fallback_ttl = fallback_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hosts = read_hosts_file()
+        self._cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "coalesced": 0}
+
+    def _clamp_ttl(self, ttls: List[int]) -> float:
+        ttl = min(ttls) if ttls else self.min_ttl
+        return min(max(ttl, self.min_ttl), self.max_ttl)
+
+    def _cached(self, host: str) -> Optional[List[str]]:
+        """返回未过期的缓存结果（空列表表示否定缓存），无缓存返回None"""
+        with self._lock:
+            entry = self._cache.get(host)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self._cache.move_to_end(host)
+            self.stats["hits" if entry[1] else "negative_hits"] += 1
+            return entry[1]
+
+    def _store(self, host: str, addresses: List[str], ttl: float):
+        if not addresses:
+            ttl = self.negative_ttl
+        with self._lock:
+            self._cache[host] = (time.monotonic() + ttl, addresses)
+            self._cache.move_to_end(host)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def candidates(self, host: str) -> List[str]:
+        """按search/ndots展开的查询名称（以"."结尾的名称不展开）"""
+        if host.endswith("."):
+            return [host.rstrip(".")]
+        expanded = [f"{host}.{domain}" for domain in self.search]
+        if host.count(".") >= self.ndots:
+            return [host] + expanded
+        return expanded + [host]
+
+    def _answer(self, answers: List[Tuple[int, List[str], Optional[int]]]) -> Optional[Tuple[List[str], float]]:
+        """合并一个候选名称的A/AAAA应答；没有地址时返回None，继续尝试下一个候选名称"""
+        addresses = [address for rcode, found, _ in answers if rcode != RCODE_NXDOMAIN for address in found]
+        if not addresses:
+            return None
+        return addresses, self._clamp_ttl([ttl for _, _, ttl in answers if ttl is not None])
+
+    def _answer_partial(self, answers: List) -> Tuple[Optional[Tuple[List[str], float]], bool]:
+        """合并可能部分失败的A/AAAA应答（失败的位置是异常对象）
+
+        返回(结果, 是否换下一个服务器)：任一类型有地址即使用；全部失败，
+        或已应答的类型没有地址而另一类型失败（无法判定没有地址）时换下一个服务器
+        """
+        received = [answer for answer in answers if not isinstance(answer, BaseException)]
+        result = self._answer(received)
+        return result, result is None and len(received) < len(answers)
+
+    def _query(self, host: str) -> Tuple[List[str], float]:
+        if host.lower() in self.hosts:
+            return self.hosts[host.lower()], self.max_ttl
+
+        for name in self.candidates(host):
+            for nameserver in self.nameservers:
+                answers = []
+                for qtype in (QTYPE_A, QTYPE_AAAA):
+                    try:
+                        answers.append(query_dns(name, qtype, nameserver, self.timeout, self.port))
+                    except QUERY_ERRORS as e:
+                        answers.append(e)
+                result, next_server = self._answer_partial(answers)
+                if next_server:
+                    continue
+                if result is not None:
+                    return result
+                break  # 该服务器已给出否定应答，换下一个候选名称
+
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        return list(dict.fromkeys(info[4][0] for info in infos)), self.fallback_ttl
+
+    def resolve(self, host: str) -> List[str]:
+        """解析主机名，返回IP地址列表；解析失败返回空列表"""
+        cached = self._cached(host)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            self.stats["misses"] += 1
+        try:
+            addresses, ttl = self._query(host)
+        except OSError:
+            addresses, ttl = [], self.negative_ttl
+        self._store(host, addresses, ttl)
+        return addresses
+
+
+class _DnsDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, query_id: int):
+        self.query_id = query_id
+        self.response: "asyncio.Future[bytes]" = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data: bytes, addr):
+        if not self.response.done() and len(data) >= 2 and struct.unpack("!H", data[:2])[0] == self.query_id:
+            self.response.set_result(data)
+
+    def error_received(self, exc: Exception):
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+
+async def query_dns_tcp_async(
+    host: str, qtype: int, nameserver: str, timeout: float = 2.0, port: int = DNS_PORT
+) -> Tuple[int, List[str], Optional[int]]:
+    """query_dns_tcp的异步版本"""
+    query_id, packet = build_query(host, qtype)
+    async with asyncio.timeout(timeout):
+        reader, writer = await asyncio.open_connection(nameserver, port)
+        try:
+            writer.write(struct.pack("!H", len(packet)) + packet)
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+            data = await reader.readexactly(length)
+        finally:
+            writer.close()
+    return parse_response(data, query_id)
+
+
+async def query_dns_async(
+    host: str, qtype: int, nameserver: str, timeout: float = 2.0, port: int = DNS_PORT
+) -> Tuple[int, List[str], Optional[int]]:
+    """query_dns的异步版本"""
+    loop = asyncio.get_running_loop()
+    query_id, packet = build_query(host, qtype)
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _DnsDatagramProtocol(query_id), remote_addr=(nameserver, port)
+    )
+    try:
+        transport.sendto(packet)
+        data = await asyncio.wait_for(protocol.response, timeout)
+    finally:
+        transport.close()
+    if is_truncated(data):
+        return await query_dns_tcp_async(host, qtype, nameserver, timeout, port)
+    return parse_response(data, query_id)
+
+
+class AsyncResolverCache(TTLResolverCache):
+    """异步DNS解析缓存
+
+    与同步resolve()共用同一份缓存。同一主机名的并发查询合并为一次，
+    A与AAAA查询并发发出。可通过prefetch()预先解析站点列表。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._inflight: Dict[str, "asyncio.Future[List[str]]"] = {}
+
+    async def _query_async(self, host: str) -> Tuple[List[str], float]:
+        if host.lower() in self.hosts:
+            return self.hosts[host.lower()], self.max_ttl
+
+        for name in self.candidates(host):
+            for nameserver in self.nameservers:
+                # 两个查询都等到结束（外层被取消时gather会取消两者），只丢弃失败的那个
+                answers = await asyncio.gather(
+                    query_dns_async(name, QTYPE_A, nameserver, self.timeout, self.port),
+                    query_dns_async(name, QTYPE_AAAA, nameserver, self.timeout, self.port),
+                    return_exceptions=True,
+                )
+                for answer in answers:
+                    if isinstance(answer, BaseException) and not isinstance(answer, QUERY_ERRORS):
+                        raise answer
+                result, next_server = self._answer_partial(answers)
+                if next_server:
+                    continue
+                if result is not None:
+                    return result
+                break
+
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        return list(dict.fromkeys(info[4][0] for info in infos)), self.fallback_ttl
+
+    async def _resolve_and_store(self, host: str) -> List[str]:
+        try:
+            addresses, ttl = await self._query_async(host)
+        except OSError:
+            addresses, ttl = [], self.negative_ttl
+        self._store(host, addresses, ttl)
+        return addresses
+
+    async def resolve_async(self, host: str) -> List[str]:
+        """异步解析主机名，返回IP地址列表；解析失败返回空列表"""
+        cached = self._cached(host)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(host)
+        if future is not None:
+            with self._lock:
+                self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        future = asyncio.ensure_future(self._resolve_and_store(host))
+        self._inflight[host] = future
+        future.add_done_callback(lambda _: self._inflight.pop(host, None))
+        return await asyncio.shield(future)
+
+    async def prefetch(self, hosts: Iterable[str]) -> Dict[str, List[str]]:
+        """并发预解析一组主机名"""
+        hosts = list(dict.fromkeys(host.lower() for host in hosts if host))
+        results = await asyncio.gather(*(self.resolve_async(host) for host in hosts))
+        return dict(zip(hosts, results))
+
+
+class AiohttpResolver(AbstractResolver):
+    """把AsyncResolverCache接入aiohttp连接器"""
+
+    def __init__(self, cache: AsyncResolverCache):
+        self.cache = cache
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict]:
+        addresses = await self.cache.resolve_async(host)
+        if not addresses:
+            raise socket.gaierror(socket.EAI_NONAME, f"无法解析域名: {host}")
+
+        results = []
+        for address in addresses:
+            address_family = socket.AF_INET6 if ":" in address else socket.AF_INET
+            if family not in (socket.AF_UNSPEC, address_family):
+                continue
+            results.append({
+                "hostname": host,
+                "host": address,
+                "port": port,
+                "family": address_family,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST,
+            })
+        if not results:
+            raise socket.gaierror(socket.EAI_NONAME, f"无法解析域名: {host}")
+        return results
+
+    async def close(self):
+        pass
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Founder域名后缀索引
+按标签边界匹配域名后缀，查找耗时只与域名标签数相关，与规则数量无关
+"""
+
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def normalize_host(host: str) -> str:
+    """统一为小写、去掉末尾的点"""
+    return host.strip().lower().rstrip(".")
+
+
+class DomainSuffixIndex:
+    """哈希后缀索引（等价于反向标签字典树）
+
+    规则"baidu.com"匹配baidu.com及其所有子域名，但不匹配notbaidu.com
+    或baidu.com.evil.io；规则"*.baidu.com"只匹配子域名。
+    多条规则同时命中时取最长（最具体）的后缀。最近查询的主机名结果缓存在LRU中。
+    """
+
+    def __init__(self, rules: Optional[Iterable[Tuple[str, str]]] = None, cache_size: int = 4096):
+        self._suffixes: Dict[str, str] = {}
+        self._subdomain_suffixes: Dict[str, str] = {}
+        self.cache_size = cache_size
+        self._cached_lookup = lru_cache(maxsize=cache_size)(self._lookup)
+        if rules:
+            self.update(rules)
+
+    def __len__(self) -> int:
+        return len(self._suffixes) + len(self._subdomain_suffixes)
+
+    def _insert(self, domain: str, value: str):
+        domain = normalize_host(domain)
+        if domain.startswith("*."):
+            self._subdomain_suffixes[domain[2:]] = value
+        elif domain:
+            self._suffixes[domain] = value
+
+    def add(self, domain: str, value: str):
+        """添加一条后缀规则，同一后缀后添加的覆盖先添加的"""
+        self._insert(domain, value)
+        self._cached_lookup.cache_clear()
+
+    def update(self, rules: Iterable[Tuple[str, str]]):
+        """批量添加规则"""
+        for domain, value in rules:
+            self._insert(domain, value)
+        self._cached_lookup.cache_clear()
+
+    def _lookup(self, host: str) -> Optional[str]:
+        suffixes = self._suffixes
+        subdomain_suffixes = self._subdomain_suffixes
+        value = suffixes.get(host)
+        if value is not None:
+            return value
+        # 从左向右逐个去掉标签，先检查的后缀更长
+        index = host.find(".")
+        while index != -1:
+            suffix = host[index + 1:]
+            value = suffixes.get(suffix)
+            if value is None and subdomain_suffixes:
+                value = subdomain_suffixes.get(suffix)
+            if value is not None:
+                return value
+            index = host.find(".", index + 1)
+        return None
+
+    def lookup(self, host: str) -> Optional[str]:
+        """返回主机名命中的规则值，未命中返回None"""
+        return self._cached_lookup(normalize_host(host))
+
+    def lookup_many(self, hosts: Iterable[str]) -> List[Optional[str]]:
+        """批量查找"""
+        lookup = self._cached_lookup
+        return [lookup(normalize_host(host)) for host in hosts]
+
+    def cache_info(self):
+        """LRU缓存命中统计"""
+        return self._cached_lookup.cache_info()
+
+    def memory_bytes(self) -> int:
+        """索引占用的近似内存（字节，不含LRU缓存）"""
+        total = sys.getsizeof(self._suffixes) + sys.getsizeof(self._subdomain_suffixes)
+        for table in (self._suffixes, self._subdomain_suffixes):
+            total += sum(sys.getsizeof(key) for key in table)
+        return total
@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Founder本地转发代理
+在本地监听HTTP CONNECT与普通HTTP请求，按智能路由规则直连或转发到上游代理
+"""
+
+import asyncio
+import json
+import socket
+import struct
+import time
+import urllib.parse
+from typing import Dict, List, Optional, Set, Tuple
+
+from network.proxy_router import ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY
+
+Headers = List[Tuple[str, str]]
+
+# 只在本跳有效、不转发的报文头（另加Connection中列出的报文头）
+HOP_BY_HOP_HEADERS = {
+    "proxy-connection", "proxy-authorization", "proxy-authenticate", "keep-alive", "connection", "te", "upgrade"
+}
+# Connection中列出也不删除的报文头：代理按它们确定报文边界并原样转发报文体
+FRAMING_HEADERS = {"content-length", "transfer-encoding", "host"}
+
+STATS_PATH = "/founder-proxy/stats"
+PIPE_BUFFER_SIZE = 64 * 1024
+BAD_GATEWAY = b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+class ProxyError(Exception):
+    """上游连接失败"""
+
+
+def _parse_head(head: bytes) -> Tuple[str, Headers]:
+    lines = head.decode("latin-1").split("\r\n")
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(":")
+        headers.append((name.strip(), value.strip()))
+    return lines[0], headers
+
+
+def _parse_status(status_line: str) -> Tuple[str, int]:
+    """解析响应状态行，返回(协议版本, 状态码)；格式错误时抛出ProxyError"""
+    version, _, rest = status_line.partition(" ")
+    code = rest[:3]
+    if not version.startswith("HTTP/") or len(code) != 3 or not code.isdigit() or rest[3:4] not in ("", " "):
+        raise ProxyError(f"上游返回了无效的状态行: {status_line[:80]!r}")
+    return version, int(code)
+
+
+def _header(headers: Headers, name: str) -> Optional[str]:
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _end_to_end(headers: Headers) -> Headers:
+    """去掉逐跳报文头，包括Connection（及Proxy-Connection）中列出的报文头（RFC 7230 6.1）"""
+    hop_by_hop = set(HOP_BY_HOP_HEADERS)
+    for name, value in headers:
+        if name.lower() in ("connection", "proxy-connection"):
+            hop_by_hop.update(token.strip().lower() for token in value.split(","))
+    hop_by_hop -= FRAMING_HEADERS
+    return [(name, value) for name, value in headers if name.lower() not in hop_by_hop]
+
+
+def _wants_close(version: str, headers: Headers) -> bool:
+    connection = (_header(headers, "connection") or _header(headers, "proxy-connection") or "").lower()
+    if version == "HTTP/1.0":
+        return "keep-alive" not in connection
+    return "close" in connection
+
+
+def _split_host_port(authority: str, default_port: int) -> Tuple[str, int]:
+    parsed = urllib.parse.urlsplit(f"//{authority}")
+    return parsed.hostname or "", parsed.port or default_port
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """读取一个HTTP报文头，连接已关闭时返回None"""
+    try:
+        return await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+
+
+async def _relay_chunked(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> int:
+    total = 0
+    while True:
+        size_line = await reader.readuntil(b"\r\n")
+        writer.write(size_line)
+        size = int(size_line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            # 尾部头部，以空行结束
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                writer.write(line)
+                if line == b"\r\n":
+                    await writer.drain()
+                    return total
+        chunk = await reader.readexactly(size + 2)
+        writer.write(chunk)
+        total += size
+        await writer.drain()
+
+
+async def _relay_exact(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, length: int) -> int:
+    remaining = length
+    while remaining > 0:
+        data = await reader.read(min(remaining, PIPE_BUFFER_SIZE))
+        if not data:
+            raise asyncio.IncompleteReadError(b"", remaining)
+        writer.write(data)
+        remaining -= len(data)
+        await writer.drain()
+    return length
+
+
+async def _relay_body(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: Headers, until_eof: bool
+) -> Tuple[int, bool]:
+    """转发报文体，返回(字节数, 连接是否可复用)"""
+    if "chunked" in (_header(headers, "transfer-encoding") or "").lower():
+        return await _relay_chunked(reader, writer), True
+    length = _header(headers, "content-length")
+    if length is not None:
+        return await _relay_exact(reader, writer, int(length)), True
+    if not until_eof:
+        return 0, True
+    total = 0
+    while True:
+        data = await reader.read(PIPE_BUFFER_SIZE)
+        if not data:
+            return total, False
+        writer.write(data)
+        total += len(data)
+        await writer.drain()
+
+
+class _UpstreamPool:
+    """上游keep-alive连接池，按(路由, 目标)分组，每组数量有上限"""
+
+    def __init__(self, max_per_key: int, keepalive_timeout: float):
+        self.max_per_key = max_per_key
+        self.keepalive_timeout = keepalive_timeout
+        self._idle: Dict[tuple, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter, float]]] = {}
+
+    def get(self, key: tuple) -> Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        idle = self._idle.get(key)
+        now = time.monotonic()
+        while idle:
+            reader, writer, released_at = idle.pop()
+            if now - released_at < self.keepalive_timeout and not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def put(self, key: tuple, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) >= self.max_per_key or writer.is_closing():
+            writer.close()
+            return
+        idle.append((reader, writer, time.monotonic()))
+
+    def idle_count(self) -> int:
+        return sum(len(idle) for idle in self._idle.values())
+
+    def close(self):
+        for idle in self._idle.values():
+            for _, writer, _ in idle:
+                writer.close()
+        self._idle.clear()
+
+
+class ForwardProxy:
+    """本地转发代理
+
+    每个连接按FounderNetworkManager的路由规则选择直连、HTTP代理（CONNECT链式转发）
+    或SOCKS5代理。普通HTTP请求的上游连接（包括到上游代理的连接）保持长连接复用。
+    全部处理都是非阻塞的，单个事件循环即可承载数千条隧道。
+    """
+
+    def __init__(
+        self,
+        manager,
+        host: str = "127.0.0.1",
+        port: int = 8118,
+        max_connections: int = 10000,
+        connect_timeout: float = 10.0,
+        idle_timeout: float = 300.0,
+        tunnel_idle_timeout: float = 600.0,
+        upstream_keepalive: float = 30.0,
+        upstream_pool_size: int = 16,
+    ):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.idle_timeout = idle_timeout
+        self.tunnel_idle_timeout = tunnel_idle_timeout
+        self.upstream_pool = _UpstreamPool(upstream_pool_size, upstream_keepalive)
+        self._connection_slots = asyncio.Semaphore(max_connections)
+        self._server: Optional[asyncio.Server] = None
+        self._explorations: Set[asyncio.Task] = set()
+        self.started_at = time.time()
+
+        self.counters = {
+            "connections_total": 0,
+            "connections_active": 0,
+            "tunnels_total": 0,
+            "tunnels_active": 0,
+            "tunnels_idle_closed": 0,
+            "http_requests_total": 0,
+            "upstream_reused_total": 0,
+            "route_fallbacks_total": 0,  # 自适应路由选出的路由建连失败、改走规则路由的次数
+            "explorations_total": 0,  # 后台探测其他路由的次数
+            "errors_total": 0,
+            "bytes_sent": 0,  # 客户端 -> 上游
+            "bytes_received": 0,  # 上游 -> 客户端
+        }
+        # 各路由的上游建连延迟
+        self.connect_latency = {
+            route: {"count": 0, "sum_ms": 0.0, "max_ms": 0.0}
+            for route in (ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY)
+        }
+
+    # ---- 生命周期 ----
+
+    async def start(self):
+        """开始监听"""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.started_at = time.time()
+
+    async def stop(self):
+        """停止监听并关闭空闲的上游连接"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._explorations:
+            task.cancel()
+        await asyncio.gather(*self._explorations, return_exceptions=True)
+        self.upstream_pool.close()
+
+    # ---- 路由与上游连接 ----
+
+    async def _route_for(self, host: str, port: int, scheme: str) -> str:
+        if self.manager.ip_routing_enabled:
+            # 先异步预热DNS缓存，避免路由判断中的同步解析阻塞事件循环
+            await self.manager.resolver.resolve_async(host)
+        url = f"{scheme}://{host}:{port}"
+        route = self.manager.router.route_for_url(url)
+        for target in self.manager.router.exploration_targets(url, route):
+            self._explore(target, host, port)
+        return route
+
+    def _explore(self, route: str, host: str, port: int):
+        """在后台经route建立一次到host:port的连接，结果由_open_tunnel反馈给自适应路由"""
+        async def probe():
+            try:
+                _, writer = await self._open_tunnel(route, host, port)
+                writer.close()
+            except ProxyError:
+                pass
+
+        self.counters["explorations_total"] += 1
+        task = asyncio.create_task(probe())
+        self._explorations.add(task)
+        task.add_done_callback(self._explorations.discard)
+
+    async def _open_routed(
+        self, route: str, host: str, port: int, scheme: str
+    ) -> Tuple[str, Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        """经route建立通道，自适应路由选出的路由失败时改走规则路由重试一次，返回实际使用的路由与通道"""
+        try:
+            return route, await self._open_tunnel(route, host, port)
+        except ProxyError:
+            fallback = self.manager.router.fallback_route(f"{scheme}://{host}:{port}", route)
+            if fallback is None:
+                raise
+        self.counters["route_fallbacks_total"] += 1
+        return fallback, await self._open_tunnel(fallback, host, port)
+
+    async def _resolve(self, host: str) -> List[str]:
+        try:
+            socket.inet_pton(socket.AF_INET6 if ":" in host else socket.AF_INET, host)
+            return [host]
+        except OSError:
+            addresses = await self.manager.resolver.resolve_async(host)
+        if not addresses:
+            raise ProxyError(f"无法解析域名: {host}")
+        return addresses
+
+    async def _open_direct(
+        self, host: str, addresses: List[str], port: int
+    ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await asyncio.open_connection(address, port)
+            except OSError as e:
+                last_error = e
+        raise ProxyError(f"连接{host}:{port}失败: {last_error}")
+
+    async def _open_upstream_proxy(self, proxy_url: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        parsed = urllib.parse.urlsplit(proxy_url)
+        try:
+            return await asyncio.open_connection(parsed.hostname, parsed.port)
+        except OSError as e:
+            raise ProxyError(f"连接上游代理{proxy_url}失败: {e}")
+
+    async def _http_connect(self, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await self._open_upstream_proxy(self.manager.proxy_config["http"])
+        authority = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+        writer.write(f"CONNECT {authority} HTTP/1.1\r\nHost: {authority}\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        head = await _read_head(reader)
+        try:
+            if head is None:
+                raise ProxyError(f"上游代理在响应CONNECT {authority}前关闭连接")
+            _, status = _parse_status(_parse_head(head)[0])
+            if status != 200:
+                raise ProxyError(f"上游代理拒绝CONNECT {authority}: {status}")
+        except ProxyError:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _socks5_connect(self, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await self._open_upstream_proxy(self.manager.proxy_config["socks5"])
+        writer.write(b"\x05\x01\x00")  # 无认证
+        await writer.drain()
+        if await reader.readexactly(2) != b"\x05\x00":
+            writer.close()
+            raise ProxyError("SOCKS5握手失败")
+
+        host_bytes = host.encode("idna")
+        writer.write(b"\x05\x01\x00\x03" + bytes([len(host_bytes)]) + host_bytes + struct.pack("!H", port))
+        await writer.drain()
+        reply = await reader.readexactly(4)
+        if reply[1] != 0:
+            writer.close()
+            raise ProxyError(f"SOCKS5连接{host}:{port}失败: 错误码{reply[1]}")
+        # 跳过绑定地址
+        address_type = reply[3]
+        if address_type == 1:
+            await reader.readexactly(4 + 2)
+        elif address_type == 4:
+            await reader.readexactly(16 + 2)
+        else:
+            length = (await reader.readexactly(1))[0]
+            await reader.readexactly(length + 2)
+        return reader, writer
+
+    async def _open_tunnel(self, route: str, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """建立到host:port的字节流通道，记录建连延迟并反馈给自适应路由
+
+        建连延迟不含DNS解析，与探测引擎的connect_ms口径一致。
+        """
+        start = time.perf_counter()
+        success = False
+        try:
+            async with asyncio.timeout(self.connect_timeout):
+                if route == ROUTE_HTTP_PROXY:
+                    streams = await self._http_connect(host, port)
+                elif route == ROUTE_SOCKS5_PROXY:
+                    streams = await self._socks5_connect(host, port)
+                else:
+                    addresses = await self._resolve(host)
+                    start = time.perf_counter()
+                    streams = await self._open_direct(host, addresses, port)
+            success = True
+            return streams
+        except TimeoutError:
+            raise ProxyError(f"连接{host}:{port}超时")
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise ProxyError(f"连接{host}:{port}失败: {e}")
+        finally:
+            latency = (time.perf_counter() - start) * 1000
+            if success:
+                stats = self.connect_latency[route]
+                stats["count"] += 1
+                stats["sum_ms"] += latency
+                stats["max_ms"] = max(stats["max_ms"], latency)
+            self.manager.router.record_result(f"https://{host}:{port}", route, latency, success)
+
+    # ---- 客户端处理 ----
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async with self._connection_slots:
+            self.counters["connections_total"] += 1
+            self.counters["connections_active"] += 1
+            try:
+                head = await asyncio.wait_for(_read_head(reader), self.idle_timeout)
+                if head is None:
+                    return
+                request_line, headers = _parse_head(head)
+                method, _, target = request_line.partition(" ")
+                target = target.rsplit(" ", 1)[0]
+                if method.upper() == "CONNECT":
+                    await self._handle_connect(reader, writer, target)
+                else:
+                    await self._handle_http(reader, writer, request_line, headers)
+            except (ProxyError, OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, TimeoutError):
+                self.counters["errors_total"] += 1
+            finally:
+                self.counters["connections_active"] -= 1
+                writer.close()
+
+    async def _handle_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str):
+        host, port = _split_host_port(target, 443)
+        route = await self._route_for(host, port, "https")
+        try:
+            _, (upstream_reader, upstream_writer) = await self._open_routed(route, host, port, "https")
+        except ProxyError:
+            writer.write(BAD_GATEWAY)
+            await writer.drain()
+            raise
+
+        writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+        await writer.drain()
+
+        self.counters["tunnels_total"] += 1
+        self.counters["tunnels_active"] += 1
+        # 两个方向共用最后活动时间：单向长时间传输（如下载）不算空闲
+        activity = [time.monotonic()]
+        try:
+            idle = await asyncio.gather(
+                self._pipe(reader, upstream_writer, "bytes_sent", activity),
+                self._pipe(upstream_reader, writer, "bytes_received", activity),
+            )
+            if any(idle):
+                self.counters["tunnels_idle_closed"] += 1
+        finally:
+            self.counters["tunnels_active"] -= 1
+            upstream_writer.close()
+
+    async def _pipe(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, counter: str, activity: List[float]
+    ) -> bool:
+        """单向转发直到EOF或隧道空闲超过tunnel_idle_timeout秒，返回是否因空闲结束"""
+        idle = False
+        try:
+            while True:
+                remaining = activity[0] + self.tunnel_idle_timeout - time.monotonic()
+                if remaining <= 0:
+                    idle = True
+                    break
+                try:
+                    data = await asyncio.wait_for(reader.read(PIPE_BUFFER_SIZE), remaining)
+                except TimeoutError:
+                    continue  # 另一个方向可能仍有数据，重新计算剩余时间
+                if not data:
+                    break
+                activity[0] = time.monotonic()
+                writer.write(data)
+                self.counters[counter] += len(data)
+                await writer.drain()
+        except (OSError, asyncio.CancelledError):
+            pass
+        finally:
+            if writer.can_write_eof() and not writer.is_closing():
+                try:
+                    writer.write_eof()
+                except OSError:
+                    pass
+            if idle:
+                writer.close()
+        return idle
+
+    async def _handle_http(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request_line: str, headers: Headers
+    ):
+        """处理普通HTTP请求，客户端与上游两侧均保持长连接"""
+        while True:
+            method, target, version = request_line.split(" ", 2)
+            if target.startswith("/"):
+                await self._handle_local(writer, target)
+                return
+
+            parsed = urllib.parse.urlsplit(target)
+            host, port = parsed.hostname or "", parsed.port or 80
+            route = await self._route_for(host, port, "http")
+            self.counters["http_requests_total"] += 1
+
+            # 经HTTP代理时保留绝对URI，连接按上游代理复用；否则按目标复用
+            if route == ROUTE_HTTP_PROXY:
+                pool_key: tuple = (route,)
+                request_target = target
+            else:
+                pool_key = (route, host, port)
+                request_target = urllib.parse.urlunsplit(("", "", parsed.path or "/", parsed.query, ""))
+
+            forwarded = _end_to_end(headers)
+            request_head = f"{method} {request_target} {version}\r\n"
+            request_head += "".join(f"{name}: {value}\r\n" for name, value in forwarded)
+            request_head += "Connection: keep-alive\r\n\r\n"
+
+            has_body = _header(headers, "content-length") not in (None, "0") or _header(headers, "transfer-encoding")
+            upstream = self.upstream_pool.get(pool_key)
+            pooled = False
+            try:
+                try:
+                    while True:
+                        reused = upstream is not None
+                        if reused:
+                            self.counters["upstream_reused_total"] += 1
+                        elif route == ROUTE_HTTP_PROXY:
+                            upstream = await self._open_upstream_proxy(self.manager.proxy_config["http"])
+                        else:
+                            route, upstream = await self._open_routed(route, host, port, "http")
+                            pool_key = (route, host, port)
+                        upstream_reader, upstream_writer = upstream
+
+                        upstream_writer.write(request_head.encode("latin-1"))
+                        sent, _ = await _relay_body(reader, upstream_writer, headers, until_eof=False)
+                        self.counters["bytes_sent"] += len(request_head) + sent
+                        await upstream_writer.drain()
+
+                        response_head = await _read_head(upstream_reader)
+                        if response_head is not None:
+                            break
+                        upstream_writer.close()
+                        # 复用的连接可能已被上游关闭，无请求体时换新连接重试一次
+                        if not reused or has_body:
+                            raise ProxyError(f"上游在响应前关闭连接: {host}:{port}")
+                        upstream = None
+
+                    status_line, response_headers = _parse_head(response_head)
+                    upstream_version, status = _parse_status(status_line)
+                except ProxyError:
+                    # 还没有向客户端写出任何响应，可以返回502
+                    writer.write(BAD_GATEWAY)
+                    await writer.drain()
+                    raise
+
+                no_body = method.upper() == "HEAD" or status in (204, 304) or 100 <= status < 200
+                framed = no_body or _header(response_headers, "content-length") is not None or (
+                    "chunked" in (_header(response_headers, "transfer-encoding") or "").lower()
+                )
+                upstream_close = _wants_close(upstream_version, response_headers)
+                close_client = _wants_close(version, headers) or upstream_close or not framed
+
+                client_head = status_line + "\r\n"
+                client_head += "".join(f"{name}: {value}\r\n" for name, value in _end_to_end(response_headers))
+                if close_client:
+                    client_head += "Connection: close\r\n"
+                elif version == "HTTP/1.0":
+                    client_head += "Connection: keep-alive\r\n"
+                client_head += "\r\n"
+                writer.write(client_head.encode("latin-1"))
+
+                if no_body:
+                    received, reusable = 0, True
+                else:
+                    received, reusable = await _relay_body(upstream_reader, writer, response_headers, until_eof=True)
+                await writer.drain()
+                self.counters["bytes_received"] += len(client_head) + received
+
+                if reusable and not upstream_close:
+                    self.upstream_pool.put(pool_key, upstream_reader, upstream_writer)
+                    pooled = True
+            finally:
+                # 转发中途出错（含客户端断开）时关闭上游连接，不放回连接池
+                if upstream is not None and not pooled:
+                    upstream[1].close()
+
+            if close_client or not reusable:
+                return
+
+            head = await asyncio.wait_for(_read_head(reader), self.idle_timeout)
+            if head is None:
+                return
+            request_line, headers = _parse_head(head)
+
+    async def _handle_local(self, writer: asyncio.StreamWriter, target: str):
+        """本地统计接口"""
+        if target.split("?", 1)[0] == STATS_PATH:
+            body = json.dumps(self.stats(), ensure_ascii=False).encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+                + body
+            )
+        else:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+
+    # ---- 统计 ----
+
+    def stats(self) -> Dict[str, object]:
+        """吞吐与延迟计数"""
+        uptime = max(time.time() - self.started_at, 1e-9)
+        return {
+            "listen": f"{self.host}:{self.port}",
+            "uptime_seconds": round(uptime, 1),
+            **self.counters,
+            "upstream_idle_connections": self.upstream_pool.idle_count(),
+            "throughput_bytes_per_second": round((self.counters["bytes_sent"] + self.counters["bytes_received"]) / uptime, 1),
+            "connect_latency_ms": {
+                route: {
+                    "count": stats["count"],
+                    "avg": round(stats["sum_ms"] / stats["count"], 2) if stats["count"] else None,
+                    "max": round(stats["max_ms"], 2),
+                }
+                for route, stats in self.connect_latency.items()
+            },
+        }
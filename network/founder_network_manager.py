@@ -6,23 +6,62 @@ Founder智能网络管理系统
 
 import os
 import sys
+import math
+import ipaddress
+import signal
+import threading
 import time
-import subprocess
-import requests
-from typing import Dict, List, Optional, Tuple
+import urllib.parse
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 命令行调用时，常驻进程在运行则直接交给它执行，不加载下面的依赖
+if __name__ == "__main__":
+    from network.control import forward_cli
+    _exit_code = forward_cli(sys.argv[1:])
+    if _exit_code is not None:
+        sys.exit(_exit_code)
+
+from monitor.gateway_restart import GatewayRestartOrchestrator
+from monitor.logging_pipeline import pipeline_stats, setup_logging
+from monitor.metrics import GatewayMetrics, MetricsServer, get_registry
+from monitor.process_tracker import GATEWAY_PROCESS_PATTERN
+from monitor.timeseries import TimeSeriesStore
+from network.adaptive_router import AdaptiveRouter
+from network.control import (
+    DAEMON_COMMANDS, ControlClient, ControlError, DaemonNotRunning, command_args, print_command_result
+)
+from network.control_server import ControlServer
+from network.domain_index import DomainSuffixIndex
+from network.forward_proxy import STATS_PATH, ForwardProxy
+from network.health_snapshot import HealthSnapshotCache
+from network.http_pool import get_pool_manager
+from network.ip_ranges import IPRangeTable
+from network.probe_engine import ProbeEngine
+from network.proxy_router import DEFAULT_PROXY_CONFIG, ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY, ProxyRouter
+from network.rule_loader import RuleSetLoader
+
 
 class FounderNetworkManager:
     """Founder智能网络管理器"""
     
     def __init__(self):
+        # 日志（JSON Lines文件 + 控制台，经队列异步写入，与健康监控共用日志配置）
+        self.log_file = Path.home() / ".openclaw" / "workspace" / "logs" / "founder_network.jsonl"
+        self.logger = setup_logging("FounderNetworkManager", "network", filename=self.log_file, console=True)
+        
         # 代理配置
-        self.proxy_config = {
-            "http": "http://127.0.0.1:4780",
-            "https": "http://127.0.0.1:4780",
-            "socks5": "socks5://127.0.0.1:4781"
-        }
+        self.proxy_config = dict(DEFAULT_PROXY_CONFIG)
+        
+        # 共享连接池与DNS缓存（与健康监控共用）
+        self.http_pool = get_pool_manager(self.proxy_config)
+        self.resolver = self.http_pool.resolver
         
         # 国内网站列表（直连）
         self.domestic_sites = [
@@ -38,10 +77,80 @@ class FounderNetworkManager:
             "stackoverflow.com", "medium.com", "aws.amazon.com"
         ]
         
+        # 编译后的域名后缀索引（修改站点列表后需调用compile_site_rules）
+        self.site_index = self.compile_site_rules()
+        
+        # 外部规则文件（direct.txt直连，proxy.txt走代理），修改后自动热加载
+        self.rules_dir = Path.home() / ".openclaw" / "network_rules"
+        self.rule_loader = RuleSetLoader()
+        self._load_rule_files()
+        
+        # IP网段路由（可选）：域名未命中任何规则时解析IP，按网段表分类
+        self.ip_routing_enabled = False
+        self.ip_table = IPRangeTable()
+        
+        # 连接测试站点
+        self.domestic_test_sites = [
+            ("百度", "https://www.baidu.com"),
+            ("淘宝", "https://www.taobao.com"),
+            ("腾讯", "https://www.qq.com")
+        ]
+        self.international_test_sites = [
+            ("Google", "https://www.google.com"),
+            ("GitHub", "https://www.github.com"),
+            ("Telegram API", "https://api.telegram.org")
+        ]
+        self.gateway_status_url = "http://localhost:18789/status"
+        self.gateway_restarter = GatewayRestartOrchestrator(
+            start_command=["openclaw", "gateway", "--port", "18789", "--verbose"],
+            status_url=self.gateway_status_url,
+            process_pattern=GATEWAY_PROCESS_PATTERN,
+            log_path=Path.home() / ".openclaw" / "workspace" / "logs" / "gateway.log",
+            http_pool=self.http_pool
+        )
+        
+        # 请求级代理路由（不修改os.environ）
+        self.router = ProxyRouter(self.proxy_config, self.smart_proxy_for_url)
+        
+        # 自适应路由（默认关闭，enable_adaptive_routing或命令行--adaptive开启后按实测延迟选择路由）
+        # 转发代理自己实现SOCKS5，三条路由都可选；连接池探测只有装了aiohttp-socks才能走SOCKS5
+        self.adaptive_router = AdaptiveRouter(routes=(ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY))
+        self.pool_routes = (ROUTE_DIRECT, ROUTE_HTTP_PROXY)
+        if self.http_pool.supports_socks5:
+            self.pool_routes += (ROUTE_SOCKS5_PROXY,)
+        
+        # 并发探测引擎（单探测10秒，整体15秒截止），结果反馈给自适应路由
+        self.probe_engine = ProbeEngine(
+            probe_timeout=10,
+            overall_timeout=15,
+            pool=self.http_pool,
+            observer=self._record_probe_result
+        )
+        
         # 状态跟踪
         self.current_proxy_state = None  # "on", "off", "auto"
         self.last_switch_time = None
-        self.network_log = []
+        self.network_log = deque(maxlen=100)  # 最近事件（含详情），完整历史写入时间序列
+        self.started_at = time.time()
+        self.control_server = None
+        self.timeseries = TimeSeriesStore(Path.home() / ".openclaw" / "workspace" / "timeseries")
+        
+        # 指标（与健康监控共用注册表）：每个(站点, 路由)的探测延迟直方图与结果计数，槽位首次探测时分配
+        self.metrics = get_registry()
+        self.metrics_host = "127.0.0.1"
+        self.metrics_port = 9465
+        self.metrics_server = None
+        self._probe_latency = self.metrics.histogram(
+            "founder_network_probe_latency_seconds", "连接探测延迟（成功的探测）", ("site", "route")
+        )
+        self._probe_total = self.metrics.counter("founder_network_probes", "连接探测次数", ("site", "route", "result"))
+        self._probe_metrics: Dict[Tuple[str, str], tuple] = {}
+        self.gateway_metrics = GatewayMetrics(self.metrics, urllib.parse.urlsplit(self.gateway_status_url).netloc)
+        
+        # 健康快照：后台按间隔执行health_check，状态报告直接渲染最近一次结果
+        self.health_refresh_interval = 60
+        self.health_cache = HealthSnapshotCache(self.health_check, interval=self.health_refresh_interval)
+        self._report_cache: Tuple[Optional[Dict], str] = (None, "")
     
     def detect_proxy_state(self) -> str:
         """检测当前代理状态"""
@@ -58,9 +167,9 @@ class FounderNetworkManager:
             return "unknown"
     
     def set_proxy_on(self) -> bool:
-        """启用代理"""
+        """启用代理（运维手动切换，修改进程环境变量）"""
         try:
-            print("🌐 启用代理...")
+            self.logger.info("启用代理...")
             
             # 设置环境变量
             os.environ["http_proxy"] = self.proxy_config["http"]
@@ -76,18 +185,18 @@ class FounderNetworkManager:
             # 记录日志
             self._log_network_event("proxy_on", "代理已启用")
             
-            print(f"✅ 代理已启用: {self.proxy_config['http']}")
+            self.logger.info(f"代理已启用: {self.proxy_config['http']}")
             return True
             
         except Exception as e:
-            print(f"❌ 启用代理失败: {e}")
+            self.logger.error(f"启用代理失败: {e}")
             self._log_network_event("proxy_on_error", str(e))
             return False
     
     def set_proxy_off(self) -> bool:
-        """关闭代理"""
+        """关闭代理（运维手动切换，修改进程环境变量）"""
         try:
-            print("🌐 关闭代理...")
+            self.logger.info("关闭代理...")
             
             # 清除环境变量
             os.environ.pop("http_proxy", None)
@@ -103,31 +212,100 @@ class FounderNetworkManager:
             # 记录日志
             self._log_network_event("proxy_off", "代理已关闭")
             
-            print("✅ 代理已关闭")
+            self.logger.info("代理已关闭")
             return True
             
         except Exception as e:
-            print(f"❌ 关闭代理失败: {e}")
+            self.logger.error(f"关闭代理失败: {e}")
             self._log_network_event("proxy_off_error", str(e))
             return False
     
+    def compile_site_rules(self) -> DomainSuffixIndex:
+        """把国内/国外站点列表编译为域名后缀索引"""
+        index = DomainSuffixIndex()
+        # 后加入的覆盖先加入的，同一后缀同时出现时国内优先
+        index.update((site, "on") for site in self.international_sites)
+        index.update((site, "off") for site in self.domestic_sites)
+        self.site_index = index
+        return index
+    
+    def _load_rule_files(self):
+        """加载规则目录中的规则文件"""
+        loaded = False
+        for file_name, decision in (("direct.txt", "off"), ("proxy.txt", "on")):
+            rule_file = self.rules_dir / file_name
+            if rule_file.exists():
+                try:
+                    self.rule_loader.add_file(rule_file, decision)
+                    loaded = True
+                except Exception as e:
+                    self.logger.warning(f"加载规则文件失败 {rule_file}: {e}")
+        if loaded:
+            self.rule_loader.start()
+    
+    def load_rule_file(self, path: str, decision: str):
+        """加载外部规则文件，decision为命中时的代理判定（"on"/"off"）"""
+        self.rule_loader.add_file(path, decision)
+        self.rule_loader.start()
+    
+    def prefetch_dns(self) -> Dict[str, List[str]]:
+        """预解析站点列表与测试站点的域名"""
+        hosts = list(self.domestic_sites) + list(self.international_sites)
+        for _, url in self.domestic_test_sites + self.international_test_sites:
+            hosts.append(urllib.parse.urlparse(url).hostname)
+        return self.http_pool.prefetch_dns(hosts)
+    
+    def load_ip_ranges(self, path: str, decision: str, enable: bool = True) -> int:
+        """加载网段文件（每行一个CIDR或"起始IP-结束IP"），返回加载的网段数"""
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                network = line.split("#", 1)[0].strip()
+                if network:
+                    self.ip_table.add(network, decision)
+                    count += 1
+        self.ip_table.compile()
+        if enable:
+            self.ip_routing_enabled = True
+        return count
+    
+    def _classify_ip(self, ip: str) -> Optional[str]:
+        """按外部规则、网段表判断IP"""
+        decision = self.rule_loader.lookup(ip)
+        if decision is None:
+            decision = self.ip_table.lookup(ip)
+        return decision
+    
+    def _decide_host(self, host: str) -> Optional[str]:
+        """按外部规则、内置站点列表、IP网段的顺序判断主机名"""
+        decision = self.rule_loader.lookup(host)
+        if decision is None:
+            decision = self.site_index.lookup(host)
+        if decision is not None or not host:
+            return decision
+        
+        try:
+            ipaddress.ip_address(host)
+            return self.ip_table.lookup(host)  # IP字面量直接查网段表
+        except ValueError:
+            pass
+        
+        if self.ip_routing_enabled:
+            for ip in self.resolver.resolve(host):
+                decision = self._classify_ip(ip)
+                if decision is not None:
+                    break
+        return decision
+    
     def smart_proxy_for_url(self, url: str) -> str:
         """智能判断URL是否需要代理"""
-        import urllib.parse
-        
         try:
-            parsed = urllib.parse.urlparse(url)
-            domain = parsed.netloc.lower()
-            
-            # 检查是否国内网站
-            for domestic in self.domestic_sites:
-                if domestic in domain:
-                    return "off"  # 国内网站，关闭代理
+            host = urllib.parse.urlparse(url).hostname or ""
             
-            # 检查是否国外网站
-            for international in self.international_sites:
-                if international in domain:
-                    return "on"  # 国外网站，启用代理
+            # 国内网站关闭代理，国外网站启用代理
+            decision = self._decide_host(host)
+            if decision is not None:
+                return decision
             
             # 默认根据当前状态
             return self.current_proxy_state or "auto"
@@ -135,192 +313,198 @@ class FounderNetworkManager:
         except:
             return "auto"
     
+    def route_many(self, urls: List[str]) -> List[str]:
+        """批量判断URL是否需要代理"""
+        hosts = []
+        for url in urls:
+            try:
+                hosts.append(urllib.parse.urlparse(url).hostname or "")
+            except ValueError:
+                hosts.append("")
+        
+        default = self.current_proxy_state or "auto"
+        return [self._decide_host(host) or default for host in hosts]
+    
+    def enable_adaptive_routing(self, enabled: bool = True):
+        """启用/关闭自适应路由"""
+        self.router.adaptive = self.adaptive_router if enabled else None
+    
+    def _record_probe_result(self, result: Dict[str, any]):
+        """探测结果反馈给自适应路由，并写入时间序列与指标"""
+        if result.get("route"):
+            # 自适应路由只比较建连耗时（与转发代理口径一致）；复用连接没有建连阶段，不计入
+            connect_ms = (result.get("phases") or {}).get("connect_ms")
+            if not result["success"]:
+                self.router.record_result(result["url"], result["route"], 0, False)
+            elif connect_ms is not None:
+                self.router.record_result(result["url"], result["route"], connect_ms, True)
+        host = urllib.parse.urlparse(result["url"]).hostname or result["name"]
+        self.timeseries.append(
+            f"network.probe_latency_ms.{host}",
+            result["latency_ms"] if result["success"] else math.nan
+        )
+        
+        route = result.get("route") or ROUTE_DIRECT
+        slots = self._probe_metrics.get((host, route))
+        if slots is None:
+            slots = self._probe_metrics[(host, route)] = (
+                self._probe_latency.labels(host, route),
+                self._probe_total.labels(host, route, "success"),
+                self._probe_total.labels(host, route, "failure"),
+            )
+        if result["success"]:
+            slots[0].observe(result["latency_ms"] / 1000.0)
+            slots[1].inc()
+        else:
+            slots[2].inc()
+        if result["url"] == self.gateway_status_url:
+            self.gateway_metrics.observe_status(result["latency_ms"] if result["success"] else None)
+            self.gateway_metrics.up.set(1 if result["success"] else 0)
+            if result["success"]:
+                self.gateway_metrics.consecutive_failures.set(0)
+            else:
+                self.gateway_metrics.consecutive_failures.inc()
+    
     def test_connection(self, url: str, timeout: int = 10) -> Tuple[bool, float]:
         """测试连接"""
-        try:
-            start_time = time.time()
-            response = requests.get(url, timeout=timeout)
-            end_time = time.time()
-            
-            latency = round((end_time - start_time) * 1000, 2)  # 毫秒
-            
-            if response.status_code == 200:
-                return True, latency
-            else:
-                return False, latency
-                
-        except Exception as e:
-            return False, 0
+        result = self.probe_engine.run_sync([self._probe(url, url, timeout)])[0]
+        return result["success"], result["latency_ms"]
     
-    def test_domestic_connection(self) -> Dict[str, any]:
-        """测试国内连接"""
-        test_sites = [
-            ("百度", "https://www.baidu.com"),
-            ("淘宝", "https://www.taobao.com"),
-            ("腾讯", "https://www.qq.com")
-        ]
-        
-        results = []
-        
-        # 先确保代理关闭
-        self.set_proxy_off()
-        
-        for name, url in test_sites:
-            success, latency = self.test_connection(url)
-            results.append({
-                "name": name,
-                "url": url,
-                "success": success,
-                "latency_ms": latency,
-                "proxy_state": "off"
-            })
-        
+    def _probe(self, name: str, url: str, timeout: Optional[float] = None) -> Dict[str, any]:
+        """构造探测，按URL在连接池支持的路由中选择"""
+        route = self.router.route_for_url(url, self.pool_routes)
         return {
-            "timestamp": datetime.now().isoformat(),
-            "proxy_state": "off",
-            "results": results
+            "name": name,
+            "url": url,
+            "route": route,
+            "proxy": self.router.proxy_for_route(route),
+            "timeout": timeout
         }
     
-    def test_international_connection(self) -> Dict[str, any]:
-        """测试国际连接"""
-        test_sites = [
-            ("Google", "https://www.google.com"),
-            ("GitHub", "https://www.github.com"),
-            ("Telegram API", "https://api.telegram.org")
-        ]
-        
-        results = []
-        
-        # 先确保代理开启
-        self.set_proxy_on()
-        
-        for name, url in test_sites:
-            success, latency = self.test_connection(url)
-            results.append({
-                "name": name,
-                "url": url,
-                "success": success,
-                "latency_ms": latency,
-                "proxy_state": "on"
-            })
-        
+    def _domestic_probes(self) -> List[Dict[str, any]]:
+        """国内探测"""
+        return [self._probe(name, url) for name, url in self.domestic_test_sites]
+    
+    def _international_probes(self) -> List[Dict[str, any]]:
+        """国际探测"""
+        return [self._probe(name, url) for name, url in self.international_test_sites]
+    
+    def _gateway_probe(self) -> Dict[str, any]:
+        """Gateway探测"""
+        return self._probe("Gateway", self.gateway_status_url, 3)
+    
+    def _connection_test(self, probes: List[Dict[str, any]]) -> Dict[str, any]:
+        """执行一组探测，按探测实际使用的路由报告代理状态
+
+        proxy_state: 全部直连为"off"，全部经代理为"on"，两者都有为"mixed"；
+        routes为各路由的探测数
+        """
+        results = self.probe_engine.run_sync(probes)
+        routes: Dict[str, int] = {}
+        for result in results:
+            route = result.get("route") or ROUTE_DIRECT
+            routes[route] = routes.get(route, 0) + 1
+        if not routes or set(routes) == {ROUTE_DIRECT}:
+            proxy_state = "off"
+        elif ROUTE_DIRECT not in routes:
+            proxy_state = "on"
+        else:
+            proxy_state = "mixed"
         return {
             "timestamp": datetime.now().isoformat(),
-            "proxy_state": "on",
+            "proxy_state": proxy_state,
+            "routes": routes,
             "results": results
         }
     
+    def test_domestic_connection(self) -> Dict[str, any]:
+        """测试国内连接"""
+        return self._connection_test(self._domestic_probes())
+    
+    def test_international_connection(self) -> Dict[str, any]:
+        """测试国际连接"""
+        return self._connection_test(self._international_probes())
+    
     def restart_openclaw(self) -> bool:
         """重启OpenClaw Gateway（防死机措施）"""
         try:
-            print("🔄 重启OpenClaw Gateway...")
-            
-            # 杀死所有Gateway进程
-            subprocess.run(["pkill", "-9", "-f", "openclaw.*gateway"], 
-                         capture_output=True, timeout=10)
-            
-            # 等待进程停止
-            time.sleep(2)
-            
-            # 启动新的Gateway（带代理）
-            gateway_cmd = [
-                "openclaw", "gateway", "--port", "18789", "--verbose"
-            ]
+            self.logger.info("重启OpenClaw Gateway...")
             
             # 设置代理环境
             env = os.environ.copy()
             env["http_proxy"] = self.proxy_config["http"]
             env["https_proxy"] = self.proxy_config["https"]
+            self.gateway_restarter.env = env
             
-            # 在后台启动
-            process = subprocess.Popen(
-                gateway_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env=env
-            )
-            
-            # 等待启动
-            time.sleep(5)
+            # 强制结束旧进程并等待其真正退出，启动后轮询状态接口直到就绪
+            result = self.gateway_restarter.restart(force=True)
+            self.gateway_metrics.record_restart(result["success"], result["duration_s"])
             
-            # 检查是否成功
-            if process.poll() is None:  # 进程还在运行
-                print(f"✅ Gateway启动成功 (PID: {process.pid})")
-                
-                # 测试连接
-                time.sleep(2)
-                success, latency = self.test_connection("http://localhost:18789/status", 5)
-                
-                if success:
-                    print(f"✅ Gateway服务正常 (延迟: {latency}ms)")
-                    self._log_network_event("gateway_restart_success", f"PID: {process.pid}")
-                    return True
-                else:
-                    print("⚠️ Gateway启动但服务不可达")
-                    self._log_network_event("gateway_restart_warning", "服务不可达")
-                    return False
+            if result["success"]:
+                self.logger.info(
+                    f"Gateway服务正常 (PID: {result['pid']}, 重启耗时: {result['duration_s']}s, "
+                    f"延迟: {result['latency_ms']}ms)"
+                )
+                self._log_network_event("gateway_restart_success", f"PID: {result['pid']}, {result['duration_s']}s")
+                return True
             else:
-                print("❌ Gateway启动失败")
-                stdout, stderr = process.communicate()
-                print(f"错误输出: {stderr.decode()[:200]}")
-                self._log_network_event("gateway_restart_failed", stderr.decode()[:100])
+                self.logger.error(f"Gateway启动失败: {result.get('error', '')[:200]}")
+                self._log_network_event("gateway_restart_failed", result.get("error", "")[:100])
                 return False
                 
         except Exception as e:
-            print(f"❌ 重启失败: {e}")
+            self.gateway_metrics.record_restart(False)
+            self.logger.error(f"重启失败: {e}")
             self._log_network_event("gateway_restart_error", str(e))
             return False
     
     def health_check(self) -> Dict[str, any]:
         """全面健康检查"""
-        print("🏥 执行全面健康检查...")
+        self.logger.info("执行全面健康检查...")
         
+        # 检查1: 代理状态
+        proxy_state = self.detect_proxy_state()
         results = {
             "timestamp": datetime.now().isoformat(),
-            "proxy_state": self.detect_proxy_state(),
+            "proxy_state": proxy_state,
             "checks": []
         }
-        
-        # 检查1: 代理状态
-        proxy_state = self.detect_proxy_state()
         results["checks"].append({
             "check": "proxy_state",
             "status": "healthy" if proxy_state in ["on", "off"] else "warning",
             "details": f"当前代理状态: {proxy_state}"
         })
         
-        # 检查2: 国内连接
-        domestic_test = self.test_domestic_connection()
-        domestic_success = all(r["success"] for r in domestic_test["results"])
+        # 检查2-4: 国内连接、国际连接、Gateway状态并发探测
+        domestic_probes = self._domestic_probes()
+        international_probes = self._international_probes()
+        probe_results = self.probe_engine.run_sync(
+            domestic_probes + international_probes + [self._gateway_probe()]
+        )
+        domestic_results = probe_results[:len(domestic_probes)]
+        international_results = probe_results[len(domestic_probes):-1]
+        gateway_result = probe_results[-1]
+        
+        domestic_success = all(r["success"] for r in domestic_results)
         results["checks"].append({
             "check": "domestic_connection",
             "status": "healthy" if domestic_success else "failed",
-            "details": f"国内连接测试: {sum(1 for r in domestic_test['results'] if r['success'])}/{len(domestic_test['results'])} 成功"
+            "details": f"国内连接测试: {sum(1 for r in domestic_results if r['success'])}/{len(domestic_results)} 成功"
         })
         
-        # 检查3: 国际连接
-        international_test = self.test_international_connection()
-        international_success = all(r["success"] for r in international_test["results"])
+        international_success = all(r["success"] for r in international_results)
         results["checks"].append({
             "check": "international_connection",
             "status": "healthy" if international_success else "failed",
-            "details": f"国际连接测试: {sum(1 for r in international_test['results'] if r['success'])}/{len(international_test['results'])} 成功"
+            "details": f"国际连接测试: {sum(1 for r in international_results if r['success'])}/{len(international_results)} 成功"
         })
         
-        # 检查4: Gateway状态
-        try:
-            gateway_success, gateway_latency = self.test_connection("http://localhost:18789/status", 3)
-            results["checks"].append({
-                "check": "gateway_status",
-                "status": "healthy" if gateway_success else "failed",
-                "details": f"Gateway状态: {'运行中' if gateway_success else '不可用'} (延迟: {gateway_latency}ms)"
-            })
-        except:
-            results["checks"].append({
-                "check": "gateway_status",
-                "status": "failed",
-                "details": "Gateway不可用"
-            })
+        gateway_success = gateway_result["success"]
+        results["checks"].append({
+            "check": "gateway_status",
+            "status": "healthy" if gateway_success else "failed",
+            "details": f"Gateway状态: {'运行中' if gateway_success else '不可用'} (延迟: {gateway_result['latency_ms']}ms)"
+        })
         
         # 总结
         healthy_checks = sum(1 for check in results["checks"] if check["status"] == "healthy")
@@ -344,30 +528,160 @@ class FounderNetworkManager:
             "proxy_state": self.current_proxy_state
         }
         self.network_log.append(event)
+        self.timeseries.append(f"network.event.{event_type}", 1.0)
+        self.logger.debug(details, extra={"event": event_type, "proxy_state": self.current_proxy_state})
+    
+    def serve_metrics(self) -> Optional[MetricsServer]:
+        """启动/metrics端点（端口为0或已被占用时不启动）"""
+        if self.metrics_server is not None or not self.metrics_port:
+            return self.metrics_server
+        try:
+            self.metrics_server = MetricsServer(
+                self.metrics, self.metrics_host, self.metrics_port, logger=self.logger
+            ).start()
+        except OSError as e:
+            self.logger.warning(f"指标端点启动失败 ({self.metrics_host}:{self.metrics_port}): {e}")
+        return self.metrics_server
+    
+    def serve_forward_proxy(self, host: str = "127.0.0.1", port: int = 8118):
+        """启动本地转发代理（阻塞直到Ctrl+C）"""
+        proxy = ForwardProxy(self, host=host, port=port)
+        self.serve_metrics()
+        self.health_cache.start()
+        
+        # 在共享连接池的事件循环中运行，与DNS缓存、自适应路由共用状态
+        self.http_pool.run(proxy.start())
+        self.logger.info(f"转发代理已启动: http://{proxy.host}:{proxy.port}")
+        self.logger.info(f"统计接口: http://{proxy.host}:{proxy.port}{STATS_PATH}")
+        self._log_network_event("forward_proxy_start", f"{proxy.host}:{proxy.port}")
         
-        # 保持日志大小
-        if len(self.network_log) > 100:
-            self.network_log = self.network_log[-50:]
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            self.http_pool.run(proxy.stop())
+            self.health_cache.stop()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+                self.metrics_server = None
+            self.logger.info("转发代理已停止")
+    
+    def control_handlers(self) -> Dict[str, Callable[[Dict], any]]:
+        """命令行命令的处理函数（本地执行与常驻进程控制接口共用），返回可JSON序列化的结果"""
+        return {
+            "status": lambda args: {
+                "proxy_state": self.detect_proxy_state(),
+                "last_switch_time": str(self.last_switch_time) if self.last_switch_time else None,
+            },
+            "pon": lambda args: {"success": self.set_proxy_on()},
+            "poff": lambda args: {"success": self.set_proxy_off()},
+            "test": lambda args: {
+                "domestic": self.test_domestic_connection(),
+                "international": self.test_international_connection(),
+            },
+            "restart": lambda args: {"success": self.restart_openclaw()},
+            "health": lambda args: {"report": self.get_status_report(args.get("max_age"))},
+            "events": lambda args: list(self.network_log)[-int(args.get("limit", 20)):],
+            "stats": lambda args: self.daemon_stats(),
+        }
     
-    def get_status_report(self) -> str:
-        """获取状态报告"""
-        health = self.health_check()
+    def daemon_stats(self) -> Dict[str, any]:
+        """常驻进程运行统计"""
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "proxy_state": self.current_proxy_state,
+            "control": self.control_server.stats() if self.control_server is not None else None,
+            "health_cache": self.health_cache.stats(),
+            "rules": self.rule_loader.stats(),  # 各规则文件的规则数与内存占用，用于估算进程内存
+            "metrics": self.metrics_server.url if self.metrics_server is not None else None,
+            "logging": pipeline_stats("FounderNetworkManager"),
+        }
+    
+    def run_daemon(self, socket_path=None):
+        """常驻模式：在Unix域套接字上提供控制接口，后台刷新健康快照（阻塞直到stop命令、SIGTERM或Ctrl+C）"""
+        stop_event = threading.Event()
+        handlers = self.control_handlers()
+        handlers["stop"] = lambda args: stop_event.set() or {"stopping": True}
+        self.control_server = ControlServer(handlers, socket_path, logger=self.logger)
+        
+        # 控制接口运行在共享连接池的事件循环中，命令在线程池中执行
+        self.http_pool.run(self.control_server.start())
+        self.health_cache.start()
+        self.serve_metrics()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+        self.logger.info(f"网络管理常驻进程已启动 (PID {os.getpid()})，控制接口: {self.control_server.socket_path}")
+        self._log_network_event("daemon_start", str(self.control_server.socket_path))
+        
+        try:
+            stop_event.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.http_pool.run(self.control_server.stop())
+            self.health_cache.stop()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+                self.metrics_server = None
+            self.timeseries.flush()
+            self.logger.info("网络管理常驻进程已停止")
+    
+    def get_health(self, max_age: Optional[float] = None) -> Dict[str, any]:
+        """最近一次健康检查结果（超过max_age秒时先刷新），附带数据年龄与是否过期"""
+        return self.health_cache.get(max_age)
+    
+    def get_status_report(self, max_age: Optional[float] = None) -> str:
+        """获取状态报告（由健康快照渲染，不重新探测；快照超过max_age秒时先刷新）"""
+        cached = self.health_cache.get(max_age)
+        health = cached["snapshot"]
+        
+        # 同一快照的报告正文只渲染一次，之后只更新数据年龄
+        snapshot, body = self._report_cache
+        if snapshot is not health:
+            body = ""
+            for check in health["checks"]:
+                emoji = "✅" if check["status"] == "healthy" else "⚠️" if check["status"] == "warning" else "❌"
+                body += f"{emoji} **{check['check']}**: {check['details']}\n"
+            
+            body += f"\n## 🏆 总结\n"
+            body += f"**健康检查**: {health['summary']['healthy_checks']}/{health['summary']['total_checks']} 通过\n"
+            body += f"**健康度**: {health['summary']['health_percentage']}%\n"
+            body += f"**总体状态**: {health['summary']['overall_status']}\n"
+            self._report_cache = (health, body)
         
         report = f"# 🌐 Founder网络状态报告\n\n"
         report += f"**时间**: {health['timestamp']}\n"
+        report += f"**数据年龄**: {cached['age_seconds']}秒"
+        report += " ⚠️ 已过期\n" if cached["stale"] else "\n"
         report += f"**代理状态**: {health['proxy_state']}\n\n"
-        
         report += "## 📊 检查结果\n"
-        for check in health["checks"]:
-            emoji = "✅" if check["status"] == "healthy" else "⚠️" if check["status"] == "warning" else "❌"
-            report += f"{emoji} **{check['check']}**: {check['details']}\n"
-        
-        report += f"\n## 🏆 总结\n"
-        report += f"**健康检查**: {health['summary']['healthy_checks']}/{health['summary']['total_checks']} 通过\n"
-        report += f"**健康度**: {health['summary']['health_percentage']}%\n"
-        report += f"**总体状态**: {health['summary']['overall_status']}\n"
-        
-        return report
+        return report + body
+
+# 网段文件选项及其路由判定（直连/走代理）
+IP_RANGE_OPTIONS = {"--direct-ranges": "off", "--proxy-ranges": "on"}
+
+
+def _split_options(argv: List[str]) -> Tuple[List[str], Dict[str, any]]:
+    """分离命令行中的选项，返回(位置参数, 选项)；未知选项输出用法错误并以退出码2退出"""
+    positional = []
+    options = {"adaptive": False, "ip_ranges": []}  # ip_ranges: [(网段文件, "on"/"off")]
+    args = iter(argv)
+    for arg in args:
+        name, _, value = arg.partition("=")
+        if arg == "--adaptive":
+            options["adaptive"] = True
+        elif name in IP_RANGE_OPTIONS:
+            value = value or next(args, "")
+            if not value:
+                print(f"选项{name}需要网段文件路径", file=sys.stderr)
+                sys.exit(2)
+            options["ip_ranges"].append((value, IP_RANGE_OPTIONS[name]))
+        elif arg.startswith("--"):
+            print(f"未知选项: {arg}", file=sys.stderr)
+            sys.exit(2)
+        else:
+            positional.append(arg)
+    return positional, options
 
 
 def main():
@@ -380,42 +694,59 @@ def main():
         print("  python3 founder_network_manager.py poff      # 关闭代理")
         print("  python3 founder_network_manager.py test      # 测试连接")
         print("  python3 founder_network_manager.py restart   # 重启Gateway")
-        print("  python3 founder_network_manager.py health    # 全面健康检查")
+        print("  python3 founder_network_manager.py health [最大数据年龄秒]  # 全面健康检查")
+        print("  python3 founder_network_manager.py proxy [端口]  # 启动本地智能转发代理（默认8118）")
+        print("  python3 founder_network_manager.py daemon [stop|stats]  # 常驻进程（其余命令自动交给它执行）")
+        print("选项（proxy/daemon）:")
+        print("  --adaptive    # 按实测延迟在直连、HTTP代理、SOCKS5之间自适应选择路由")
+        print("  --direct-ranges 文件 / --proxy-ranges 文件  # 按网段文件把未命中规则的域名解析后分类（可重复）")
         sys.exit(1)
     
-    command = sys.argv[1].lower()
+    argv, options = _split_options(sys.argv[1:])
+    command = argv[0].lower() if argv else ""
+    
+    if command == "daemon" and len(argv) > 1:
+        action = argv[1].lower()
+        try:
+            print_command_result(action, ControlClient().call(action))
+        except DaemonNotRunning:
+            print("常驻进程未运行")
+            sys.exit(1)
+        except (ControlError, OSError) as e:
+            print(f"❌ 常驻进程执行失败: {e}")
+            sys.exit(1)
+        return
+    
     manager = FounderNetworkManager()
+    if command in ("proxy", "daemon"):
+        manager.enable_adaptive_routing(options["adaptive"])
+        for path, decision in options["ip_ranges"]:
+            try:
+                count = manager.load_ip_ranges(path, decision)
+            except (OSError, ValueError) as e:
+                print(f"❌ 加载网段文件失败 ({path}): {e}")
+                sys.exit(1)
+            manager.logger.info(f"已加载网段文件 {path}: {count}个网段 ({decision})")
     
-    if command == "status":
-        state = manager.detect_proxy_state()
-        print(f"🌐 当前代理状态: {state}")
-        print(f"📅 最后切换时间: {manager.last_switch_time}")
-        
-    elif command == "pon":
-        manager.set_proxy_on()
-        
-    elif command == "poff":
-        manager.set_proxy_off()
-        
-    elif command == "test":
-        print("测试国内连接...")
-        domestic = manager.test_domestic_connection()
-        for result in domestic["results"]:
-            status = "✅" if result["success"] else "❌"
-            print(f"{status} {result['name']}: {result['latency_ms']}ms")
-        
-        print("\n测试国际连接...")
-        international = manager.test_international_connection()
-        for result in international["results"]:
-            status = "✅" if result["success"] else "❌"
-            print(f"{status} {result['name']}: {result['latency_ms']}ms")
+    # 常驻进程未运行：在本进程执行（与常驻进程使用同一组处理函数和输出格式）
+    if command in DAEMON_COMMANDS:
+        try:
+            args = command_args(command, argv[1:])
+        except ValueError as e:
+            print(f"用法错误: {e}", file=sys.stderr)
+            sys.exit(2)
+        print_command_result(command, manager.control_handlers()[command](args))
         
-    elif command == "restart":
-        manager.restart_openclaw()
+    elif command == "proxy":
+        port = int(argv[1]) if len(argv) > 1 else 8118
+        manager.serve_forward_proxy(port=port)
         
-    elif command == "health":
-        report = manager.get_status_report()
-        print(report)
+    elif command == "daemon":
+        try:
+            manager.run_daemon()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
         
     else:
         print(f"未知命令: {command}")
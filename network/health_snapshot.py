@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Founder健康快照缓存
+后台线程按间隔执行健康检查并保存最近一次结果，报告直接读取快照；
+刷新进行中到达的请求等待同一次刷新，不会重复发起检查
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+
+class HealthSnapshotCache:
+    """健康检查结果快照
+
+    - start()后每interval秒刷新一次；未启动时首次get()同步刷新
+    - get(max_age)在快照超过max_age秒时先刷新；刷新失败时沿用旧快照
+    - 同一时刻最多一次刷新，其余调用者共享其结果（single-flight）
+    - 快照超过stale_after秒未更新视为过期
+    """
+
+    def __init__(self, refresh: Callable[[], Dict], interval: float = 60.0, stale_after: Optional[float] = None):
+        self._refresh = refresh
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else interval * 2
+        self._snapshot: Optional[Dict] = None
+        self._updated_at: Optional[float] = None  # time.monotonic()
+        self._inflight: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._prober: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.refreshes = 0
+        self.shared_refreshes = 0
+        self.last_error: Optional[str] = None
+        self.last_refresh_seconds: Optional[float] = None
+
+    def refresh(self) -> Dict:
+        """刷新快照并返回；已有刷新进行中时等待它的结果"""
+        with self._lock:
+            future = self._inflight
+            owner = future is None
+            if owner:
+                future = self._inflight = Future()
+            else:
+                self.shared_refreshes += 1
+        if not owner:
+            return future.result()
+
+        start = time.monotonic()
+        try:
+            snapshot = self._refresh()
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            with self._lock:
+                self._inflight = None
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._snapshot = snapshot
+            self._updated_at = time.monotonic()
+            self._inflight = None
+            self.refreshes += 1
+            self.last_error = None
+            self.last_refresh_seconds = round(self._updated_at - start, 3)
+        future.set_result(snapshot)
+        return snapshot
+
+    def age(self) -> Optional[float]:
+        """快照年龄（秒），尚无快照时为None"""
+        updated_at = self._updated_at
+        return time.monotonic() - updated_at if updated_at is not None else None
+
+    def get(self, max_age: Optional[float] = None) -> Dict:
+        """返回快照及其年龄：{"snapshot", "age_seconds", "stale", "refreshing"}"""
+        age = self.age()
+        if age is None or (max_age is not None and age > max_age):
+            try:
+                self.refresh()
+            except Exception:
+                if self._snapshot is None:
+                    raise
+            age = self.age()
+        return {
+            "snapshot": self._snapshot,
+            "age_seconds": round(age, 1),
+            "stale": age > self.stale_after,
+            "refreshing": self._inflight is not None,
+        }
+
+    def start(self):
+        """启动后台刷新线程"""
+        if self._prober is not None:
+            return
+        self._stop_event.clear()
+        self._prober = threading.Thread(target=self._probe_loop, name="FounderHealthProber", daemon=True)
+        self._prober.start()
+
+    def stop(self):
+        """停止后台刷新线程（进行中的检查完成后退出）"""
+        self._stop_event.set()
+        if self._prober is not None:
+            self._prober.join(timeout=1)
+            self._prober = None
+
+    @property
+    def running(self) -> bool:
+        return self._prober is not None
+
+    def _probe_loop(self):
+        while True:
+            age = self.age()
+            if age is None or age >= self.interval:
+                try:
+                    self.refresh()
+                except Exception:
+                    pass  # 错误记录在last_error中，报告继续使用旧快照
+                age = self.age()
+            # 期间有按需刷新时从那次刷新起算；刷新失败时等待一个完整间隔再试
+            delay = self.interval - age if age is not None and age < self.interval else self.interval
+            if self._stop_event.wait(delay):
+                break
+
+    def stats(self) -> Dict[str, object]:
+        age = self.age()
+        return {
+            "interval": self.interval,
+            "prober_running": self.running,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "refreshes": self.refreshes,
+            "shared_refreshes": self.shared_refreshes,
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "last_error": self.last_error,
+        }
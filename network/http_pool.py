@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Founder共享HTTP连接池
+按路由（直连 / HTTP代理 / SOCKS5代理）维护长连接池，供网络管理与健康监控共用
+"""
+
+import asyncio
+import contextvars
+import json
+import ssl
+import threading
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+import aiohttp
+
+from network.dns_resolver import AiohttpResolver, AsyncResolverCache
+from network.proxy_router import DEFAULT_PROXY_CONFIG, ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY
+
+try:
+    from aiohttp_socks import ProxyConnector
+except ImportError:  # SOCKS5为可选依赖
+    ProxyConnector = None
+
+
+# 当前正在建立连接的请求计时，用于在TLS握手开始时打点
+_connecting_timing: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "_connecting_timing", default=None
+)
+
+
+class _TimedSSLContext(ssl.SSLContext):
+    """在TLS握手开始时记录时间，用于拆分TCP与TLS耗时"""
+
+    def wrap_bio(self, *args, **kwargs):
+        timing = _connecting_timing.get()
+        if timing is not None:
+            timing.setdefault("tls_start", time.perf_counter())
+        return super().wrap_bio(*args, **kwargs)
+
+
+def _create_ssl_context() -> ssl.SSLContext:
+    context = _TimedSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_default_certs()
+    return context
+
+
+async def _on_request_start(session, ctx, params):
+    ctx.trace_request_ctx["start"] = time.perf_counter()
+
+
+async def _on_dns_start(session, ctx, params):
+    ctx.trace_request_ctx["dns_start"] = time.perf_counter()
+
+
+async def _on_dns_end(session, ctx, params):
+    ctx.trace_request_ctx["dns_end"] = time.perf_counter()
+
+
+async def _on_connection_create_start(session, ctx, params):
+    ctx.trace_request_ctx["connect_start"] = time.perf_counter()
+    _connecting_timing.set(ctx.trace_request_ctx)
+
+
+async def _on_connection_create_end(session, ctx, params):
+    ctx.trace_request_ctx["connect_end"] = time.perf_counter()
+    _connecting_timing.set(None)
+
+
+async def _on_connection_reuse(session, ctx, params):
+    ctx.trace_request_ctx["reused"] = True
+
+
+async def _on_headers_sent(session, ctx, params):
+    ctx.trace_request_ctx["sent"] = time.perf_counter()
+
+
+async def _on_request_end(session, ctx, params):
+    ctx.trace_request_ctx["first_byte"] = time.perf_counter()
+
+
+def _create_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_dns_resolvehost_start.append(_on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_end)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuse)
+    trace_config.on_request_headers_sent.append(_on_headers_sent)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
+
+
+def _ms(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000, 2)
+
+
+def split_phases(timing: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """把打点拆分为DNS、TCP连接、TLS握手、首字节四个阶段（毫秒）
+
+    经代理时connect_ms包含到代理的TCP连接与CONNECT隧道建立，
+    可据此区分代理慢还是源站慢。复用连接时各建连阶段为None。
+    """
+    connect_start = timing.get("connect_start")
+    connect_end = timing.get("connect_end")
+    tls_start = timing.get("tls_start")
+    dns_ms = _ms(timing.get("dns_start"), timing.get("dns_end"))
+
+    connect_ms = _ms(connect_start, tls_start or connect_end)
+    if connect_ms is not None and dns_ms is not None:
+        connect_ms = round(max(connect_ms - dns_ms, 0.0), 2)
+
+    return {
+        "dns_ms": dns_ms,
+        "connect_ms": connect_ms,
+        "tls_ms": _ms(tls_start, connect_end),
+        "ttfb_ms": _ms(timing.get("sent"), timing.get("first_byte")),
+    }
+
+
+class HttpPoolManager:
+    """按路由划分的共享连接池管理器
+
+    连接池运行在独立的后台事件循环线程中，异步调用方通过submit()、
+    同步调用方通过run()使用同一组连接。每条路由的连接数有上限，
+    空闲连接由keepalive_timeout回收，长时间不用的路由整体关闭。
+    """
+
+    def __init__(
+        self,
+        proxy_config: Optional[Dict[str, str]] = None,
+        pool_size: int = 32,
+        per_host_limit: int = 8,
+        keepalive_timeout: float = 30.0,
+        idle_timeout: float = 300.0,
+        resolver: Optional[AsyncResolverCache] = None,
+    ):
+        self.proxy_config = proxy_config or dict(DEFAULT_PROXY_CONFIG)
+        self.resolver = resolver or AsyncResolverCache()
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.idle_timeout = idle_timeout
+
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._last_used: Dict[str, float] = {}
+        self._ssl_context = _create_ssl_context()
+        self._trace_config = _create_trace_config()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._evictor: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    # ---- 事件循环 ----
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台事件循环，首次访问时启动"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run_loop, name="FounderHttpPool", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._evictor = self._loop.create_task(self._evict_idle_sessions())
+        self._loop.run_forever()
+
+    async def submit(self, coro: Awaitable) -> Any:
+        """在连接池事件循环中执行协程（供异步调用方使用）"""
+        loop = self.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """在连接池事件循环中执行协程并等待结果（供同步调用方使用）"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("不能在连接池事件循环线程中同步等待")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    # ---- 连接池 ----
+
+    @property
+    def supports_socks5(self) -> bool:
+        """是否可以建立SOCKS5连接池（需要aiohttp-socks）"""
+        return ProxyConnector is not None
+
+    def _create_session(self, route: str) -> aiohttp.ClientSession:
+        if route == ROUTE_SOCKS5_PROXY:
+            if ProxyConnector is None:
+                raise RuntimeError("SOCKS5连接池需要安装aiohttp-socks")
+            connector = ProxyConnector.from_url(
+                self.proxy_config["socks5"],
+                limit=self.pool_size,
+                limit_per_host=self.per_host_limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ssl=self._ssl_context,
+            )
+        else:
+            # 使用共享的DNS缓存，DNS耗时与建连耗时分开统计
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.per_host_limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ssl=self._ssl_context,
+                resolver=AiohttpResolver(self.resolver),
+                use_dns_cache=False,
+            )
+        return aiohttp.ClientSession(connector=connector, trust_env=False, trace_configs=[self._trace_config])
+
+    def session(self, route: str) -> aiohttp.ClientSession:
+        """获取路由对应的会话（必须在连接池事件循环中调用）"""
+        session = self._sessions.get(route)
+        if session is None or session.closed:
+            session = self._create_session(route)
+            self._sessions[route] = session
+        self._last_used[route] = time.monotonic()
+        return session
+
+    async def _evict_idle_sessions(self):
+        """定期关闭长时间空闲的路由会话"""
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1.0))
+            now = time.monotonic()
+            for route, last_used in list(self._last_used.items()):
+                if now - last_used > self.idle_timeout:
+                    session = self._sessions.pop(route, None)
+                    self._last_used.pop(route, None)
+                    if session is not None:
+                        await session.close()
+
+    async def _fetch(self, url: str, route: str, timeout: float) -> Dict[str, Any]:
+        proxy = self.proxy_config["http"] if route == ROUTE_HTTP_PROXY else None
+        timing: Dict[str, Any] = {"reused": False}
+
+        start_time = time.perf_counter()
+        async with asyncio.timeout(timeout):
+            async with self.session(route).get(url, proxy=proxy, trace_request_ctx=timing) as response:
+                await response.read()
+        latency = round((time.perf_counter() - start_time) * 1000, 2)
+
+        return {
+            "status_code": response.status,
+            "latency_ms": latency,
+            "reused_connection": timing["reused"],
+            "phases": split_phases(timing),
+        }
+
+    async def fetch(self, url: str, route: str = ROUTE_DIRECT, timeout: float = 10.0) -> Dict[str, Any]:
+        """GET请求，返回状态码、总延迟及分阶段耗时；失败时抛出异常"""
+        return await self.submit(self._fetch(url, route, timeout))
+
+    def fetch_sync(self, url: str, route: str = ROUTE_DIRECT, timeout: float = 10.0) -> Dict[str, Any]:
+        """fetch的同步版本"""
+        return self.run(self._fetch(url, route, timeout))
+
+    async def _post_json(self, url: str, payload: Any, route: str, timeout: float) -> Dict[str, Any]:
+        proxy = self.proxy_config["http"] if route == ROUTE_HTTP_PROXY else None
+        start_time = time.perf_counter()
+        async with asyncio.timeout(timeout):
+            request = self.session(route).post(url, json=payload, proxy=proxy, trace_request_ctx={"reused": False})
+            async with request as response:
+                body = await response.read()
+        latency = round((time.perf_counter() - start_time) * 1000, 2)
+
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        return {
+            "status_code": response.status,
+            "latency_ms": latency,
+            "headers": dict(response.headers),
+            "json": data,
+        }
+
+    async def post_json(self, url: str, payload: Any, route: str = ROUTE_DIRECT, timeout: float = 10.0) -> Dict[str, Any]:
+        """POST JSON请求，返回状态码、延迟、响应头与解析后的JSON响应体；网络错误时抛出异常"""
+        return await self.submit(self._post_json(url, payload, route, timeout))
+
+    def prefetch_dns(self, hosts) -> Dict[str, Any]:
+        """预解析主机名，结果进入共享DNS缓存"""
+        return self.run(self.resolver.prefetch(hosts))
+
+    def stats(self) -> Dict[str, Any]:
+        """各路由连接池概况"""
+        return {
+            route: {
+                "closed": session.closed,
+                "idle_seconds": round(time.monotonic() - self._last_used.get(route, time.monotonic()), 1),
+            }
+            for route, session in self._sessions.items()
+        }
+
+    async def _close(self):
+        if self._evictor is not None:
+            self._evictor.cancel()
+            try:
+                await self._evictor
+            except asyncio.CancelledError:
+                pass
+            self._evictor = None
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+        self._last_used.clear()
+
+    def close(self):
+        """关闭全部连接池并停止后台事件循环"""
+        if self._loop is None:
+            return
+        self.run(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        if not self._thread.is_alive():
+            self._loop.close()
+        self._loop = None
+        self._thread = None
+
+
+_shared_pools: Dict[tuple, HttpPoolManager] = {}
+_shared_pools_lock = threading.Lock()
+
+
+def get_pool_manager(proxy_config: Optional[Dict[str, str]] = None) -> HttpPoolManager:
+    """获取进程内共享的连接池管理器（相同代理配置共用一个）"""
+    proxy_config = proxy_config or DEFAULT_PROXY_CONFIG
+    key = tuple(sorted(proxy_config.items()))
+    with _shared_pools_lock:
+        if key not in _shared_pools:
+            _shared_pools[key] = HttpPoolManager(dict(proxy_config))
+        return _shared_pools[key]
+
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Founder IP网段路由表
+把CIDR网段编译为按起始地址排序的整数区间，存放在array缓冲区中，用二分查找分类IP
+"""
+
+import ipaddress
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_U64_MASK = (1 << 64) - 1
+
+
+class _U128View:
+    """把高低两个64位数组视为128位整数序列，供bisect使用"""
+
+    def __init__(self, high: array, low: array):
+        self.high = high
+        self.low = low
+
+    def __len__(self) -> int:
+        return len(self.high)
+
+    def __getitem__(self, index: int) -> int:
+        return (self.high[index] << 64) | self.low[index]
+
+
+def _merge_ranges(ranges: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """把可能嵌套/重叠的区间展开为互不重叠的有序区间
+
+    重叠部分以起始地址更大（更具体）的区间为准，相邻且取值相同的区间合并。
+    """
+    merged: List[Tuple[int, int, int]] = []
+
+    def emit(start: int, end: int, value: int):
+        if start > end:
+            return
+        if merged and merged[-1][2] == value and merged[-1][1] + 1 == start:
+            merged[-1] = (merged[-1][0], end, value)
+        else:
+            merged.append((start, end, value))
+
+    stack: List[List[int]] = []  # [当前游标, 结束地址, 取值]
+
+    def close_top():
+        cursor, end, value = stack.pop()
+        emit(cursor, end, value)
+        if stack:
+            # 游标可能已越过结束地址（内层区间超出了本区间），外层从两者中更靠后的位置继续
+            stack[-1][0] = max(stack[-1][0], cursor, end + 1)
+
+    for start, end, value in sorted(ranges, key=lambda r: (r[0], -r[1])):
+        while stack and stack[-1][1] < start:
+            close_top()
+        if stack:
+            emit(stack[-1][0], start - 1, stack[-1][2])
+            stack[-1][0] = start
+        stack.append([start, end, value])
+    while stack:
+        close_top()
+    return merged
+
+
+class IPRangeTable:
+    """IP区间表
+
+    IPv4每个区间占用9字节（起止地址各4字节、取值1字节），
+    数十万网段只需几MB内存。add()后需调用compile()才能生效。
+    """
+
+    def __init__(self):
+        self._values: List[str] = []
+        self._value_ids: Dict[str, int] = {}
+        self._pending: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+
+        self._v4_starts = array("I")
+        self._v4_ends = array("I")
+        self._v4_values = array("B")
+        self._v6_starts = _U128View(array("Q"), array("Q"))
+        self._v6_ends = _U128View(array("Q"), array("Q"))
+        self._v6_values = array("B")
+
+    def __len__(self) -> int:
+        return len(self._v4_starts) + len(self._v6_starts)
+
+    def add(self, network: str, value: str):
+        """添加网段（CIDR、单个IP或"起始IP-结束IP"）"""
+        if value not in self._value_ids:
+            if len(self._values) >= 255:
+                raise ValueError("区间表最多支持255种取值")
+            self._value_ids[value] = len(self._values)
+            self._values.append(value)
+        value_id = self._value_ids[value]
+
+        if "-" in network:
+            first, last = (ipaddress.ip_address(part.strip()) for part in network.split("-", 1))
+            if first.version != last.version or int(first) > int(last):
+                raise ValueError(f"无效的地址区间: {network}")
+            self._pending[first.version].append((int(first), int(last), value_id))
+        else:
+            net = ipaddress.ip_network(network.strip(), strict=False)
+            self._pending[net.version].append(
+                (int(net.network_address), int(net.broadcast_address), value_id)
+            )
+
+    def update(self, networks: Iterable[Tuple[str, str]]):
+        """批量添加网段"""
+        for network, value in networks:
+            self.add(network, value)
+
+    def compile(self):
+        """合并已编译区间与新添加的网段，重建查找数组"""
+        v4 = _merge_ranges(self._ranges(4) + self._pending[4])
+        v6 = _merge_ranges(self._ranges(6) + self._pending[6])
+        self._pending = {4: [], 6: []}
+
+        self._v4_starts = array("I", (r[0] for r in v4))
+        self._v4_ends = array("I", (r[1] for r in v4))
+        self._v4_values = array("B", (r[2] for r in v4))
+        self._v6_starts = _U128View(array("Q", (r[0] >> 64 for r in v6)), array("Q", (r[0] & _U64_MASK for r in v6)))
+        self._v6_ends = _U128View(array("Q", (r[1] >> 64 for r in v6)), array("Q", (r[1] & _U64_MASK for r in v6)))
+        self._v6_values = array("B", (r[2] for r in v6))
+
+    def _ranges(self, version: int) -> List[Tuple[int, int, int]]:
+        if version == 4:
+            return list(zip(self._v4_starts, self._v4_ends, self._v4_values))
+        return [(self._v6_starts[i], self._v6_ends[i], self._v6_values[i]) for i in range(len(self._v6_starts))]
+
+    def lookup(self, ip: str) -> Optional[str]:
+        """返回IP所在网段的取值，不在任何网段或不是IP时返回None"""
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        value = int(addr)
+        if addr.version == 4:
+            starts, ends, values = self._v4_starts, self._v4_ends, self._v4_values
+        else:
+            starts, ends, values = self._v6_starts, self._v6_ends, self._v6_values
+        index = bisect_right(starts, value) - 1
+        if index >= 0 and value <= ends[index]:
+            return self._values[values[index]]
+        return None
+
+    def contains(self, ip: str) -> bool:
+        return self.lookup(ip) is not None
+
+    def memory_bytes(self) -> int:
+        """区间数组占用的字节数"""
+        buffers = (
+            self._v4_starts, self._v4_ends, self._v4_values,
+            self._v6_starts.high, self._v6_starts.low,
+            self._v6_ends.high, self._v6_ends.low, self._v6_values,
+        )
+        return sum(buf.itemsize * len(buf) for buf in buffers)
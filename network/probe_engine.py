@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Founder并发探测引擎
+基于asyncio/aiohttp并发执行连接探测，带单探测与整体截止时间
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from network.http_pool import HttpPoolManager, get_pool_manager
+from network.proxy_router import ROUTE_DIRECT
+
+
+class ProbeEngine:
+    """并发探测引擎
+
+    每个探测是一个字典: {"name", "url", "route", "proxy", "timeout"}，
+    route决定使用哪一个连接池（直连/HTTP代理/SOCKS5），不读取环境变量，
+    直连与代理探测可同时进行。所有探测同时发出，整体耗时约等于最慢的单个探测。
+    """
+
+    def __init__(
+        self,
+        probe_timeout: float = 10.0,
+        overall_timeout: float = 15.0,
+        pool: Optional[HttpPoolManager] = None,
+        observer: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.probe_timeout = probe_timeout
+        self.overall_timeout = overall_timeout
+        self.pool = pool or get_pool_manager()
+        self.observer = observer  # 每个探测结果的回调，例如反馈给自适应路由
+
+    async def probe(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """执行单个探测（复用连接池中对应路由的长连接）"""
+        timeout = spec.get("timeout") or self.probe_timeout
+        try:
+            response = await self.pool.fetch(spec["url"], spec.get("route") or ROUTE_DIRECT, timeout)
+            return self._result(
+                spec,
+                response["status_code"] == 200,
+                response["latency_ms"],
+                status_code=response["status_code"],
+                phases=response["phases"],
+                reused_connection=response["reused_connection"],
+            )
+        except TimeoutError:
+            return self._result(spec, False, 0, error="timeout")
+        except Exception as e:
+            return self._result(spec, False, 0, error=str(e) or type(e).__name__)
+
+    async def run(self, probes: List[Dict[str, Any]], overall_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """并发执行全部探测，超过整体截止时间的探测记为超时"""
+        overall_timeout = overall_timeout or self.overall_timeout
+
+        tasks = [asyncio.create_task(self.probe(spec)) for spec in probes]
+        done, pending = await asyncio.wait(tasks, timeout=overall_timeout)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for spec, task in zip(probes, tasks):
+            if task in done and not task.cancelled():
+                results.append(task.result())
+            else:
+                results.append(self._result(spec, False, 0, error="deadline exceeded"))
+        if self.observer is not None:
+            for result in results:
+                self.observer(result)
+        return results
+
+    def run_sync(self, probes: List[Dict[str, Any]], overall_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """同步接口，供现有同步方法调用"""
+        return self.pool.run(self.run(probes, overall_timeout))
+
+    @staticmethod
+    def _result(spec: Dict[str, Any], success: bool, latency: float, **extra) -> Dict[str, Any]:
+        result = {
+            "name": spec.get("name", spec["url"]),
+            "url": spec["url"],
+            "success": success,
+            "latency_ms": latency,
+            "route": spec.get("route"),
+            "proxy_state": "on" if spec.get("proxy") else "off",
+            "timestamp": datetime.now().isoformat(),
+        }
+        result.update(extra)
+        return result
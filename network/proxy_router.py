@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Founder请求级代理路由
+为每个请求单独选择代理或直连，不修改进程级环境变量
+"""
+
+import urllib.parse
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 默认本地代理配置
+DEFAULT_PROXY_CONFIG = {
+    "http": "http://127.0.0.1:4780",
+    "https": "http://127.0.0.1:4780",
+    "socks5": "socks5://127.0.0.1:4781",
+}
+
+# 路由名称
+ROUTE_DIRECT = "direct"
+ROUTE_HTTP_PROXY = "http_proxy"
+ROUTE_SOCKS5_PROXY = "socks5_proxy"
+
+
+class ProxyRouter:
+    """请求级代理路由器
+
+    decide为URL到代理状态("on"/"off"/"auto")的判定函数，
+    通常是FounderNetworkManager.smart_proxy_for_url。
+    """
+
+    def __init__(
+        self,
+        proxy_config: Dict[str, str],
+        decide: Callable[[str], str],
+        no_proxy_hosts: Optional[set] = None,
+        default_route: str = ROUTE_DIRECT,
+        adaptive=None,
+    ):
+        self.proxy_config = proxy_config
+        self.decide = decide
+        self.no_proxy_hosts = no_proxy_hosts or {"localhost", "127.0.0.1", "::1"}
+        self.default_route = default_route
+        self.adaptive = adaptive  # 可选的AdaptiveRouter
+
+    def static_route_for_url(self, url: str) -> str:
+        """只按规则返回URL应走的路由"""
+        state = self.decide(url)
+        if state == "on":
+            return ROUTE_HTTP_PROXY
+        if state == "off":
+            return ROUTE_DIRECT
+        return self.default_route
+
+    def route_for_url(self, url: str, routes: Optional[Sequence[str]] = None) -> str:
+        """返回URL应走的路由，启用自适应路由时以规则结果为先验，在routes（默认全部路由）中选择"""
+        host = (urllib.parse.urlparse(url).hostname or "").lower()
+        if host in self.no_proxy_hosts:
+            return ROUTE_DIRECT
+
+        route = self.static_route_for_url(url)
+        if self.adaptive is not None:
+            route = self.adaptive.choose(host, route, routes)
+        return route
+
+    def exploration_targets(self, url: str, route: str) -> List[str]:
+        """返回需要为URL所在域名后台探测的路由，未启用自适应路由时为空"""
+        if self.adaptive is None:
+            return []
+        host = (urllib.parse.urlparse(url).hostname or "").lower()
+        if not host or host in self.no_proxy_hosts:
+            return []
+        return self.adaptive.exploration_targets(host, route)
+
+    def fallback_route(self, url: str, route: str) -> Optional[str]:
+        """自适应路由选出的route连接失败时改走的路由（静态规则的结果），无需重试时返回None"""
+        if self.adaptive is None:
+            return None
+        host = (urllib.parse.urlparse(url).hostname or "").lower()
+        if host in self.no_proxy_hosts:
+            return None
+        fallback = self.static_route_for_url(url)
+        return fallback if fallback != route else None
+
+    def record_result(self, url: str, route: str, latency_ms: float, success: bool):
+        """把请求结果反馈给自适应路由"""
+        if self.adaptive is None:
+            return
+        host = (urllib.parse.urlparse(url).hostname or "").lower()
+        if host and host not in self.no_proxy_hosts:
+            self.adaptive.record(host, route, latency_ms, success)
+
+    def proxy_for_route(self, route: str) -> Optional[str]:
+        """返回路由对应的代理地址，直连返回None"""
+        if route == ROUTE_HTTP_PROXY:
+            return self.proxy_config["http"]
+        if route == ROUTE_SOCKS5_PROXY:
+            return self.proxy_config["socks5"]
+        return None
+
+    def proxy_for_url(self, url: str) -> Optional[str]:
+        """返回URL应使用的代理地址，直连返回None"""
+        return self.proxy_for_route(self.route_for_url(url))
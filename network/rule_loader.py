@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Founder路由规则加载器
+从文件加载域名列表、CIDR列表和通配符规则，编译为紧凑索引，文件变化时热加载
+"""
+
+import fnmatch
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from network.domain_index import DomainSuffixIndex, normalize_host
+from network.ip_ranges import IPRangeTable
+
+
+class CompiledRuleSet:
+    """单个规则文件编译后的只读索引"""
+
+    def __init__(self, path: Path, value: str, mtime: float):
+        self.path = path
+        self.value = value
+        self.mtime = mtime
+        self.domains = DomainSuffixIndex()
+        self.networks = IPRangeTable()
+        self.pattern: Optional[re.Pattern] = None
+        self.pattern_count = 0
+        self.compile_seconds = 0.0
+
+    @classmethod
+    def compile(cls, path: Path, value: str) -> "CompiledRuleSet":
+        """读取并编译规则文件
+
+        每行一条规则，#开头为注释：
+          example.com       域名及其子域名
+          *.example.com     仅子域名
+          cdn-*.example.com 通配符（fnmatch语法）
+          10.0.0.0/8        CIDR网段（也可以是单个IP或"起始IP-结束IP"）
+        """
+        start = time.perf_counter()
+        rule_set = cls(path, value, path.stat().st_mtime)
+        patterns: List[str] = []
+        domains: List[Tuple[str, str]] = []
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                rule = line.split("#", 1)[0].strip()
+                if not rule:
+                    continue
+                if rule[0].isdigit() or ":" in rule:
+                    try:
+                        rule_set.networks.add(rule, value)
+                        continue
+                    except ValueError:
+                        pass
+                body = rule[2:] if rule.startswith("*.") else rule
+                if "*" in body or "?" in body or "[" in body:
+                    patterns.append(fnmatch.translate(normalize_host(rule)))
+                else:
+                    domains.append((rule, value))
+
+        rule_set.domains.update(domains)
+        rule_set.networks.compile()
+        if patterns:
+            rule_set.pattern = re.compile("|".join(patterns))
+            rule_set.pattern_count = len(patterns)
+        rule_set.compile_seconds = time.perf_counter() - start
+        return rule_set
+
+    @property
+    def rule_count(self) -> int:
+        return len(self.domains) + len(self.networks) + self.pattern_count
+
+    def lookup(self, host: str) -> Optional[str]:
+        """返回命中的规则值，未命中返回None"""
+        if self.networks and self.networks.contains(host):
+            return self.value
+        if self.domains.lookup(host) is not None:
+            return self.value
+        if self.pattern is not None and self.pattern.match(normalize_host(host)):
+            return self.value
+        return None
+
+    def memory_bytes(self) -> int:
+        total = self.domains.memory_bytes() + self.networks.memory_bytes()
+        if self.pattern is not None:
+            total += sys.getsizeof(self.pattern.pattern)
+        return total
+
+    def stats(self) -> Dict[str, object]:
+        memory = self.memory_bytes()
+        return {
+            "path": str(self.path),
+            "value": self.value,
+            "domains": len(self.domains),
+            "networks": len(self.networks),
+            "patterns": self.pattern_count,
+            "memory_bytes": memory,
+            "bytes_per_rule": round(memory / self.rule_count, 1) if self.rule_count else 0,
+            "compile_ms": round(self.compile_seconds * 1000, 2),
+        }
+
+
+class RuleSetLoader:
+    """规则文件热加载器
+
+    后台线程按mtime检测文件变化，新规则在后台编译完成后整体替换，
+    查找始终读取当前快照，不会因加载而阻塞。按文件添加顺序匹配，先命中者优先。
+    """
+
+    def __init__(self, check_interval: float = 2.0):
+        self.check_interval = check_interval
+        self._sources: List[Tuple[Path, str]] = []
+        self._rule_sets: Tuple[CompiledRuleSet, ...] = ()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.reload_count = 0
+        self.last_error: Optional[str] = None
+
+    def add_file(self, path, value: str) -> CompiledRuleSet:
+        """添加规则文件，value为命中时的代理判定（"on"/"off"）"""
+        path = Path(path)
+        rule_set = CompiledRuleSet.compile(path, value)
+        with self._reload_lock:
+            self._sources.append((path, value))
+            self._rule_sets = self._rule_sets + (rule_set,)
+        return rule_set
+
+    def reload_if_changed(self) -> bool:
+        """检查文件mtime，有变化的文件重新编译后原子替换快照"""
+        with self._reload_lock:
+            current = self._rule_sets
+            updated = list(current)
+            changed = False
+            for i, rule_set in enumerate(current):
+                try:
+                    mtime = rule_set.path.stat().st_mtime
+                    if mtime != rule_set.mtime:
+                        updated[i] = CompiledRuleSet.compile(rule_set.path, rule_set.value)
+                        changed = True
+                except (OSError, UnicodeDecodeError) as e:
+                    # 文件暂时不可读时保留旧规则
+                    self.last_error = f"{rule_set.path}: {e}"
+            if changed:
+                self._rule_sets = tuple(updated)
+                self.reload_count += 1
+            return changed
+
+    def lookup(self, host: str) -> Optional[str]:
+        """返回主机名（或IP）命中的规则值，未命中返回None"""
+        for rule_set in self._rule_sets:
+            value = rule_set.lookup(host)
+            if value is not None:
+                return value
+        return None
+
+    def start(self):
+        """启动后台热加载线程"""
+        if self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="FounderRuleReloader", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        """停止后台热加载线程"""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.check_interval + 1)
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stop_event.wait(self.check_interval):
+            self.reload_if_changed()
+
+    def stats(self) -> List[Dict[str, object]]:
+        """各规则文件的规则数、内存占用与编译耗时"""
+        return [rule_set.stats() for rule_set in self._rule_sets]
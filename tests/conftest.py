@@ -0,0 +1,34 @@
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+# 与各模块相同：把项目根目录加入路径，测试中使用 monitor.x / network.x 导入
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class FakeClock:
+    """手动推进的时钟，替换time.monotonic或作为clock参数传入"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def free_port() -> int:
+    """一个当前空闲的本地TCP端口"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
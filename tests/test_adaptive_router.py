@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from network import adaptive_router
+from network.adaptive_router import AdaptiveRouter
+from network.proxy_router import ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY
+
+ROUTES = (ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY)
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    monkeypatch.setattr(adaptive_router.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+def make_router(clock, **kwargs):
+    kwargs.setdefault("explore_rate", 0.0)
+    return AdaptiveRouter(routes=ROUTES, rng=random.Random(1), **kwargs), clock
+
+
+def warm_up(router, domain, latencies):
+    """每条路由记录min_samples个样本"""
+    for route, latency in latencies.items():
+        for _ in range(router.min_samples):
+            router.record(domain, route, latency, True)
+
+
+def test_unsampled_routes_keep_the_preferred_route(clock):
+    router, _ = make_router(clock, min_samples=2)
+    assert router.choose("example.com", ROUTE_HTTP_PROXY) == ROUTE_HTTP_PROXY
+
+    # 其余路由只有一个样本，真实流量仍走首选路由，不足的路由交给后台探测
+    router.record("example.com", ROUTE_DIRECT, 5, True)
+    assert router.choose("example.com", ROUTE_HTTP_PROXY) == ROUTE_HTTP_PROXY
+    assert router.exploration_targets("example.com", ROUTE_HTTP_PROXY) == [ROUTE_DIRECT, ROUTE_SOCKS5_PROXY]
+
+
+def test_exploration_is_claimed_once_until_recorded(clock):
+    router, clock = make_router(clock, probe_timeout=30)
+    router.choose("example.com", ROUTE_DIRECT)
+    assert router.exploration_targets("example.com", ROUTE_DIRECT) == [ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY]
+    # 并发的请求不会重复探测
+    assert router.exploration_targets("example.com", ROUTE_DIRECT) == []
+
+    router.record("example.com", ROUTE_HTTP_PROXY, 40, True)
+    assert router.exploration_targets("example.com", ROUTE_DIRECT) == [ROUTE_HTTP_PROXY]
+
+    # 结果一直没有回来的探测超时后重新登记
+    clock.now += 31
+    assert router.exploration_targets("example.com", ROUTE_DIRECT) == [ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY]
+
+
+def test_fastest_route_wins_after_exploration(clock):
+    router, _ = make_router(clock)
+    warm_up(router, "example.com", {ROUTE_DIRECT: 300, ROUTE_HTTP_PROXY: 40, ROUTE_SOCKS5_PROXY: 90})
+    assert router.choose("example.com", ROUTE_DIRECT) == ROUTE_HTTP_PROXY
+
+
+def test_failing_route_is_avoided(clock):
+    router, _ = make_router(clock)
+    warm_up(router, "example.com", {ROUTE_DIRECT: 20, ROUTE_HTTP_PROXY: 80, ROUTE_SOCKS5_PROXY: 90})
+    for _ in range(20):
+        router.record("example.com", ROUTE_DIRECT, 0, False)
+    assert router.choose("example.com", ROUTE_DIRECT) == ROUTE_HTTP_PROXY
+
+
+def test_random_exploration_only_targets_background_probes(clock):
+    router, _ = make_router(clock, explore_rate=1.0)
+    warm_up(router, "example.com", {ROUTE_DIRECT: 10, ROUTE_HTTP_PROXY: 500, ROUTE_SOCKS5_PROXY: 500})
+    assert {router.choose("example.com", ROUTE_DIRECT) for _ in range(100)} == {ROUTE_DIRECT}
+
+    explored = set()
+    for _ in range(100):
+        targets = router.exploration_targets("example.com", ROUTE_DIRECT)
+        assert len(targets) == 1
+        explored.update(targets)
+        router.record("example.com", targets[0], 500, True)
+    assert explored == {ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY}
+
+
+def test_stale_route_is_re_explored_in_background(clock):
+    router, clock = make_router(clock, stale_after=600)
+    warm_up(router, "example.com", {ROUTE_DIRECT: 500, ROUTE_HTTP_PROXY: 10, ROUTE_SOCKS5_PROXY: 500})
+    assert router.choose("example.com", ROUTE_DIRECT) == ROUTE_HTTP_PROXY
+
+    # 只有HTTP代理持续有新样本，其余路由的统计过时后只做后台探测
+    clock.now += 601
+    router.record("example.com", ROUTE_HTTP_PROXY, 10, True)
+    assert router.choose("example.com", ROUTE_DIRECT) == ROUTE_HTTP_PROXY
+    assert router.exploration_targets("example.com", ROUTE_HTTP_PROXY) == [ROUTE_DIRECT, ROUTE_SOCKS5_PROXY]
+    # 直连刷新后不再需要探测，SOCKS5的探测仍在进行中
+    router.record("example.com", ROUTE_DIRECT, 500, True)
+    assert router.exploration_targets("example.com", ROUTE_HTTP_PROXY) == []
+
+
+def test_domains_are_bounded_lru(clock):
+    router, _ = make_router(clock, max_domains=3)
+    for name in ("a.test", "b.test", "c.test"):
+        router.record(name, ROUTE_DIRECT, 10, True)
+    router.choose("a.test")  # 访问后a.test变为最近使用
+    router.record("d.test", ROUTE_DIRECT, 10, True)
+
+    assert len(router) == 3
+    assert set(router.snapshot()) == {"a.test", "c.test", "d.test"}
+
+
+def test_unknown_route_is_ignored(clock):
+    router, _ = make_router(clock)
+    router.record("example.com", "carrier_pigeon", 10, True)
+    assert len(router) == 0
+
+
+def test_callers_can_restrict_candidate_routes(clock):
+    router, _ = make_router(clock)
+    warm_up(router, "example.com", {ROUTE_DIRECT: 300, ROUTE_HTTP_PROXY: 200, ROUTE_SOCKS5_PROXY: 10})
+    # 转发代理可以走SOCKS5，连接池探测（没有aiohttp-socks时）不行
+    assert router.choose("example.com", ROUTE_DIRECT) == ROUTE_SOCKS5_PROXY
+    pool_routes = (ROUTE_DIRECT, ROUTE_HTTP_PROXY)
+    assert router.choose("example.com", ROUTE_DIRECT, pool_routes) == ROUTE_HTTP_PROXY
+
+    router.choose("new.example.com", ROUTE_DIRECT)
+    assert router.exploration_targets("new.example.com", ROUTE_DIRECT, pool_routes) == [ROUTE_HTTP_PROXY]
+    assert router.exploration_targets("new.example.com", ROUTE_DIRECT) == [ROUTE_SOCKS5_PROXY]
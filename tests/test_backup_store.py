@@ -0,0 +1,113 @@
+import pytest
+
+from monitor import backup_store
+from monitor.backup_store import BackupStore
+
+
+def object_files(root):
+    return sorted(path.name for path in (root / "objects").rglob("*") if path.is_file())
+
+
+def test_identical_content_is_deduplicated(tmp_path):
+    store = BackupStore(tmp_path)
+    first, created = store.snapshot(b'{"a": 1}')
+    assert created
+    assert store.snapshot(b'{"a": 1}') == (first, False)
+
+    store.snapshot(b'{"a": 2}')
+    third, created = store.snapshot(b'{"a": 1}')
+    # 与最新版本不同则新建版本，但和第一个版本共用同一个对象
+    assert created and third["hash"] == first["hash"]
+    assert [entry["id"] for entry in store.entries()] == [1, 2, 3]
+    assert len(object_files(tmp_path)) == 2
+    assert store.read(third) == b'{"a": 1}'
+
+
+def test_retention_keeps_last_known_good(tmp_path):
+    store = BackupStore(tmp_path, max_versions=3)
+    good, _ = store.snapshot(b"v0")
+    store.mark_good(good)
+    for i in range(1, 6):
+        store.snapshot(f"v{i}".encode())
+
+    assert [entry["id"] for entry in store.entries()] == [4, 5, 6]
+    # v1、v2的对象被删除，最后已知正常的v0保留
+    assert len(object_files(tmp_path)) == 4
+    assert store.read(store.last_known_good()) == b"v0"
+
+
+@pytest.mark.parametrize("codec", ["zst", "gz"])
+def test_codec_round_trip(tmp_path, monkeypatch, codec):
+    if codec == "zst":
+        pytest.importorskip("zstandard")
+    else:
+        monkeypatch.setattr(backup_store, "zstandard", None)
+    store = BackupStore(tmp_path)
+    assert store.codec == codec
+    entry, _ = store.snapshot(b"x" * 10000)
+    assert object_files(tmp_path) == [f"{entry['hash']}.{codec}"]
+    assert store.read(entry) == b"x" * 10000
+    with store.open(entry) as f:
+        assert f.read() == b"x" * 10000
+
+
+def test_gzip_objects_readable_after_switching_codec(tmp_path, monkeypatch):
+    pytest.importorskip("zstandard")
+    monkeypatch.setattr(backup_store, "zstandard", None)
+    old, _ = BackupStore(tmp_path).snapshot(b"old")
+    monkeypatch.undo()
+
+    store = BackupStore(tmp_path)
+    assert store.codec == "zst"
+    # 内容相同时复用已有的gzip对象
+    _, created = store.snapshot(b"new")
+    entry, created = store.snapshot(b"old")
+    assert created and entry["codec"] == "gz"
+    assert store.read(old) == b"old"
+
+
+def test_last_known_good_survives_reopen(tmp_path):
+    store = BackupStore(tmp_path)
+    assert store.last_known_good() is None
+    first, _ = store.snapshot(b"first")
+    store.snapshot(b"second")
+    store.mark_good(first)
+
+    reopened = BackupStore(tmp_path)
+    assert reopened.last_known_good()["id"] == first["id"]
+    assert reopened.read(reopened.last_known_good()) == b"first"
+    assert [entry["id"] for entry in reopened.entries()] == [1, 2]
+
+
+def test_snapshots_append_to_log_until_compaction(tmp_path):
+    store = BackupStore(tmp_path, compact_every=3)
+    store.snapshot(b"a")
+    store.snapshot(b"b")
+    assert not (tmp_path / "index.json").exists()
+    assert len((tmp_path / "index.log").read_text().splitlines()) == 2
+
+    store.snapshot(b"c")
+    assert (tmp_path / "index.json").exists()
+    assert (tmp_path / "index.log").read_text() == ""
+    store.snapshot(b"d")
+    assert [entry["id"] for entry in BackupStore(tmp_path).entries()] == [1, 2, 3, 4]
+
+
+def test_log_replay_skips_compacted_records_and_torn_tail(tmp_path):
+    store = BackupStore(tmp_path)
+    first, _ = store.snapshot(b"a")
+    store.mark_good(first)
+    log = (tmp_path / "index.log").read_bytes()
+    store.compact()
+    second, _ = store.snapshot(b"b")
+    store.mark_good(second)
+
+    # 模拟压缩后清空日志之前崩溃（旧记录仍在），且最后一条记录只写了一半
+    (tmp_path / "index.log").write_bytes(log + (tmp_path / "index.log").read_bytes() + b'{"seq": 9, "op"')
+    reopened = BackupStore(tmp_path)
+    assert [entry["id"] for entry in reopened.entries()] == [1, 2]
+    assert reopened.last_known_good()["id"] == second["id"]
+
+    # 打开时已压缩，后续追加不受残缺行影响
+    reopened.snapshot(b"c")
+    assert [entry["id"] for entry in BackupStore(tmp_path).entries()] == [1, 2, 3]
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+
+import pytest
+
+from monitor.config_watcher import ConfigWatcher
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+        self.event = threading.Event()
+
+    def __call__(self, path):
+        self.calls.append(path)
+        self.event.set()
+
+
+def replace_atomically(path, text):
+    """编辑器式保存：写临时文件再rename"""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watch(request, tmp_path):
+    watchers = []
+
+    def start(path, callback, **kwargs):
+        watcher = ConfigWatcher(
+            path, callback, debounce=0.2, poll_interval=0.05, use_inotify=request.param == "inotify", **kwargs
+        )
+        watcher.start()
+        watchers.append(watcher)
+        if request.param == "inotify" and watcher.mode != "inotify":
+            pytest.skip("inotify不可用")
+        assert watcher.mode == request.param
+        return watcher
+
+    yield start
+    for watcher in watchers:
+        watcher.stop()
+
+
+def test_rapid_writes_are_debounced_into_one_callback(tmp_path, watch):
+    path = tmp_path / "openclaw.json"
+    path.write_text("{}")
+    recorder = Recorder()
+    watcher = watch(path, recorder)
+
+    for i in range(5):
+        replace_atomically(path, '{"n": %d}' % i)
+        time.sleep(0.02)
+    assert recorder.event.wait(5)
+    time.sleep(0.4)
+    assert recorder.calls == [path]
+    assert watcher.changes == 1
+
+
+def test_in_place_write_and_delete_are_detected(tmp_path, watch):
+    path = tmp_path / "openclaw.json"
+    path.write_text("{}")
+    recorder = Recorder()
+    watch(path, recorder)
+
+    path.write_text('{"port": 18789}')
+    assert recorder.event.wait(5)
+    recorder.event.clear()
+    path.unlink()
+    assert recorder.event.wait(5)
+    assert len(recorder.calls) == 2
+
+
+def test_other_files_in_directory_are_ignored(tmp_path, watch):
+    path = tmp_path / "openclaw.json"
+    path.write_text("{}")
+    recorder = Recorder()
+    watch(path, recorder)
+
+    (tmp_path / "other.json").write_text("{}")
+    assert not recorder.event.wait(0.5)
+
+
+def test_callback_errors_do_not_stop_watching(tmp_path, watch):
+    path = tmp_path / "openclaw.json"
+    path.write_text("{}")
+    calls = []
+
+    def failing(changed):
+        calls.append(changed)
+        raise RuntimeError("boom")
+
+    watcher = watch(path, failing)
+    path.write_text("[1]")
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.02)
+    path.write_text("[1, 2]")
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(calls) == 2
+    assert watcher.changes == 2
+
+
+def test_stop_is_prompt(tmp_path):
+    watcher = ConfigWatcher(tmp_path / "openclaw.json", lambda path: None, poll_interval=30)
+    watcher.start()
+    started = time.monotonic()
+    watcher.stop()
+    assert time.monotonic() - started < 1
+    assert watcher._thread is None
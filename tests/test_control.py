@@ -0,0 +1,108 @@
+import asyncio
+import json
+import socket
+import threading
+
+import pytest
+
+from network.control import ControlClient, ControlError, DaemonNotRunning, command_args, forward_cli
+from network.control_server import ControlServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    """在后台事件循环中运行的控制接口服务端"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    calls = []
+
+    def failing(args):
+        raise RuntimeError("探测失败")
+
+    handlers = {
+        "echo": lambda args: calls.append(args) or {"args": args},
+        "fail": failing,
+        "health": lambda args: {"report": f"max_age={args.get('max_age')}"},
+    }
+    instance = ControlServer(handlers, tmp_path / "c.sock")
+    asyncio.run_coroutine_threadsafe(instance.start(), loop).result(5)
+    instance.calls = calls
+    yield instance
+    asyncio.run_coroutine_threadsafe(instance.stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def raw_request(path, payload: bytes):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(str(path))
+        sock.sendall(payload)
+        buffer = b""
+        while not buffer.endswith(b"\n"):
+            buffer += sock.recv(65536)
+    return json.loads(buffer)
+
+
+def test_round_trip(server):
+    result = ControlClient(server.socket_path, timeout=5).call("echo", limit=3, name="测试")
+    assert result == {"args": {"limit": 3, "name": "测试"}}
+    assert server.calls == [{"limit": 3, "name": "测试"}]
+    assert server.stats()["requests_total"] == 1
+
+
+def test_handler_errors_are_reported(server):
+    client = ControlClient(server.socket_path, timeout=5)
+    with pytest.raises(ControlError, match="探测失败"):
+        client.call("fail")
+    with pytest.raises(ControlError, match="未知命令"):
+        client.call("nope")
+    assert server.stats()["errors_total"] == 2
+
+
+@pytest.mark.parametrize("payload", [b"not json\n", b"[1, 2]\n", b'"status"\n', b'{"args": {}}\n',
+                                     b'{"command": "echo", "args": [1]}\n', b'{"command": ["x"]}\n'])
+def test_malformed_request(server, payload):
+    assert raw_request(server.socket_path, payload) == {"ok": False, "error": "无效请求"}
+    assert server.calls == []
+    # 连接仍然可用
+    assert ControlClient(server.socket_path, timeout=5).call("echo") == {"args": {}}
+
+
+def test_missing_daemon(tmp_path):
+    with pytest.raises(DaemonNotRunning):
+        ControlClient(tmp_path / "missing.sock").call("status")
+    assert forward_cli(["status"], tmp_path / "missing.sock") is None
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = tmp_path / "s.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()  # 套接字文件仍在，但没有进程监听
+
+    server = ControlServer({}, path)
+    server._remove_stale_socket()
+    assert not path.exists()
+
+
+def test_forward_cli_health(server, capsys):
+    assert forward_cli(["health", "30"], server.socket_path) == 0
+    assert capsys.readouterr().out.strip() == "max_age=30.0"
+
+
+@pytest.mark.parametrize("value", ["abc", "-1", "nan", "inf"])
+def test_invalid_health_age_is_a_usage_error(tmp_path, capsys, value):
+    # 参数在连接常驻进程之前校验，常驻进程是否运行都一样
+    assert forward_cli(["health", value], tmp_path / "missing.sock") == 2
+    assert "用法错误" in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        command_args("health", [value])
+
+
+def test_command_args():
+    assert command_args("health", []) == {}
+    assert command_args("health", ["0"]) == {"max_age": 0.0}
+    assert command_args("status", ["ignored"]) == {}
@@ -0,0 +1,175 @@
+import asyncio
+import socket
+import socketserver
+import struct
+import threading
+
+import pytest
+
+from network import dns_resolver
+from network.dns_resolver import (
+    QTYPE_A,
+    QTYPE_AAAA,
+    AsyncResolverCache,
+    TTLResolverCache,
+    read_search_config,
+)
+
+# 桩DNS服务器上的记录：名称 -> {qtype: [(地址, TTL)]}；不在表中的名称返回NXDOMAIN
+RECORDS = {
+    "gw01.corp.test": {QTYPE_A: [("10.0.0.1", 300)]},
+    "api.example.test": {QTYPE_A: [("192.0.2.10", 120)], QTYPE_AAAA: [("2001:db8::10", 60)]},
+    "big.example.test": {QTYPE_A: [(f"192.0.2.{i}", 90) for i in range(1, 41)]},
+    "v4only.example.test": {QTYPE_A: [("192.0.2.20", 300)]},
+}
+TRUNCATE_OVER_UDP = {"big.example.test"}
+DROP_AAAA = {"v4only.example.test"}  # 模拟丢弃AAAA查询的网络
+
+
+def _parse_question(data):
+    offset, labels = 12, []
+    while data[offset]:
+        labels.append(data[offset + 1:offset + 1 + data[offset]].decode())
+        offset += data[offset] + 1
+    qtype = struct.unpack("!H", data[offset + 1:offset + 3])[0]
+    return ".".join(labels), qtype, data[12:offset + 5]
+
+
+def build_answer(query, truncate=False):
+    name, qtype, question = _parse_question(query)
+    records = RECORDS.get(name)
+    rcode = 3 if records is None else 0
+    answers = [] if truncate else (records or {}).get(qtype, [])
+    flags = 0x8180 | rcode | (0x0200 if truncate else 0)
+    packet = query[:2] + struct.pack("!HHHHH", flags, 1, len(answers), 0, 0) + question
+    for address, ttl in answers:
+        family = socket.AF_INET6 if ":" in address else socket.AF_INET
+        rdata = socket.inet_pton(family, address)
+        packet += struct.pack("!HHHIH", 0xC00C, qtype, 1, ttl, len(rdata)) + rdata
+    return packet
+
+
+class StubDns:
+    def __init__(self):
+        self.udp_queries = []
+        self.tcp_queries = []
+        stub = self
+
+        class UdpHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                data, sock = self.request
+                name, qtype, _ = _parse_question(data)
+                stub.udp_queries.append(name)
+                if qtype == QTYPE_AAAA and name in DROP_AAAA:
+                    return
+                sock.sendto(build_answer(data, truncate=name in TRUNCATE_OVER_UDP), self.client_address)
+
+        class TcpHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                length = struct.unpack("!H", self.request.recv(2))[0]
+                data = self.request.recv(length)
+                stub.tcp_queries.append(_parse_question(data)[0])
+                answer = build_answer(data)
+                self.request.sendall(struct.pack("!H", len(answer)) + answer)
+
+        self.udp = socketserver.ThreadingUDPServer(("127.0.0.1", 0), UdpHandler)
+        self.port = self.udp.server_address[1]
+        self.tcp = socketserver.ThreadingTCPServer(("127.0.0.1", self.port), TcpHandler)
+        for server in (self.udp, self.tcp):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def close(self):
+        for server in (self.udp, self.tcp):
+            server.shutdown()
+            server.server_close()
+
+
+@pytest.fixture
+def stub_dns():
+    try:
+        stub = StubDns()
+    except OSError:
+        pytest.skip("无法在同一端口上启动UDP/TCP桩服务")
+    yield stub
+    stub.close()
+
+
+def make_resolver(cls, stub, **kwargs):
+    resolver = cls(nameservers=["127.0.0.1"], port=stub.port, search=["corp.test"], ndots=1, **kwargs)
+    resolver.hosts = {}
+    return resolver
+
+
+def test_read_search_config(tmp_path):
+    conf = tmp_path / "resolv.conf"
+    conf.write_text("nameserver 127.0.0.53\ndomain old.test\nsearch corp.test lab.test.\noptions edns0 ndots:3\n")
+    assert read_search_config(str(conf)) == (["corp.test", "lab.test"], 3)
+    assert read_search_config(str(tmp_path / "missing")) == ([], 1)
+
+
+def test_candidates_follow_ndots():
+    resolver = TTLResolverCache(nameservers=[], search=["corp.test", "lab.test"], ndots=2)
+    assert resolver.candidates("gw01") == ["gw01.corp.test", "gw01.lab.test", "gw01"]
+    assert resolver.candidates("a.b") == ["a.b.corp.test", "a.b.lab.test", "a.b"]
+    assert resolver.candidates("api.example.test") == [
+        "api.example.test", "api.example.test.corp.test", "api.example.test.lab.test"
+    ]
+    assert resolver.candidates("gw01.") == ["gw01"]
+
+
+def test_short_name_uses_search_domain(stub_dns):
+    resolver = make_resolver(TTLResolverCache, stub_dns)
+    assert resolver.resolve("gw01") == ["10.0.0.1"]
+    assert stub_dns.udp_queries[0] == "gw01.corp.test"
+    assert asyncio.run(make_resolver(AsyncResolverCache, stub_dns).resolve_async("gw01")) == ["10.0.0.1"]
+
+
+def test_fqdn_resolves_with_ttl(stub_dns):
+    resolver = make_resolver(TTLResolverCache, stub_dns)
+    addresses, ttl = resolver._query("api.example.test")
+    assert addresses == ["192.0.2.10", "2001:db8::10"]
+    assert ttl == 60
+    assert stub_dns.udp_queries[0] == "api.example.test"
+
+
+def test_truncated_response_retries_over_tcp(stub_dns):
+    resolver = make_resolver(TTLResolverCache, stub_dns)
+    assert len(resolver.resolve("big.example.test")) == 40
+    assert "big.example.test" in stub_dns.tcp_queries
+
+    stub_dns.tcp_queries.clear()
+    async_resolver = make_resolver(AsyncResolverCache, stub_dns)
+    assert len(asyncio.run(async_resolver.resolve_async("big.example.test"))) == 40
+    assert "big.example.test" in stub_dns.tcp_queries
+
+
+def test_nxdomain_falls_back_to_getaddrinfo(stub_dns, monkeypatch):
+    # DNS中不存在、只能由NSS（mDNS、LDAP等）解析的名称
+    def fake_getaddrinfo(host, *args, **kwargs):
+        if host == "printer.local":
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.168.1.50", 0))]
+        raise socket.gaierror(socket.EAI_NONAME, "not found")
+
+    monkeypatch.setattr(dns_resolver.socket, "getaddrinfo", fake_getaddrinfo)
+    resolver = make_resolver(TTLResolverCache, stub_dns)
+    assert resolver.resolve("printer.local") == ["192.168.1.50"]
+    assert resolver.resolve("missing.example.test") == []
+    assert resolver.stats["misses"] == 2
+
+    async_resolver = make_resolver(AsyncResolverCache, stub_dns)
+    assert asyncio.run(async_resolver.resolve_async("printer.local")) == ["192.168.1.50"]
+
+
+def test_dropped_aaaa_keeps_a_answer_and_its_ttl(stub_dns, monkeypatch):
+    def no_getaddrinfo(*args, **kwargs):
+        raise AssertionError("不应回退到getaddrinfo")
+
+    monkeypatch.setattr(dns_resolver.socket, "getaddrinfo", no_getaddrinfo)
+    resolver = make_resolver(TTLResolverCache, stub_dns, timeout=0.2)
+    assert resolver._query("v4only.example.test") == (["192.0.2.20"], 300)
+
+    async def main():
+        async_resolver = make_resolver(AsyncResolverCache, stub_dns, timeout=0.2)
+        return await async_resolver._query_async("v4only.example.test")
+
+    assert asyncio.run(main()) == (["192.0.2.20"], 300)
@@ -0,0 +1,68 @@
+import pytest
+
+from network.domain_index import DomainSuffixIndex
+
+
+@pytest.fixture
+def index():
+    return DomainSuffixIndex([
+        ("baidu.com", "off"),
+        ("google.com", "on"),
+        ("*.map.baidu.com", "on"),
+        ("cn", "off"),
+    ])
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("baidu.com", "off"),
+    ("www.baidu.com", "off"),
+    ("a.b.c.baidu.com", "off"),
+    ("notbaidu.com", None),
+    ("baidu.com.evil.io", None),
+    ("baidu.co", None),
+    ("com", None),
+    ("google.com", "on"),
+    ("mail.google.com", "on"),
+    ("example.cn", "off"),
+    ("", None),
+])
+def test_suffix_matches_on_label_boundaries(index, host, expected):
+    assert index.lookup(host) == expected
+
+
+def test_wildcard_matches_only_subdomains(index):
+    assert index.lookup("map.baidu.com") == "off"  # 通配规则不匹配自身，回落到baidu.com
+    assert index.lookup("api.map.baidu.com") == "on"
+    assert index.lookup("x.api.map.baidu.com") == "on"
+
+
+def test_host_is_normalized(index):
+    assert index.lookup("WWW.Baidu.COM.") == "off"
+    assert index.lookup("  mail.google.com ") == "on"
+
+
+def test_longest_suffix_wins_regardless_of_insert_order():
+    index = DomainSuffixIndex([("api.example.com", "on"), ("example.com", "off")])
+    assert index.lookup("v1.api.example.com") == "on"
+    assert index.lookup("www.example.com") == "off"
+
+
+def test_later_rule_overrides_and_clears_cache(index):
+    assert index.lookup("www.google.com") == "on"
+    index.add("google.com", "off")
+    assert index.lookup("www.google.com") == "off"
+    index.update([("www.google.com", "on")])
+    assert index.lookup("www.google.com") == "on"
+
+
+def test_lookup_many_uses_cache(index):
+    hosts = ["www.baidu.com", "mail.google.com", "unknown.io"] * 3
+    assert index.lookup_many(hosts) == ["off", "on", None] * 3
+    info = index.cache_info()
+    assert info.misses == 3 and info.hits == 6
+
+
+def test_len_and_memory(index):
+    assert len(index) == 4
+    assert index.memory_bytes() > 0
+    assert len(DomainSuffixIndex([("", "off")])) == 0
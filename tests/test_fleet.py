@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+
+from monitor.fleet import (
+    TARGET_HEALTHY,
+    TARGET_UNHEALTHY,
+    FleetMonitor,
+    GatewayTarget,
+    load_fleet_config,
+)
+
+
+class StubPool:
+    """按URL返回状态码的异步连接池，记录并发数"""
+
+    def __init__(self, statuses, delay=0.0):
+        self.statuses = statuses
+        self.delay = delay
+        self.calls = []
+
+    async def fetch(self, url, route="direct", timeout=10.0):
+        self.calls.append(url)
+        await asyncio.sleep(self.delay)
+        status = self.statuses.get(url, 200)
+        if isinstance(status, BaseException):
+            raise status
+        return {"status_code": status, "latency_ms": 1.5}
+
+
+class StubRestarter:
+    def __init__(self, success=True):
+        self.success = success
+        self.calls = 0
+
+    def restart(self):
+        self.calls += 1
+        return {"success": self.success, "duration_s": 0.01, "latency_ms": 2.0, "error": None if self.success else "boom"}
+
+
+def run_for(fleet, seconds):
+    async def main():
+        task = asyncio.ensure_future(fleet.run_async())
+        await asyncio.sleep(seconds)
+        fleet.stop()
+        await task
+    asyncio.run(main())
+
+
+def target(name, **settings):
+    settings.setdefault("interval", 0.02)
+    return GatewayTarget(name, f"http://{name}.test/status", **settings)
+
+
+def test_load_fleet_config(tmp_path):
+    path = tmp_path / "fleet.json"
+    path.write_text(json.dumps({
+        "max_concurrency": 8,
+        "defaults": {"interval": 10, "failure_threshold": 2},
+        "targets": [
+            {"name": "local", "status_url": "http://127.0.0.1:18789/status",
+             "process_pattern": "openclaw gateway", "start_command": ["openclaw", "gateway"]},
+            {"name": "remote", "status_url": "http://10.0.0.2:18789/status", "interval": 60},
+        ],
+    }))
+    config = load_fleet_config(path)
+    local, remote = config["targets"]
+    assert config["max_concurrency"] == 8 and config["max_restart_workers"] == 4
+    assert (local.interval, local.failure_threshold, local.restart) == (10, 2, True)
+    # 没有启动命令的远程目标不会被重启
+    assert (remote.interval, remote.restart) == (60, False)
+
+
+@pytest.mark.parametrize("targets, message", [
+    ([{"name": "a", "status_url": "u"}, {"name": "a", "status_url": "u"}], "重复"),
+    ([{"name": "a"}], "缺少"),
+    ([{"name": "a", "status_url": "u", "intervall": 5}], "intervall"),
+])
+def test_invalid_fleet_config(tmp_path, targets, message):
+    path = tmp_path / "fleet.json"
+    path.write_text(json.dumps({"targets": targets}))
+    with pytest.raises(ValueError, match=message):
+        load_fleet_config(path)
+
+
+def test_probe_concurrency_is_bounded():
+    targets = [target(f"gw{i}") for i in range(20)]
+    pool = StubPool({}, delay=0.05)
+    fleet = FleetMonitor(targets, pool, max_concurrency=3)
+    run_for(fleet, 0.4)
+    assert fleet.max_in_flight == 3
+    assert all(t.state == TARGET_HEALTHY and t.checks >= 1 for t in targets)
+    assert fleet.snapshot()["states"] == {TARGET_HEALTHY: 20}
+
+
+def test_failing_target_is_restarted_after_threshold(tmp_path):
+    failing = target("bad", failure_threshold=3, start_command=["true"], process_pattern="bad-gateway")
+    failing._restarter = StubRestarter(success=True)
+    healthy = target("good")
+    pool = StubPool({failing.status_url: ConnectionRefusedError()})
+    fleet = FleetMonitor([failing, healthy], pool, state_dir=tmp_path)
+    fleet._scan_processes = lambda: asyncio.sleep(0)  # 测试中不扫描进程表
+    run_for(fleet, 0.3)
+
+    assert failing._restarter.calls >= 1
+    assert failing.last_restart["success"]
+    assert healthy.restarts == 0 and healthy.state == TARGET_HEALTHY
+    assert (tmp_path / "bad.json").exists()
+
+
+def test_restart_budget_limits_restarts(tmp_path):
+    failing = target("bad", failure_threshold=1, max_restarts_per_hour=1, start_command=["true"], process_pattern="x")
+    failing._restarter = StubRestarter(success=False)
+    fleet = FleetMonitor([failing], StubPool({failing.status_url: 503}), state_dir=tmp_path)
+    fleet._scan_processes = lambda: asyncio.sleep(0)
+    run_for(fleet, 0.3)
+
+    assert failing._restarter.calls == 1
+    assert failing.state == TARGET_UNHEALTHY
+    assert failing.last_error == "HTTP 503"
+    assert failing.checks > 3
+
+
+def test_known_missing_process_skips_request():
+    gateway = target("gw", process_pattern="gw")
+    gateway.pids = []
+    pool = StubPool({})
+    fleet = FleetMonitor([gateway], pool)
+    fleet._semaphore = asyncio.Semaphore(1)
+    asyncio.run(fleet.probe(gateway))
+    assert pool.calls == []
+    assert gateway.last_error == "进程未运行"
+    assert gateway.snapshot()["consecutive_failures"] == 1
@@ -0,0 +1,308 @@
+import asyncio
+import gc
+import time
+import warnings
+from types import SimpleNamespace
+
+import pytest
+
+from network.forward_proxy import ForwardProxy, ProxyError, _parse_status
+from network.proxy_router import ROUTE_DIRECT, ROUTE_HTTP_PROXY
+
+
+class FakeRouter:
+    def __init__(self, route):
+        self.route = route
+        self.results = []
+        self.fallback = None
+        self.explore = []
+
+    def route_for_url(self, url):
+        return self.route
+
+    def exploration_targets(self, url, route):
+        targets, self.explore = self.explore, []
+        return targets
+
+    def fallback_route(self, url, route):
+        return self.fallback if self.fallback != route else None
+
+    def record_result(self, url, route, latency, success):
+        self.results.append((route, success))
+
+
+def make_proxy(route=ROUTE_DIRECT, upstream_port=None, **kwargs):
+    manager = SimpleNamespace(
+        ip_routing_enabled=False,
+        router=FakeRouter(route),
+        proxy_config={"http": f"http://127.0.0.1:{upstream_port}", "socks5": "socks5://127.0.0.1:1"},
+    )
+    return ForwardProxy(manager, host="127.0.0.1", port=0, **kwargs)
+
+
+async def start_server(handler):
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def reply_with(response: bytes):
+    async def handler(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(response)
+        await writer.drain()
+        writer.close()
+    return await start_server(handler)
+
+
+async def request(proxy, data: bytes) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+    writer.write(data)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return response
+
+
+@pytest.mark.parametrize("line", ["HTTP/1.1 200 OK", "HTTP/1.0 404", "HTTP/1.1 204 No Content"])
+def test_parse_status(line):
+    version, status = _parse_status(line)
+    assert version.startswith("HTTP/1.") and status == int(line.split()[1])
+
+
+@pytest.mark.parametrize("line", ["", "HTTP/1.1", "HTTP/1.1 ", "HTTP/1.1 abc OK", "garbage here", "HTTP/1.1 2000 Huge"])
+def test_parse_status_rejects_malformed_lines(line):
+    with pytest.raises(ProxyError):
+        _parse_status(line)
+
+
+@pytest.mark.parametrize("response", [b"HTTP/1.1\r\n\r\n", b"NONSENSE\r\n\r\n", b"HTTP/1.1 OK\r\n\r\n"])
+def test_malformed_upstream_status_returns_502(response):
+    async def main():
+        upstream, port = await reply_with(response)
+        proxy = make_proxy()
+        await proxy.start()
+        try:
+            reply = await request(proxy, f"GET http://127.0.0.1:{port}/ HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+        finally:
+            await proxy.stop()
+            upstream.close()
+        assert reply.startswith(b"HTTP/1.1 502 Bad Gateway")
+        assert proxy.counters["errors_total"] == 1
+
+    asyncio.run(main())
+
+
+def test_valid_upstream_response_is_relayed():
+    async def main():
+        upstream, port = await reply_with(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        proxy = make_proxy()
+        await proxy.start()
+        try:
+            reply = await request(proxy, f"GET http://127.0.0.1:{port}/ HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+        finally:
+            await proxy.stop()
+            upstream.close()
+        assert reply.startswith(b"HTTP/1.1 200 OK") and reply.endswith(b"ok")
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("response", [b"HTTP/1.1\r\n\r\n", b"\r\n\r\n", b"HTTP/1.1 407 Proxy Authentication Required\r\n\r\n"])
+def test_bad_connect_reply_from_upstream_proxy_returns_502(response):
+    async def main():
+        upstream, port = await reply_with(response)
+        proxy = make_proxy(ROUTE_HTTP_PROXY, upstream_port=port)
+        await proxy.start()
+        try:
+            reply = await request(proxy, b"CONNECT example.com:443 HTTP/1.1\r\nHost: example.com:443\r\n\r\n")
+        finally:
+            await proxy.stop()
+            upstream.close()
+        assert reply.startswith(b"HTTP/1.1 502 Bad Gateway")
+        assert proxy.manager.router.results == [(ROUTE_HTTP_PROXY, False)]
+
+    asyncio.run(main())
+
+
+def test_failed_adaptive_route_falls_back_to_rule_route():
+    async def main():
+        rejecting_proxy, proxy_port = await reply_with(b"HTTP/1.1 403 Forbidden\r\n\r\n")
+        origin, origin_port = await reply_with(b"")
+        proxy = make_proxy(ROUTE_HTTP_PROXY, upstream_port=proxy_port)
+        proxy.manager.router.fallback = ROUTE_DIRECT
+        await proxy.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+            writer.write(f"CONNECT 127.0.0.1:{origin_port} HTTP/1.1\r\n\r\n".encode())
+            assert (await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)).startswith(b"HTTP/1.1 200")
+            writer.close()
+        finally:
+            await proxy.stop()
+            rejecting_proxy.close()
+            origin.close()
+        assert proxy.manager.router.results == [(ROUTE_HTTP_PROXY, False), (ROUTE_DIRECT, True)]
+        assert proxy.counters["route_fallbacks_total"] == 1
+
+    asyncio.run(main())
+
+
+def test_exploration_runs_in_background():
+    async def main():
+        async def accepting_proxy(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            await writer.drain()
+            await reader.read()
+            writer.close()
+
+        upstream_proxy, proxy_port = await start_server(accepting_proxy)
+        origin, origin_port = await reply_with(b"")
+        proxy = make_proxy(ROUTE_DIRECT, upstream_port=proxy_port)
+        proxy.manager.router.explore = [ROUTE_HTTP_PROXY]
+        await proxy.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+            writer.write(f"CONNECT 127.0.0.1:{origin_port} HTTP/1.1\r\n\r\n".encode())
+            assert (await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)).startswith(b"HTTP/1.1 200")
+            writer.close()
+            for _ in range(100):
+                if len(proxy.manager.router.results) == 2:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await proxy.stop()
+            upstream_proxy.close()
+            origin.close()
+        # 客户端的隧道走规则路由，HTTP代理只做了一次后台建连
+        assert sorted(proxy.manager.router.results) == [(ROUTE_DIRECT, True), (ROUTE_HTTP_PROXY, True)]
+        assert proxy.counters["explorations_total"] == 1
+        assert proxy.counters["tunnels_total"] == 1
+
+    asyncio.run(main())
+
+
+def test_idle_tunnel_is_closed():
+    async def main():
+        async def silent(reader, writer):
+            await reader.read()
+            writer.close()
+
+        upstream, port = await start_server(silent)
+        proxy = make_proxy(tunnel_idle_timeout=0.3)
+        await proxy.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+            writer.write(f"CONNECT 127.0.0.1:{port} HTTP/1.1\r\n\r\n".encode())
+            assert (await reader.readuntil(b"\r\n\r\n")).startswith(b"HTTP/1.1 200")
+            started = time.monotonic()
+            assert await asyncio.wait_for(reader.read(), 5) == b""
+            assert 0.25 <= time.monotonic() - started < 3
+            writer.close()
+            await asyncio.sleep(0.05)
+        finally:
+            await proxy.stop()
+            upstream.close()
+        assert proxy.counters["tunnels_idle_closed"] == 1
+        assert proxy.counters["tunnels_active"] == 0
+
+    asyncio.run(main())
+
+
+def test_one_way_traffic_keeps_tunnel_open():
+    async def main():
+        async def streaming(reader, writer):
+            for _ in range(8):
+                writer.write(b"x" * 100)
+                await writer.drain()
+                await asyncio.sleep(0.1)
+            writer.close()
+
+        upstream, port = await start_server(streaming)
+        proxy = make_proxy(tunnel_idle_timeout=0.3)
+        await proxy.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+            writer.write(f"CONNECT 127.0.0.1:{port} HTTP/1.1\r\n\r\n".encode())
+            await reader.readuntil(b"\r\n\r\n")
+            body = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+        finally:
+            await proxy.stop()
+            upstream.close()
+        assert len(body) == 800
+        assert proxy.counters["tunnels_idle_closed"] == 0
+
+    asyncio.run(main())
+
+
+def test_failed_relay_closes_upstream_connection():
+    async def main():
+        upstream_closed = asyncio.Event()
+
+        async def truncated(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n" + b"x" * 10)
+            await writer.drain()
+            writer.write_eof()
+            # 代理在转发失败后必须关闭它这一端的连接
+            await reader.read()
+            upstream_closed.set()
+            writer.close()
+
+        upstream, port = await start_server(truncated)
+        proxy = make_proxy()
+        await proxy.start()
+        try:
+            reply = await request(proxy, f"GET http://127.0.0.1:{port}/ HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            await asyncio.wait_for(upstream_closed.wait(), 5)
+        finally:
+            await proxy.stop()
+            upstream.close()
+        assert reply.startswith(b"HTTP/1.1 200 OK")
+        assert proxy.upstream_pool.idle_count() == 0
+        assert proxy.counters["errors_total"] == 1
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        asyncio.run(main())
+        gc.collect()
+    # 未关闭的上游连接只能靠垃圾回收关闭，并产生ResourceWarning
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+
+
+def test_connection_listed_headers_are_stripped_both_ways():
+    async def main():
+        received = []
+
+        async def echo_headers(reader, writer):
+            received.append(await reader.readuntil(b"\r\n\r\n"))
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nConnection: X-Internal, Content-Length\r\nX-Internal: a\r\n"
+                b"X-Public: b\r\nKeep-Alive: timeout=5\r\nContent-Length: 2\r\n\r\nok"
+            )
+            await writer.drain()
+            writer.close()
+
+        upstream, port = await start_server(echo_headers)
+        proxy = make_proxy()
+        await proxy.start()
+        try:
+            reply = await request(
+                proxy,
+                f"GET http://127.0.0.1:{port}/ HTTP/1.1\r\nHost: x\r\n"
+                "Connection: X-Secret, close\r\nX-Secret: 1\r\nX-Keep: 2\r\n\r\n".encode(),
+            )
+        finally:
+            await proxy.stop()
+            upstream.close()
+
+        request_head = received[0].decode().lower()
+        assert "x-secret" not in request_head and "x-keep: 2" in request_head
+        head, _, body = reply.partition(b"\r\n\r\n")
+        head = head.decode().lower()
+        assert "x-internal" not in head and "keep-alive" not in head
+        assert "x-public: b" in head and "content-length: 2" in head
+        assert "connection: close" in head
+        assert body == b"ok"
+
+    asyncio.run(main())
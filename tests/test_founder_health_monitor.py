@@ -0,0 +1,254 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from monitor.founder_health_monitor import FounderHealthMonitor, main, report_days
+from monitor.gateway_restart import GatewayRestartOrchestrator
+from monitor.process_tracker import ProcessTracker
+from monitor.restart_policy import RestartPolicy
+
+FAKE_GATEWAY = textwrap.dedent('''
+    import sys
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    STATUS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(STATUS)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    HTTPServer(("127.0.0.1", int(sys.argv[1])), Handler).serve_forever()
+''')
+
+
+def _serving(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def _wait_for(predicate, timeout: float = 15.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch, free_port):
+    """HOME指向临时目录、Gateway换成本地假进程的监控实例"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    (tmp_path / ".openclaw").mkdir()
+    script = tmp_path / "fake_openclaw_gateway.py"
+    script.write_text(FAKE_GATEWAY)
+    port = free_port
+
+    instance = FounderHealthMonitor()
+    instance.gateway_status_url = f"http://127.0.0.1:{port}/status"
+    instance.process_tracker = ProcessTracker(str(script))
+    instance.gateway_restarter = GatewayRestartOrchestrator(
+        start_command=[sys.executable, str(script), str(port)],
+        status_url=instance.gateway_status_url,
+        process_pattern=str(script),
+        http_pool=instance.http_pool,
+        stop_timeout=5,
+        ready_timeout=10,
+        logger=instance.logger,
+    )
+    instance.restart_policy = RestartPolicy(tmp_path / "restart_policy.json", logger=instance.logger)
+    instance.fake_gateway_command = [sys.executable, str(script), str(port)]
+    yield instance
+    instance.scheduler.stop()
+    instance.gateway_restarter.stop(graceful=False)
+    instance.timeseries.close()
+
+
+def test_missing_gateway_is_restarted_by_status_check(monitor):
+    monitor.run_status_check()
+    assert monitor.gateway_restarter.metrics["restarts_total"] == 1
+    assert monitor.process_tracker.pids()
+    assert monitor.consecutive_failures == 0
+    assert monitor.restart_policy.snapshot()["attempts_total"] == 1
+
+
+def test_gateway_exit_triggers_restart(monitor):
+    gateway = subprocess.Popen(monitor.fake_gateway_command)
+    try:
+        assert _wait_for(lambda: _serving(monitor.gateway_status_url))
+        runner = threading.Thread(target=monitor.scheduler.run, daemon=True)
+        runner.start()
+        # 首次状态检查后开始通过pidfd监视Gateway进程
+        assert _wait_for(lambda: gateway.pid in monitor.scheduler.watched_pids)
+        assert monitor.gateway_restarter.metrics["restarts_total"] == 0
+
+        gateway.kill()
+        gateway.wait()
+        assert _wait_for(lambda: monitor.gateway_restarter.metrics["restarts_total"] == 1)
+        assert _wait_for(lambda: _serving(monitor.gateway_status_url))
+        assert gateway.pid not in monitor.process_tracker.pids()
+    finally:
+        gateway.kill()
+        gateway.wait()
+
+
+def test_restart_is_denied_by_open_breaker(monitor, tmp_path):
+    monitor.restart_policy = RestartPolicy(tmp_path / "tripped.json", trip_after=1)
+    assert monitor.restart_policy.acquire()[0]
+    monitor.restart_policy.record_result(False)
+    assert monitor.restart_policy.breaker == "open"
+
+    monitor.run_status_check()
+    assert monitor.gateway_restarter.metrics["restarts_total"] == 0
+    assert monitor.consecutive_failures == 1
+
+
+def test_failing_status_restarts_only_after_max_retries(monitor):
+    gateway = subprocess.Popen(monitor.fake_gateway_command + ["503"])
+    try:
+        assert _wait_for(lambda: monitor.process_tracker.pids())
+        assert _wait_for(lambda: monitor.check_openclaw_status() == (True, "API响应异常: 503"))
+
+        for attempt in range(1, monitor.max_retries):
+            monitor.run_status_check()
+            assert monitor.consecutive_failures == attempt
+            assert monitor.gateway_restarter.metrics["restarts_total"] == 0
+            assert gateway.poll() is None
+
+        monitor.run_status_check()
+        assert monitor.gateway_restarter.metrics["restarts_total"] == 1
+        assert monitor.consecutive_failures == 0
+        assert _serving(monitor.gateway_status_url)
+    finally:
+        gateway.kill()
+        gateway.wait()
+
+
+def test_only_the_probe_records_responsiveness(monitor):
+    gateway = subprocess.Popen(monitor.fake_gateway_command)
+    try:
+        assert _wait_for(lambda: _serving(monitor.gateway_status_url))
+        assert _wait_for(lambda: monitor.process_tracker.pids())
+        assert monitor.check_openclaw_status() == (True, "运行正常")
+        assert monitor.responsiveness.evaluate()["long_window"]["samples"] == 0
+
+        monitor.probe_responsiveness()
+        assert monitor.responsiveness.evaluate()["long_window"]["samples"] == 1
+    finally:
+        gateway.kill()
+        gateway.wait()
+
+
+@pytest.fixture
+def config_monitor(monitor, monkeypatch):
+    """带最后已知正常配置的监控实例，重启只记录不执行"""
+    path = monitor.config_path
+    with open(path, "w") as f:
+        f.write('{"port": 18789}')
+    monitor.backup_config("known_good")
+    monitor.backup_store.mark_good(monitor.backup_store.latest())
+    monitor.restarts = []
+    monkeypatch.setattr(monitor, "restart_openclaw", lambda **kwargs: monitor.restarts.append(kwargs) or True)
+    monkeypatch.setattr(monitor.scheduler, "trigger", lambda name: None)
+    return monitor
+
+
+def _write_config(monitor, text):
+    with open(monitor.config_path, "w") as f:
+        f.write(text)
+
+
+def _read_config(monitor):
+    with open(monitor.config_path) as f:
+        return f.read()
+
+
+def _drain(monitor):
+    """等待配置线程池中已提交的任务完成"""
+    monitor._config_executor.submit(lambda: None).result(10)
+
+
+def test_invalid_config_is_rolled_back_after_grace_period(config_monitor):
+    _write_config(config_monitor, "{broken")
+    config_monitor.handle_config_change()
+    assert config_monitor.backup_store.latest()["reason"] == "rejected"
+    assert not config_monitor._check_config_grace(healthy=True)  # 观察期内仍可修正
+
+    config_monitor._pending_config["deadline"] = 0
+    assert config_monitor._check_config_grace(healthy=True)
+    _drain(config_monitor)
+    assert _read_config(config_monitor) == '{"port": 18789}'
+    # Gateway未运行，回滚后绕过重启策略重启
+    assert config_monitor.restarts == [{"bypass_policy": True}]
+
+
+def test_invalid_config_fixed_within_grace_period(config_monitor):
+    _write_config(config_monitor, "{broken")
+    config_monitor.handle_config_change()
+    _write_config(config_monitor, '{"port": 18790}')
+    config_monitor.handle_config_change()
+    assert config_monitor._pending_config["error"] is None
+
+    config_monitor._pending_config["deadline"] = 0
+    assert not config_monitor._check_config_grace(healthy=True)
+    assert config_monitor.backup_store.last_known_good()["reason"] == "config_change"
+    assert _read_config(config_monitor) == '{"port": 18790}'
+
+
+def test_unhealthy_gateway_rolls_back_new_config(config_monitor):
+    config_monitor.config_unhealthy_after = 0
+    _write_config(config_monitor, '{"port": 1}')
+    config_monitor.handle_config_change()
+    assert config_monitor._check_config_grace(healthy=False)
+    _drain(config_monitor)
+    assert _read_config(config_monitor) == '{"port": 18789}'
+    assert config_monitor._pending_config is None
+    assert config_monitor.backup_store.last_known_good()["reason"] == "known_good"
+
+
+def test_deleted_config_is_restored(config_monitor):
+    os.unlink(config_monitor.config_path)
+    config_monitor.handle_config_change()
+    assert _read_config(config_monitor) == '{"port": 18789}'
+
+
+def test_watcher_feeds_config_changes(config_monitor):
+    config_monitor.config_watcher.debounce = 0.1
+    config_monitor.config_watcher.start()
+    try:
+        _write_config(config_monitor, '{"port": 18791}')
+        assert _wait_for(lambda: config_monitor._pending_config is not None, timeout=10)
+        assert config_monitor.backup_store.latest()["reason"] == "config_change"
+    finally:
+        config_monitor.config_watcher.stop()
+
+
+def test_report_days_argument():
+    assert report_days([]) == 30
+    assert report_days(["7"]) == 7
+    for value in ("abc", "0", "-3", "1.5"):
+        with pytest.raises(ValueError):
+            report_days([value])
+
+
+def test_invalid_report_days_is_a_usage_error(monitor, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["founder_health_monitor.py", "report", "abc"])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+    assert "用法错误" in capsys.readouterr().err
@@ -0,0 +1,154 @@
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+
+import psutil
+import pytest
+
+from monitor.gateway_restart import GatewayRestartOrchestrator, wait_for_exit
+
+FAKE_GATEWAY = textwrap.dedent('''
+    import signal
+    import sys
+    import time
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    port, mode = int(sys.argv[1]), sys.argv[2]
+    if mode == "ignore-term":
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    elif mode == "crash":
+        print("config error: bad port")
+        sys.exit(3)
+    elif mode == "slow":
+        time.sleep(60)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+''')
+
+
+class UrllibPool:
+    """只实现fetch_sync的连接池替身"""
+
+    def fetch_sync(self, url, route="direct", timeout=10.0):
+        start = time.perf_counter()
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return {"status_code": response.status, "latency_ms": (time.perf_counter() - start) * 1000}
+
+
+def _gone(pid: int) -> bool:
+    """进程已退出（由编排器启动的进程是测试进程的子进程，未回收前为僵尸进程）"""
+    try:
+        return psutil.Process(pid).status() == psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return True
+
+
+@pytest.fixture
+def make_orchestrator(tmp_path, free_port):
+    script = tmp_path / "fake_gateway_for_restart.py"
+    script.write_text(FAKE_GATEWAY)
+    port = free_port
+    created = []
+
+    def factory(mode="serve", **kwargs):
+        kwargs.setdefault("stop_timeout", 5)
+        kwargs.setdefault("ready_timeout", 10)
+        orchestrator = GatewayRestartOrchestrator(
+            start_command=[sys.executable, str(script), str(port), mode],
+            status_url=f"http://127.0.0.1:{port}/status",
+            process_pattern=str(script),
+            log_path=tmp_path / "gateway.log",
+            http_pool=UrllibPool(),
+            **kwargs,
+        )
+        created.append(orchestrator)
+        return orchestrator
+
+    factory.script = script
+    factory.port = port
+    yield factory
+    for orchestrator in created:
+        orchestrator.stop_timeout = 1
+        orchestrator.stop(graceful=False)
+
+
+def test_wait_for_exit():
+    sleeper = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        assert wait_for_exit([sleeper.pid], 0.1) == [sleeper.pid]
+        sleeper.terminate()
+        started = time.monotonic()
+        assert wait_for_exit([sleeper.pid], 5) == []
+        assert time.monotonic() - started < 2
+    finally:
+        sleeper.kill()
+        sleeper.wait()
+    assert wait_for_exit([sleeper.pid], 1) == []
+
+
+def test_restart_starts_gateway_and_records_metrics(make_orchestrator):
+    orchestrator = make_orchestrator()
+    result = orchestrator.restart()
+    assert result["success"], result
+    assert psutil.pid_exists(result["pid"])
+    assert set(result["phases"]) == {"stop_s", "ready_s"}
+    assert orchestrator.metrics["restarts_total"] == 1
+    assert orchestrator.metrics["restart_failures_total"] == 0
+    assert orchestrator.metrics["last_restart_duration_s"] == result["duration_s"]
+
+
+def test_restart_replaces_running_gateway(make_orchestrator):
+    orchestrator = make_orchestrator()
+    first = orchestrator.restart()
+    second = orchestrator.restart()
+    assert first["success"] and second["success"]
+    assert second["pid"] != first["pid"]
+    assert _gone(first["pid"])
+
+
+def test_gateway_ignoring_sigterm_is_killed(make_orchestrator):
+    orchestrator = make_orchestrator("ignore-term", stop_timeout=0.5)
+    first = orchestrator.restart()
+    assert first["success"]
+    elapsed = orchestrator.stop()
+    assert 0.5 <= elapsed < 5
+    assert _gone(first["pid"])
+
+
+def test_crashing_start_fails_fast_with_log_tail(make_orchestrator):
+    orchestrator = make_orchestrator("crash", ready_timeout=20)
+    result = orchestrator.restart()
+    assert not result["success"]
+    assert result["duration_s"] < 10
+    assert "退出码: 3" in result["error"]
+    assert "config error" in result["error"]
+    assert orchestrator.metrics["restart_failures_total"] == 1
+
+
+def test_ready_timeout(make_orchestrator):
+    orchestrator = make_orchestrator("slow", ready_timeout=0.5)
+    result = orchestrator.restart()
+    assert not result["success"]
+    assert result["error"] == "等待就绪超时"
+    assert result["attempts"] >= 2
+
+
+def test_graceful_stop_runs_stop_command(make_orchestrator, tmp_path):
+    marker = tmp_path / "stopped"
+    orchestrator = make_orchestrator(stop_command=[sys.executable, "-c", f"open({str(marker)!r}, 'w').close()"])
+    assert orchestrator.restart()["success"]
+    orchestrator.stop(graceful=True)
+    assert marker.exists()
+    assert not orchestrator.probe_ready(timeout=0.2)
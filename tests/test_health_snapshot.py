@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from network import health_snapshot
+from network.health_snapshot import HealthSnapshotCache
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    monkeypatch.setattr(health_snapshot.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+class Checker:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("探测失败")
+        return {"run": self.calls}
+
+
+def test_first_get_refreshes_then_serves_snapshot(clock):
+    checker = Checker()
+    cache = HealthSnapshotCache(checker, interval=60)
+    first = cache.get()
+    assert first == {"snapshot": {"run": 1}, "age_seconds": 0.0, "stale": False, "refreshing": False}
+    clock.now += 30
+    assert cache.get()["snapshot"] == {"run": 1}
+    assert cache.get()["age_seconds"] == 30.0
+    assert checker.calls == 1
+
+
+def test_max_age_forces_refresh(clock):
+    checker = Checker()
+    cache = HealthSnapshotCache(checker, interval=60)
+    cache.get()
+    clock.now += 10
+    assert cache.get(max_age=20)["snapshot"] == {"run": 1}
+    assert cache.get(max_age=5)["snapshot"] == {"run": 2}
+
+
+def test_snapshot_becomes_stale(clock):
+    cache = HealthSnapshotCache(Checker(), interval=60)
+    cache.get()
+    clock.now += 121
+    result = cache.get()
+    assert result["stale"] and result["age_seconds"] == 121.0
+
+
+def test_failed_refresh_keeps_previous_snapshot(clock):
+    checker = Checker()
+    cache = HealthSnapshotCache(checker, interval=60)
+    cache.get()
+    checker.fail = True
+    clock.now += 100
+    result = cache.get(max_age=1)
+    assert result["snapshot"] == {"run": 1}
+    assert result["age_seconds"] == 100.0
+    assert cache.stats()["last_error"] == "探测失败"
+
+
+def test_failure_without_snapshot_raises():
+    checker = Checker()
+    checker.fail = True
+    cache = HealthSnapshotCache(checker)
+    with pytest.raises(RuntimeError):
+        cache.get()
+
+
+def test_concurrent_refreshes_are_shared():
+    checker = Checker(delay=0.2)
+    cache = HealthSnapshotCache(checker)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get()["snapshot"])) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert checker.calls == 1
+    assert results == [{"run": 1}] * 8
+    assert cache.stats()["shared_refreshes"] == 7
+
+
+def test_background_refresh_and_prompt_stop():
+    checker = Checker()
+    cache = HealthSnapshotCache(checker, interval=0.05)
+    cache.start()
+    try:
+        deadline = time.monotonic() + 5
+        while checker.calls < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert checker.calls >= 3
+        assert cache.stats()["prober_running"]
+    finally:
+        cache.interval = 60
+        started = time.monotonic()
+        cache.stop()
+    assert time.monotonic() - started < 1
+    assert not cache.running
@@ -0,0 +1,13 @@
+from network.http_pool import HttpPoolManager
+
+
+def test_close_cancels_eviction_and_closes_loop():
+    pool = HttpPoolManager()
+    loop = pool.loop
+    pool.run(pool.resolver.prefetch([]))  # 等事件循环启动，清理任务已创建
+    evictor = pool._evictor
+    pool.close()
+
+    assert evictor.cancelled()
+    assert loop.is_closed()
+    assert pool._loop is None and pool._evictor is None
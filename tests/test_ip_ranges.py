@@ -0,0 +1,100 @@
+import pytest
+
+from network.ip_ranges import IPRangeTable, _merge_ranges
+
+
+def make_table(*networks):
+    table = IPRangeTable()
+    table.update(networks)
+    table.compile()
+    return table
+
+
+def test_adjacent_ranges_with_same_value_are_merged():
+    table = make_table(("10.0.0.0/25", "off"), ("10.0.0.128/25", "off"))
+    assert len(table) == 1
+    assert table.lookup("10.0.0.0") == table.lookup("10.0.0.255") == "off"
+    assert table.lookup("10.0.1.0") is None
+
+
+def test_adjacent_ranges_with_different_values_stay_apart():
+    table = make_table(("10.0.0.0/25", "off"), ("10.0.0.128/25", "on"))
+    assert len(table) == 2
+    assert table.lookup("10.0.0.127") == "off"
+    assert table.lookup("10.0.0.128") == "on"
+
+
+def test_more_specific_range_wins_inside_overlap():
+    table = make_table(("10.0.0.0/8", "on"), ("10.1.0.0/16", "off"), ("10.1.2.0/24", "on"))
+    assert table.lookup("10.0.255.255") == "on"
+    assert table.lookup("10.1.0.0") == "off"
+    assert table.lookup("10.1.2.3") == "on"
+    assert table.lookup("10.1.3.0") == "off"
+    assert table.lookup("10.2.0.0") == "on"
+    assert table.lookup("11.0.0.0") is None
+
+
+def test_partial_overlap_and_explicit_range():
+    table = make_table(("192.168.0.0-192.168.0.200", "off"), ("192.168.0.100-192.168.1.10", "on"))
+    assert table.lookup("192.168.0.99") == "off"
+    assert table.lookup("192.168.0.100") == "on"
+    assert table.lookup("192.168.1.10") == "on"
+    assert table.lookup("192.168.1.11") is None
+
+
+def test_merge_ranges_output_is_sorted_and_disjoint():
+    merged = _merge_ranges([(0, 100, 0), (10, 20, 1), (15, 30, 0), (90, 200, 1)])
+    assert all(a[1] < b[0] for a, b in zip(merged, merged[1:]))
+    assert merged[0] == (0, 9, 0) and merged[-1][1] == 200
+
+
+def test_whole_address_space_and_single_hosts():
+    table = make_table(("0.0.0.0/0", "on"), ("8.8.8.8/32", "off"), ("::/0", "on"), ("2001:db8::1/128", "off"))
+    assert table.lookup("0.0.0.0") == table.lookup("255.255.255.255") == "on"
+    assert table.lookup("8.8.8.8") == "off"
+    assert table.lookup("8.8.8.7") == table.lookup("8.8.8.9") == "on"
+    assert table.lookup("::") == table.lookup("ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff") == "on"
+    assert table.lookup("2001:db8::1") == "off"
+    assert table.lookup("2001:db8::2") == "on"
+
+
+def test_ipv6_ranges_across_the_64_bit_split():
+    # 跨越高低64位边界的区间必须按128位整体比较
+    table = make_table(("2001:db8::ffff:ffff:ffff:ff00-2001:db8:0:1::ff", "off"), ("2001:db8:0:1::/64", "on"))
+    assert table.lookup("2001:db8::ffff:ffff:ffff:feff") is None
+    assert table.lookup("2001:db8::ffff:ffff:ffff:ffff") == "off"
+    assert table.lookup("2001:db8:0:1::") == "on"
+    assert table.lookup("2001:db8:0:1:ffff:ffff:ffff:ffff") == "on"
+    assert table.lookup("2001:db8:0:2::") is None
+
+
+def test_ipv4_and_ipv6_are_separate():
+    table = make_table(("0.0.0.0/0", "on"))
+    assert table.lookup("::1") is None
+    assert table.lookup("::ffff:1.2.3.4") is None
+
+
+def test_compile_keeps_earlier_ranges():
+    table = make_table(("10.0.0.0/8", "off"))
+    table.add("172.16.0.0/12", "on")
+    assert table.lookup("172.16.0.1") is None  # compile之前不生效
+    table.compile()
+    assert table.lookup("10.1.1.1") == "off"
+    assert table.lookup("172.16.0.1") == "on"
+
+
+def test_invalid_input():
+    table = make_table(("10.0.0.0/8", "off"))
+    assert table.lookup("not-an-ip") is None
+    with pytest.raises(ValueError):
+        table.add("10.0.0.9-10.0.0.1", "off")
+    with pytest.raises(ValueError):
+        table.add("10.0.0.1-::1", "off")
+
+
+def test_nested_range_extending_past_its_parent():
+    table = make_table(("10.0.0.0-10.0.0.100", "off"), ("10.0.0.10-10.0.0.20", "on"), ("10.0.0.15-10.0.0.30", "off"))
+    assert table.lookup("10.0.0.14") == "on"
+    assert table.lookup("10.0.0.21") == "off"
+    assert table.lookup("10.0.0.31") == "off"
+    assert len(table) == 3
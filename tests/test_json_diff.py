@@ -0,0 +1,92 @@
+import copy
+import io
+import json
+import random
+
+import pytest
+
+from monitor.json_diff import DiffCache, iter_json_diff
+
+
+def _opener(document):
+    data = json.dumps(document).encode("utf-8")
+    return lambda: io.BytesIO(data)
+
+
+def _diff(a, b):
+    return list(iter_json_diff(_opener(a), _opener(b)))
+
+
+def _apply(document, operations):
+    """按JSON-Patch操作修改文档（只支持iter_json_diff产出的add/remove/replace）"""
+    document = copy.deepcopy(document)
+    for operation in operations:
+        parts = [part.replace("~1", "/").replace("~0", "~") for part in operation["path"].split("/")[1:]]
+        if not parts:
+            document = copy.deepcopy(operation["value"])
+            continue
+        parent = document
+        for part in parts[:-1]:
+            parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+        key = int(parts[-1]) if isinstance(parent, list) else parts[-1]
+        if operation["op"] == "remove":
+            del parent[key]
+        elif isinstance(parent, list) and operation["op"] == "add":
+            parent.insert(key, copy.deepcopy(operation["value"]))
+        else:
+            parent[key] = copy.deepcopy(operation["value"])
+    return document
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ({}, []),
+        ([], {}),
+        ({"a": {"a": {}}}, {"a": {"a": []}}),
+        ({"a": [[], {}]}, {"a": [{}, []]}),
+        ({"x": 1, "y": [1, 2, 3]}, {"x": 1, "y": [1, 3]}),
+        ({"k": "v" * 1000}, {"k": "w" * 1000}),
+        ({"a~/b": 1}, {"a~/b": 2}),
+        (1, "1"),
+    ],
+)
+def test_round_trip(a, b):
+    assert _apply(a, _diff(a, b)) == b
+
+
+def test_identical_documents_have_no_operations():
+    document = {"b": [1, {"c": None}], "a": {}}
+    assert _diff(document, json.loads(json.dumps(document))) == []
+
+
+def _random_value(rng, depth):
+    choice = rng.randrange(7 if depth < 3 else 4)
+    if choice == 0:
+        return rng.randrange(3)
+    if choice == 1:
+        return rng.choice(["a", "b", 1.5, True, None])
+    if choice == 2:
+        return {}
+    if choice == 3:
+        return []
+    if choice in (4, 5):
+        return {rng.choice("abc"): _random_value(rng, depth + 1) for _ in range(rng.randrange(3))}
+    return [_random_value(rng, depth + 1) for _ in range(rng.randrange(3))]
+
+
+def test_random_round_trip():
+    rng = random.Random(1234)
+    for _ in range(500):
+        a = _random_value(rng, 0)
+        b = _random_value(rng, 0)
+        assert _apply(a, _diff(a, b)) == b, (a, b)
+
+
+def test_diff_cache_round_trip(tmp_path):
+    a, b = {"a": {}}, {"a": []}
+    cache = DiffCache(tmp_path)
+    operations = cache.diff("ha", "hb", _opener(a), _opener(b))
+    assert _apply(a, operations) == b
+    # 新实例从磁盘读取缓存，不再计算
+    assert DiffCache(tmp_path).diff("ha", "hb", None, None) == operations
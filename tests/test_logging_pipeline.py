@@ -0,0 +1,157 @@
+import atexit
+import json
+import logging
+import threading
+
+import pytest
+
+from monitor import logging_pipeline
+from monitor.logging_pipeline import DebugSampler, TimedQueueHandler, setup_logging
+
+
+@pytest.fixture
+def pipeline_config(tmp_path):
+    """只有一个小轮转文件处理器的日志配置；测试结束时停止并移除本测试建立的管道"""
+    config = {
+        "version": 1,
+        "handlers": {
+            "file": {
+                "class": "logging.handlers.RotatingFileHandler",
+                "level": "DEBUG",
+                "filename": str(tmp_path / "unused.log"),
+                "maxBytes": 64 * 1024,
+                "backupCount": 50,
+            },
+        },
+        "loggers": {"test": {"level": "DEBUG", "handlers": ["file"], "propagate": False}},
+    }
+    path = tmp_path / "logging.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    before = set(logging_pipeline._pipelines)
+    yield path
+    for name in set(logging_pipeline._pipelines) - before:
+        pipeline = logging_pipeline._pipelines.pop(name)
+        pipeline.stop()
+        atexit.unregister(pipeline.stop)
+
+
+def read_json_lines(directory, stem):
+    """按写入顺序读取轮转文件（编号越大越旧，未编号的是当前文件）"""
+    def age(path):
+        suffix = path.name[len(f"{stem}.jsonl"):].lstrip(".")
+        return int(suffix) if suffix else 0
+
+    lines = []
+    for path in sorted(directory.glob(f"{stem}.jsonl*"), key=age, reverse=True):
+        lines += path.read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def make_record(msg="tick %d", created=1000.0, level=logging.DEBUG):
+    record = logging.LogRecord("FounderMonitor", level, __file__, 1, msg, (0,), None)
+    record.created = created
+    return record
+
+
+def test_burst_then_sampling():
+    sampler = DebugSampler(burst=3, sample_every=10, window=60)
+    kept = [sampler.filter(make_record()) for _ in range(30)]
+    assert kept[:3] == [True] * 3
+    assert [i + 1 for i, keep in enumerate(kept) if keep][3:] == [10, 20, 30]
+    assert sampler.dropped == 24
+
+
+def test_sampled_out_count_and_window_reset():
+    sampler = DebugSampler(burst=1, sample_every=5, window=60)
+    records = [make_record() for _ in range(5)]
+    assert [sampler.filter(record) for record in records] == [True, False, False, False, True]
+    assert records[4].sampled_out == 3
+
+    sampler.filter(make_record())
+    fresh = make_record(created=1061.0)
+    assert sampler.filter(fresh)
+    assert fresh.sampled_out == 1
+    assert sampler.filter(make_record(level=logging.INFO))
+
+
+def test_counts_are_exact_across_threads():
+    sampler = DebugSampler(burst=10, sample_every=100, window=3600)
+    threads_count, per_thread = 8, 5000
+    kept = []
+    barrier = threading.Barrier(threads_count)
+
+    def worker():
+        barrier.wait()
+        kept.append(sum(sampler.filter(make_record()) for _ in range(per_thread)))
+
+    threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = threads_count * per_thread
+    expected_kept = 10 + total // 100  # 前10条，加上第100、200……条
+    assert sum(kept) == expected_kept
+    assert sampler.dropped == total - expected_kept
+
+
+def test_repeated_setup_adds_no_handlers(tmp_path, pipeline_config):
+    filename = tmp_path / "a.jsonl"
+    logger = setup_logging("FounderTestRepeat", "test", filename=filename, config_path=pipeline_config)
+    again = setup_logging("FounderTestRepeat", "test", filename=filename, config_path=pipeline_config)
+    assert again is logger
+    assert [type(h) for h in logger.handlers if isinstance(h, TimedQueueHandler)] == [TimedQueueHandler]
+
+    # 不同的文件不会生效，原文件中留下警告
+    setup_logging("FounderTestRepeat", "test", filename=tmp_path / "b.jsonl", config_path=pipeline_config)
+    logging_pipeline._pipelines["FounderTestRepeat"].stop()
+    assert not (tmp_path / "b.jsonl").exists()
+    (warning,) = read_json_lines(tmp_path, "a")
+    assert warning["level"] == "WARNING" and "b.jsonl" in warning["msg"]
+
+
+def test_monitor_construction_reuses_the_pipeline(tmp_path, monkeypatch):
+    from monitor.founder_health_monitor import FounderHealthMonitor
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    (tmp_path / ".openclaw").mkdir()
+    monitors = [FounderHealthMonitor(), FounderHealthMonitor()]
+    try:
+        assert monitors[0].logger is monitors[1].logger
+        # 只数管道自己的入队处理器（pytest的日志捕获也会给logger加处理器）
+        queue_handlers = [h for h in monitors[0].logger.handlers if isinstance(h, TimedQueueHandler)]
+        assert len(queue_handlers) == 1
+    finally:
+        for monitor in monitors:
+            monitor.timeseries.close()
+
+
+def test_json_lines_include_extra_fields_and_exceptions(tmp_path, pipeline_config):
+    logger = setup_logging("FounderTestJson", "test", filename=tmp_path / "json.jsonl", config_path=pipeline_config)
+    logger.info("探测 %s", "gateway", extra={"latency_ms": 12.5, "route": "direct"})
+    try:
+        raise RuntimeError("多行\n消息")
+    except RuntimeError:
+        logger.exception("失败")
+    logging_pipeline._pipelines["FounderTestJson"].stop()
+
+    info, error = read_json_lines(tmp_path, "json")
+    assert info["msg"] == "探测 gateway" and info["logger"] == "FounderTestJson"
+    assert (info["latency_ms"], info["route"]) == (12.5, "direct")
+    assert "exc" not in info
+    assert error["level"] == "ERROR"
+    assert "RuntimeError: 多行" in error["exc"]
+
+
+def test_stop_flushes_queued_records_to_rotating_files(tmp_path, pipeline_config):
+    logger = setup_logging("FounderTestFlush", "test", filename=tmp_path / "flush.jsonl", config_path=pipeline_config)
+    count = 2000
+    for i in range(count):
+        logger.info("record %d", i)
+    pipeline = logging_pipeline._pipelines["FounderTestFlush"]
+    pipeline.stop()
+
+    assert len(list(tmp_path.glob("flush.jsonl.*"))) > 1  # 已轮转
+    assert [record["msg"] for record in read_json_lines(tmp_path, "flush")] == [f"record {i}" for i in range(count)]
+    assert pipeline.stats()["queue_dropped"] == 0
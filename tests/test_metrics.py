@@ -0,0 +1,136 @@
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from monitor.metrics import (
+    OPENMETRICS_CONTENT_TYPE,
+    PROMETHEUS_CONTENT_TYPE,
+    GatewayMetrics,
+    MetricsRegistry,
+    MetricsServer,
+)
+
+
+def sample_lines(text):
+    return [line for line in text.splitlines() if line and not line.startswith("#")]
+
+
+def test_counter_exposition():
+    registry = MetricsRegistry()
+    counter = registry.counter("founder_probes", "探测次数", ("site", "result"))
+    counter.labels("百度", "success").inc()
+    counter.labels("百度", "success").inc(2)
+    counter.labels('a"b\\c\nd', "failure").inc()
+
+    text = registry.render()
+    assert "# TYPE founder_probes_total counter" in text
+    assert sample_lines(text) == [
+        'founder_probes_total{site="百度",result="success"} 3',
+        'founder_probes_total{site="a\\"b\\\\c\\nd",result="failure"} 1',
+    ]
+    with pytest.raises(ValueError):
+        counter.labels("x", "y").inc(-1)
+    with pytest.raises(ValueError):
+        counter.labels("only-one")
+
+
+def test_openmetrics_format():
+    registry = MetricsRegistry()
+    registry.counter("founder_restarts", "重启次数").inc()
+    text = registry.render(openmetrics=True)
+    assert "# TYPE founder_restarts counter" in text
+    assert "founder_restarts_total 1" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("founder_latency_seconds", "延迟", buckets=(0.1, 1.0, float("inf")))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert sample_lines(registry.render()) == [
+        'founder_latency_seconds_bucket{le="0.1"} 2',
+        'founder_latency_seconds_bucket{le="1.0"} 3',
+        'founder_latency_seconds_bucket{le="+Inf"} 4',
+        "founder_latency_seconds_sum 3.65",
+        "founder_latency_seconds_count 4",
+    ]
+
+
+def test_gauge_function_is_read_at_scrape_time():
+    registry = MetricsRegistry()
+    state = {"value": 1}
+    gauge = registry.gauge("founder_up", "是否正常", ("target",))
+    gauge.labels("a").set_function(lambda: state["value"])
+    gauge.labels("b").set_function(lambda: 1 / 0)
+    assert 'founder_up{target="a"} 1' in registry.render()
+    state["value"] = 0
+    text = registry.render()
+    assert 'founder_up{target="a"} 0' in text
+    assert 'founder_up{target="b"} NaN' in text
+    assert registry.scrapes == 2
+
+
+def test_registration_is_idempotent_but_checked():
+    registry = MetricsRegistry()
+    first = registry.gauge("founder_value", "值", ("target",))
+    assert registry.gauge("founder_value", "值", ("target",)) is first
+    with pytest.raises(ValueError):
+        registry.counter("founder_value", "值", ("target",))
+    with pytest.raises(ValueError):
+        registry.gauge("founder_value", "值", ("other",))
+
+
+def test_concurrent_increments_are_not_lost():
+    registry = MetricsRegistry()
+    slot = registry.counter("founder_hits", "次数").labels()
+
+    def worker():
+        for _ in range(10000):
+            slot.inc()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert slot.get() == 80000
+
+
+def test_gateway_metrics_share_families():
+    registry = MetricsRegistry()
+    first, second = GatewayMetrics(registry, "gw1"), GatewayMetrics(registry, "gw2")
+    first.observe_status(12.0)
+    first.observe_status(None)
+    second.record_restart(True, 3.0)
+    second.record_denied()
+    text = registry.render()
+    assert 'founder_gateway_status_probes_total{target="gw1",result="success"} 1' in text
+    assert 'founder_gateway_status_probes_total{target="gw1",result="failure"} 1' in text
+    assert 'founder_gateway_status_latency_seconds_bucket{target="gw1",le="0.025"} 1' in text
+    assert 'founder_gateway_restarts_total{target="gw2",result="success"} 1' in text
+    assert 'founder_gateway_restarts_total{target="gw2",result="denied"} 1' in text
+    assert 'founder_gateway_restart_duration_seconds_count{target="gw2",result="success"} 1' in text
+
+
+def test_metrics_server_negotiates_format():
+    registry = MetricsRegistry()
+    registry.counter("founder_scraped", "测试").inc()
+    server = MetricsServer(registry, port=0).start()
+    try:
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+            assert b"founder_scraped_total 1" in response.read()
+
+        request = urllib.request.Request(server.url, headers={"Accept": "application/openmetrics-text"})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.headers["Content-Type"] == OPENMETRICS_CONTENT_TYPE
+            assert response.read().endswith(b"# EOF\n")
+
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(server.url.replace("/metrics", "/other"), timeout=5)
+        assert exc.value.code == 404
+    finally:
+        server.stop()
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+
+from network.founder_network_manager import FounderNetworkManager, _split_options
+from network.ip_ranges import IPRangeTable
+from network.proxy_router import ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY
+from network.rule_loader import RuleSetLoader
+
+
+def manager_with_routes(routes):
+    """只带探测引擎的管理器：每个探测按给定路由返回结果"""
+    manager = FounderNetworkManager.__new__(FounderNetworkManager)
+    manager.probe_engine = SimpleNamespace(
+        run_sync=lambda probes: [
+            {"name": probe["name"], "url": probe["url"], "route": probe["route"], "success": True, "latency_ms": 1.0}
+            for probe in probes
+        ]
+    )
+    manager._probes = [{"name": f"site{i}", "url": f"https://site{i}.test", "route": r} for i, r in enumerate(routes)]
+    manager._domestic_probes = manager._international_probes = lambda: manager._probes
+    return manager
+
+
+@pytest.mark.parametrize("routes, state", [
+    ([ROUTE_DIRECT, ROUTE_DIRECT], "off"),
+    ([ROUTE_HTTP_PROXY, ROUTE_SOCKS5_PROXY], "on"),
+    ([ROUTE_DIRECT, ROUTE_HTTP_PROXY, ROUTE_HTTP_PROXY], "mixed"),
+    ([], "off"),
+])
+def test_connection_tests_report_the_routes_used(routes, state):
+    manager = manager_with_routes(routes)
+    for result in (manager.test_domestic_connection(), manager.test_international_connection()):
+        assert result["proxy_state"] == state
+        assert sum(result["routes"].values()) == len(routes)
+        assert [probe["route"] for probe in result["results"]] == routes
+
+
+def test_international_sites_routed_directly_report_off():
+    # 自适应路由把国际站点切到直连时，不能再报告"on"
+    result = manager_with_routes([ROUTE_DIRECT] * 3).test_international_connection()
+    assert result["proxy_state"] == "off"
+    assert result["routes"] == {ROUTE_DIRECT: 3}
+
+
+def test_adaptive_option_is_split_from_arguments():
+    argv, options = _split_options(["proxy", "--adaptive", "8119"])
+    assert argv == ["proxy", "8119"]
+    assert options["adaptive"] is True
+    assert _split_options(["daemon"])[1]["adaptive"] is False
+
+
+def test_unknown_option_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exc:
+        _split_options(["proxy", "--bogus"])
+    assert exc.value.code == 2
+    assert "--bogus" in capsys.readouterr().err
+
+
+def test_ip_range_options():
+    argv, options = _split_options(["daemon", "--direct-ranges", "cn.txt", "--proxy-ranges=us.txt"])
+    assert argv == ["daemon"]
+    assert options["ip_ranges"] == [("cn.txt", "off"), ("us.txt", "on")]
+    with pytest.raises(SystemExit) as exc:
+        _split_options(["proxy", "--direct-ranges"])
+    assert exc.value.code == 2
+
+
+def test_load_ip_ranges_enables_ip_routing(tmp_path):
+    manager = FounderNetworkManager.__new__(FounderNetworkManager)
+    manager.ip_table = IPRangeTable()
+    manager.ip_routing_enabled = False
+    path = tmp_path / "cn.txt"
+    path.write_text("# 注释\n1.0.1.0/24\n\n1.0.8.0-1.0.15.255  # 区间\n", encoding="utf-8")
+
+    assert manager.load_ip_ranges(str(path), "off") == 2
+    assert manager.ip_routing_enabled
+    assert manager.ip_table.lookup("1.0.9.1") == "off"
+
+
+def test_daemon_stats_report_rule_memory(tmp_path):
+    manager = FounderNetworkManager.__new__(FounderNetworkManager)
+    manager.started_at = 0.0
+    manager.current_proxy_state = None
+    manager.control_server = manager.metrics_server = None
+    manager.health_cache = SimpleNamespace(stats=lambda: {})
+    manager.rule_loader = RuleSetLoader()
+    path = tmp_path / "direct.txt"
+    path.write_text("example.com\n10.0.0.0/8\n", encoding="utf-8")
+    manager.rule_loader.add_file(path, "off")
+
+    (rules,) = manager.daemon_stats()["rules"]
+    assert rules["path"] == str(path)
+    assert rules["memory_bytes"] > 0 and rules["bytes_per_rule"] > 0
@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from monitor.notifications import FeishuChannel, NotificationDispatcher, TelegramChannel, channels_from_env
+from network.http_pool import HttpPoolManager
+
+
+class StubApi:
+    """本地桩服务：按预设顺序返回响应，记录收到的请求"""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def respond(self, status, body, headers=None, times=1):
+        self.responses.extend([(status, body, headers or {})] * times)
+
+    def texts(self):
+        return [
+            body["text"] if "text" in body else body["content"]["text"]
+            for _, body, _ in self.requests
+        ]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append((self.path, body, time.monotonic()))
+                    status, data, headers = stub.responses.pop(0) if stub.responses else (200, None, {})
+                if data is None:
+                    data = {"ok": True} if "/bot" in self.path else {"code": 0, "msg": "success"}
+                payload = json.dumps(data).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def stub():
+    api = StubApi()
+    api.thread.start()
+    yield api
+    api.server.shutdown()
+    api.server.server_close()
+
+
+@pytest.fixture
+def http_pool():
+    pool = HttpPoolManager()
+    yield pool
+    pool.close()
+
+
+def telegram(stub, **kwargs):
+    env = {"TELEGRAM_BOT_TOKEN": "123:abc", "TELEGRAM_CHAT_ID": "42", "TELEGRAM_API_BASE": stub.base_url}
+    (channel,) = channels_from_env(env)
+    assert isinstance(channel, TelegramChannel) and channel.base_url == stub.base_url
+    for name, value in kwargs.items():
+        setattr(channel, name, value)
+    return channel
+
+
+def feishu(stub, **kwargs):
+    (channel,) = channels_from_env({"FEISHU_BOT_TOKEN": "hook-token", "FEISHU_API_BASE": stub.base_url})
+    assert isinstance(channel, FeishuChannel)
+    for name, value in kwargs.items():
+        setattr(channel, name, value)
+    return channel
+
+
+def test_many_events_coalesce_into_one_digest(stub, http_pool):
+    dispatcher = NotificationDispatcher([telegram(stub)], http_pool, coalesce_window=0.5)
+    for i in range(30):
+        dispatcher.notify("gateway_down", "Gateway无响应", level="critical", source="node-a")
+    for i in range(5):
+        dispatcher.notify("disk", f"磁盘使用率{90 + i}%", source="node-b")
+    time.sleep(1.0)
+    dispatcher.stop()
+
+    assert len(stub.requests) == 1
+    path, body, _ = stub.requests[0]
+    assert path == "/bot123:abc/sendMessage" and body["chat_id"] == "42"
+    text = body["text"]
+    assert "35条事件" in text
+    assert "[node-a] Gateway无响应 ×30" in text
+    assert text.count("磁盘使用率") == 5
+    assert dispatcher.stats()["digests"] == 1
+    assert dispatcher.stats()["channels"]["Telegram"]["sent"] == 1
+
+
+def test_telegram_429_honours_retry_after(stub, http_pool):
+    stub.respond(429, {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 0.5}})
+    channel = telegram(stub, initial_backoff=0.01)
+    dispatcher = NotificationDispatcher([channel], http_pool, coalesce_window=0.01)
+    dispatcher.notify("gateway_down", "Gateway无响应")
+    time.sleep(0.1)
+    dispatcher.stop()
+
+    assert len(stub.requests) == 2
+    assert stub.requests[1][2] - stub.requests[0][2] >= 0.5
+    assert channel.stats()["sent"] == 1 and channel.stats()["retries"] == 1
+
+
+def test_feishu_5xx_retries_then_succeeds(stub, http_pool):
+    stub.respond(503, {"code": -1, "msg": "unavailable"}, times=2)
+    channel = feishu(stub, initial_backoff=0.01)
+    dispatcher = NotificationDispatcher([channel], http_pool, coalesce_window=0.01)
+    dispatcher.notify("gateway_down", "Gateway无响应")
+    dispatcher.stop()
+
+    assert len(stub.requests) == 3
+    assert stub.requests[0][0] == "/open-apis/bot/v2/hook/hook-token"
+    assert stub.requests[-1][1]["msg_type"] == "text"
+    assert channel.stats() == {"sent": 1, "failed": 0, "retries": 2, "last_error": channel.last_error}
+
+
+def test_5xx_gives_up_after_max_attempts(stub, http_pool):
+    stub.respond(500, {"ok": False, "description": "Internal Server Error"}, times=10)
+    channel = telegram(stub, max_attempts=3, initial_backoff=0.01)
+    dispatcher = NotificationDispatcher([channel], http_pool, coalesce_window=0.01)
+    dispatcher.notify("gateway_down", "Gateway无响应")
+    dispatcher.stop()
+
+    assert len(stub.requests) == 3
+    stats = channel.stats()
+    assert stats["sent"] == 0 and stats["failed"] == 1 and stats["retries"] == 2
+    assert "HTTP 500" in stats["last_error"]
+
+
+def test_client_error_is_not_retried(stub, http_pool):
+    stub.respond(400, {"ok": False, "description": "Bad Request: chat not found"})
+    channel = telegram(stub, initial_backoff=0.01)
+    dispatcher = NotificationDispatcher([channel], http_pool, coalesce_window=0.01)
+    dispatcher.notify("gateway_down", "Gateway无响应")
+    dispatcher.stop()
+
+    assert len(stub.requests) == 1
+    assert channel.stats()["failed"] == 1 and channel.stats()["retries"] == 0
+
+
+def test_queue_overflow_drops_oldest_events(stub, http_pool):
+    dispatcher = NotificationDispatcher([telegram(stub)], http_pool, max_queue=3, coalesce_window=0.5)
+    for i in range(5):
+        dispatcher.notify("event", f"事件{i}")
+    assert dispatcher.stats()["dropped"] == 2
+    assert dispatcher.stats()["queued"] == 3
+    dispatcher.stop()
+
+    (text,) = stub.texts()
+    assert "事件0" not in text and "事件1" not in text
+    assert all(f"事件{i}" in text for i in (2, 3, 4))
+    assert dispatcher.stats()["received"] == 5
+
+
+def test_stop_flushes_pending_events(stub, http_pool):
+    dispatcher = NotificationDispatcher([telegram(stub), feishu(stub)], http_pool, coalesce_window=60)
+    dispatcher.notify("gateway_down", "Gateway无响应", level="critical")
+    dispatcher.notify("gateway_up", "Gateway已恢复", level="info")
+    started = time.monotonic()
+    dispatcher.stop(timeout=10)
+
+    assert time.monotonic() - started < 10
+    texts = stub.texts()
+    assert len(texts) == 2
+    for text in texts:
+        assert "Gateway无响应" in text and "Gateway已恢复" in text
+    assert dispatcher.stats()["queued"] == 0
+
+
+def test_notify_without_channels_is_disabled(http_pool):
+    dispatcher = NotificationDispatcher([], http_pool)
+    assert not dispatcher.enabled
+    assert dispatcher.notify("event", "消息") is False
+    dispatcher.stop()
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from network.probe_engine import ProbeEngine
+from network.proxy_router import ROUTE_DIRECT, ROUTE_HTTP_PROXY
+
+
+class StubPool:
+    """按URL返回预设行为的连接池：数字为延迟秒数，异常实例直接抛出"""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+
+    async def fetch(self, url, route, timeout):
+        self.calls.append((url, route, timeout))
+        action = self.behaviour[url]
+        if isinstance(action, BaseException):
+            raise action
+        if action > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError()
+        await asyncio.sleep(action)
+        status = 500 if url.endswith("/error") else 200
+        return {"status_code": status, "latency_ms": action * 1000, "phases": {}, "reused_connection": False}
+
+    def run(self, coro):
+        return asyncio.run(coro)
+
+
+def spec(url, **extra):
+    return {"name": url.rsplit("/", 1)[-1], "url": url, **extra}
+
+
+def test_probes_run_concurrently():
+    pool = StubPool({f"https://t/{i}": 0.2 for i in range(10)})
+    engine = ProbeEngine(pool=pool)
+    started = time.monotonic()
+    results = engine.run_sync([spec(f"https://t/{i}") for i in range(10)])
+    assert time.monotonic() - started < 1.0
+    assert [r["name"] for r in results] == [str(i) for i in range(10)]
+    assert all(r["success"] for r in results)
+
+
+def test_result_fields_and_routes():
+    pool = StubPool({"https://t/ok": 0, "https://t/error": 0, "https://t/refused": ConnectionRefusedError()})
+    engine = ProbeEngine(pool=pool)
+    ok, error, refused = engine.run_sync([
+        spec("https://t/ok", route=ROUTE_HTTP_PROXY, proxy="http://127.0.0.1:4780"),
+        spec("https://t/error"),
+        spec("https://t/refused"),
+    ])
+    assert ok["success"] and ok["route"] == ROUTE_HTTP_PROXY and ok["proxy_state"] == "on"
+    assert not error["success"] and error["status_code"] == 500
+    assert not refused["success"] and refused["error"] == "ConnectionRefusedError"
+    # 未指定路由时走直连连接池
+    assert [call[1] for call in pool.calls] == [ROUTE_HTTP_PROXY, ROUTE_DIRECT, ROUTE_DIRECT]
+
+
+def test_per_probe_timeout():
+    pool = StubPool({"https://t/slow": 5, "https://t/fast": 0})
+    results = ProbeEngine(probe_timeout=0.1, pool=pool).run_sync([spec("https://t/slow"), spec("https://t/fast")])
+    assert results[0]["error"] == "timeout"
+    assert results[1]["success"]
+
+
+def test_overall_deadline_cancels_pending_probes():
+    pool = StubPool({"https://t/slow": 5, "https://t/fast": 0})
+    engine = ProbeEngine(probe_timeout=10, overall_timeout=0.2, pool=pool)
+    started = time.monotonic()
+    slow, fast = engine.run_sync([spec("https://t/slow"), spec("https://t/fast")])
+    assert time.monotonic() - started < 1.0
+    assert slow["error"] == "deadline exceeded" and not slow["success"]
+    assert fast["success"]
+
+
+def test_observer_sees_every_result():
+    seen = []
+    pool = StubPool({"https://t/a": 0, "https://t/b": RuntimeError("boom")})
+    ProbeEngine(pool=pool, observer=seen.append).run_sync([spec("https://t/a"), spec("https://t/b")])
+    assert [(r["name"], r["success"]) for r in seen] == [("a", True), ("b", False)]
+    assert seen[1]["error"] == "boom"
@@ -0,0 +1,99 @@
+import os
+import re
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from monitor.process_tracker import (
+    GATEWAY_PROCESS_PATTERN,
+    ProcessTracker,
+    find_processes,
+    find_processes_by_patterns,
+)
+
+
+@pytest.fixture
+def spawn(tmp_path):
+    """启动命令行中带唯一标记的睡眠进程"""
+    processes = []
+
+    def start(tag):
+        script = tmp_path / f"{tag}.py"
+        script.write_text("import time\ntime.sleep(60)\n")
+        process = subprocess.Popen([sys.executable, str(script)])
+        processes.append(process)
+        return process
+
+    yield start
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+@pytest.mark.parametrize("cmdline, matches", [
+    ("openclaw gateway --port 18789", True),
+    ("/usr/local/bin/openclaw gateway", True),
+    ("node /opt/lib/openclaw.mjs gateway --verbose", True),
+    ("openclaw.js gateway", True),
+    ("openclaw status", False),
+    ("python3 /home/u/.openclaw/monitor.py gateway", False),
+    ("myopenclaw gateway", False),
+    ("openclaw gateways", False),
+])
+def test_gateway_pattern(cmdline, matches):
+    assert bool(re.search(GATEWAY_PROCESS_PATTERN, cmdline)) == matches
+
+
+def test_find_processes_excludes_own_lineage(spawn):
+    process = spawn("tracked_worker")
+    assert [p.pid for p in find_processes("tracked_worker")] == [process.pid]
+    # 当前进程的命令行一定匹配自身，必须被排除
+    own_cmdline = re.escape(" ".join(psutil.Process().cmdline()))
+    assert os.getpid() not in [p.pid for p in find_processes(own_cmdline)]
+
+
+def test_find_processes_by_patterns_single_scan(spawn):
+    first, second = spawn("worker_alpha"), spawn("worker_beta")
+    result = find_processes_by_patterns({"a": "worker_alpha", "b": "worker_beta", "none": "worker_gamma"})
+    assert result == {"a": [first.pid], "b": [second.pid], "none": []}
+
+
+def test_tracker_rescans_only_when_tracked_process_exits(spawn):
+    process = spawn("gateway_worker")
+    tracker = ProcessTracker("gateway_worker", rescan_interval=60)
+    assert tracker.pids() == [process.pid]
+    scans = tracker.scan_count
+    for _ in range(5):
+        assert tracker.pids() == [process.pid]
+    assert tracker.scan_count == scans
+
+    process.kill()
+    process.wait()
+    assert tracker.pids() == []
+    assert tracker.scan_count == scans + 1
+
+
+def test_empty_tracker_rate_limits_scans(spawn):
+    tracker = ProcessTracker("never_started_worker", min_scan_interval=60)
+    assert tracker.pids() == []
+    assert tracker.pids() == []
+    assert tracker.scan_count == 1
+
+    # invalidate之后立即重新扫描
+    tracker.invalidate()
+    assert tracker.pids() == []
+    assert tracker.scan_count == 2
+
+
+def test_periodic_rescan_finds_new_workers(spawn):
+    first = spawn("pool_worker")
+    tracker = ProcessTracker("pool_worker", rescan_interval=0.2)
+    assert tracker.pids() == [first.pid]
+    second = spawn("pool_worker_2")
+    assert tracker.pids() == [first.pid]
+    time.sleep(0.25)
+    assert tracker.pids() == sorted([first.pid, second.pid])
+    assert {p.pid for p in tracker.processes()} == {first.pid, second.pid}
@@ -0,0 +1,125 @@
+import random
+
+from monitor.responsiveness import (
+    STATE_DEGRADED,
+    STATE_HEALTHY,
+    STATE_HUNG,
+    STATE_UNKNOWN,
+    LatencyHistogram,
+    ResponsivenessDetector,
+    WindowedHistogram,
+)
+
+NOW = 1_000_000.0
+
+
+def feed(detector, latencies, start=NOW, step=1.0):
+    now = start
+    for latency in latencies:
+        detector.record(latency, now)
+        now += step
+    return now
+
+
+def test_unknown_until_enough_samples():
+    detector = ResponsivenessDetector(min_samples=5)
+    now = feed(detector, [20.0] * 4)
+    assert detector.evaluate(now)["state"] == STATE_UNKNOWN
+    now = feed(detector, [20.0], start=now)
+    assert detector.evaluate(now)["state"] == STATE_HEALTHY
+
+
+def test_slow_p99_is_degraded_then_recovers():
+    detector = ResponsivenessDetector(degraded_p99_ms=2000, long_window=300)
+    now = feed(detector, [20.0] * 10 + [5000.0])
+    result = detector.evaluate(now)
+    assert result["state"] == STATE_DEGRADED
+    assert "p99" in result["reason"]
+
+    # 慢样本滑出长窗口后恢复正常
+    now = feed(detector, [20.0] * 10, start=now + 300)
+    assert detector.evaluate(now)["state"] == STATE_HEALTHY
+
+
+def test_failure_rate_is_degraded():
+    detector = ResponsivenessDetector(degraded_failure_rate=0.1, hung_failure_rate=0.5, short_window=60)
+    now = feed(detector, ([20.0] * 8 + [None]) * 2, step=10)
+    result = detector.evaluate(now)
+    assert result["state"] == STATE_DEGRADED
+    assert "失败率" in result["reason"]
+
+
+def test_consecutive_failures_are_hung():
+    detector = ResponsivenessDetector(hung_consecutive=3)
+    now = feed(detector, [20.0] * 10 + [None, None])
+    assert detector.evaluate(now)["state"] != STATE_HUNG
+    now = feed(detector, [None], start=now)
+    result = detector.evaluate(now)
+    assert result["state"] == STATE_HUNG
+    assert result["consecutive_failures"] == 3
+
+    # 一次成功的探测清零连续失败计数
+    now = feed(detector, [20.0], start=now)
+    assert detector.evaluate(now)["consecutive_failures"] == 0
+
+
+def test_short_window_failure_rate_is_hung():
+    detector = ResponsivenessDetector(hung_consecutive=100, hung_failure_rate=0.5, short_window=60, min_samples=5)
+    now = feed(detector, [20.0, None] * 5, step=2)
+    assert detector.evaluate(now)["state"] == STATE_HUNG
+
+
+def test_state_since_changes_only_on_transition():
+    detector = ResponsivenessDetector()
+    now = feed(detector, [20.0] * 5)
+    detector.evaluate(now)
+    since = detector.state_since
+    now = feed(detector, [20.0] * 5, start=now)
+    detector.evaluate(now)
+    assert detector.state_since == since
+
+    now = feed(detector, [None] * 3, start=now)
+    detector.evaluate(now)
+    assert detector.state == STATE_HUNG
+    assert detector.state_since == now
+
+
+def test_reset_returns_to_unknown():
+    detector = ResponsivenessDetector()
+    now = feed(detector, [None] * 5)
+    assert detector.evaluate(now)["state"] == STATE_HUNG
+    detector.reset()
+    assert detector.state == STATE_UNKNOWN
+    assert detector.evaluate(now)["long_window"]["samples"] == 0
+
+
+def test_histogram_percentiles_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.uniform(0.1, 30000.0) for _ in range(5000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(len(values) * q + 0.5) - 1]
+        # 取桶上界：不低于真实值，相对误差不超过1/2^(sub_bucket_bits-1)
+        assert exact - 0.001 <= histogram.percentile(q) <= exact * (1 + 1 / 16) + 0.001
+
+
+def test_histogram_clamps_to_highest_value():
+    histogram = LatencyHistogram(highest_ms=1000)
+    histogram.record(5000)
+    # 超出上限的值按上限所在的桶记录
+    assert 1000 <= histogram.percentile(1.0) <= 1000 * (1 + 1 / 16)
+    assert LatencyHistogram().percentile(0.5) is None
+
+
+def test_windowed_histogram_reuses_expired_slices():
+    window = WindowedHistogram(window=60, slices=6)
+    window.record(10.0, NOW)
+    window.record_failure(NOW)
+    assert window.snapshot(NOW)["samples"] == 2
+    # 一个窗口之后同一段被复用，旧数据清空
+    window.record(10.0, NOW + 60)
+    assert window.snapshot(NOW + 60)["samples"] == 1
+    assert window.snapshot(NOW + 60)["failure_rate"] == 0.0
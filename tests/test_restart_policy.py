@@ -0,0 +1,238 @@
+import random
+import sys
+import textwrap
+
+import pytest
+
+from monitor.gateway_restart import GatewayRestartOrchestrator
+from monitor.restart_policy import BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN, RestartPolicy
+
+
+def make_policy(clock, **kwargs):
+    settings = dict(
+        capacity=3, refill_per_hour=3, base_backoff=10, max_backoff=600, jitter=0.0,
+        stable_after=120, trip_after=5, open_duration=1800, clock=clock, rng=random.Random(0),
+    )
+    settings.update(kwargs)
+    return RestartPolicy(**settings)
+
+
+def test_token_bucket_exhaustion_and_refill(fake_clock):
+    policy = make_policy(fake_clock, stable_after=0)
+    for _ in range(3):
+        assert policy.acquire()[0]
+        policy.record_result(True)
+    allowed, reason = policy.acquire()
+    assert not allowed and "预算" in reason
+
+    # 每小时补充3个令牌：20分钟补一个
+    fake_clock.advance(1199)
+    assert not policy.acquire()[0]
+    fake_clock.advance(1)
+    assert policy.acquire()[0]
+    assert not policy.acquire()[0]
+
+
+def test_exponential_backoff_after_failures(fake_clock):
+    policy = make_policy(fake_clock, capacity=100)
+    for expected in (10, 20, 40):
+        assert policy.acquire()[0]
+        policy.record_result(False)
+        fake_clock.advance(expected - 1)
+        allowed, reason = policy.acquire()
+        assert not allowed and "退避" in reason
+        fake_clock.advance(1)
+    assert policy.acquire()[0]
+
+
+def test_backoff_is_capped_and_jittered(fake_clock):
+    policy = make_policy(fake_clock, jitter=0.5, max_backoff=30, trip_after=100, capacity=100)
+    for failures in range(1, 7):
+        policy.acquire()
+        policy.record_result(False)
+        delay = policy.snapshot()["next_allowed_at"] - fake_clock.now
+        nominal = min(10 * 2 ** (failures - 1), 30)
+        assert nominal * 0.5 <= delay <= nominal
+        fake_clock.advance(30)
+
+
+def test_trips_after_consecutive_failures_and_escalates(fake_clock):
+    opened = []
+    policy = make_policy(fake_clock, capacity=100, trip_after=3, on_open=opened.append)
+    for _ in range(3):
+        assert policy.acquire()[0]
+        policy.record_result(False)
+        fake_clock.advance(600)
+    assert policy.breaker == BREAKER_OPEN
+    assert len(opened) == 1 and opened[0]["consecutive_failures"] == 3
+    allowed, reason = policy.acquire()
+    assert not allowed and "熔断" in reason
+
+
+def test_quick_crash_after_success_counts_as_failure(fake_clock):
+    policy = make_policy(fake_clock, capacity=100)
+    assert policy.acquire()[0]
+    policy.record_result(True)
+    fake_clock.advance(30)
+    # 成功后30秒又要重启：上一次重启记为失败，进入退避
+    allowed, _ = policy.acquire()
+    assert not allowed
+    assert policy.snapshot()["consecutive_failures"] == 1
+
+
+def _trip(policy, clock):
+    for _ in range(policy.trip_after):
+        policy.acquire()
+        policy.record_result(False)
+        clock.advance(policy.max_backoff)
+    assert policy.breaker == BREAKER_OPEN
+
+
+def test_half_open_trial_success_closes_breaker(fake_clock):
+    policy = make_policy(fake_clock, capacity=100, trip_after=2, open_duration=100)
+    _trip(policy, fake_clock)
+    fake_clock.advance(100)
+    assert policy.acquire() == (True, "half_open")
+    assert policy.breaker == BREAKER_HALF_OPEN
+    assert not policy.acquire()[0]  # 试探期间不允许第二次重启
+
+    policy.record_result(True)
+    policy.record_healthy()  # 还没有稳定运行stable_after秒
+    assert policy.breaker == BREAKER_HALF_OPEN
+    fake_clock.advance(121)
+    policy.record_healthy()
+    assert policy.breaker == BREAKER_CLOSED
+    assert policy.snapshot()["consecutive_failures"] == 0
+
+
+def test_half_open_trial_failure_retrips_with_longer_duration(fake_clock):
+    policy = make_policy(fake_clock, capacity=100, trip_after=2, open_duration=100)
+    _trip(policy, fake_clock)
+    fake_clock.advance(100)
+    assert policy.acquire()[0]
+    policy.record_result(False)
+    state = policy.snapshot()
+    assert state["breaker"] == BREAKER_OPEN
+    assert state["open_until"] - fake_clock.now == pytest.approx(200)
+
+
+def test_unconfirmed_half_open_success_does_not_stick(fake_clock):
+    # 试探报告成功，但stable_after之后Gateway又失败且期间没有record_healthy：不能永远停在half_open
+    policy = make_policy(fake_clock, capacity=100, trip_after=2, open_duration=100)
+    _trip(policy, fake_clock)
+    fake_clock.advance(100)
+    assert policy.acquire()[0]
+    policy.record_result(True)
+
+    fake_clock.advance(300)
+    assert not policy.acquire()[0]
+    assert policy.breaker == BREAKER_OPEN
+    fake_clock.advance(200)
+    assert policy.acquire() == (True, "half_open")
+
+
+def test_half_open_trial_without_result_times_out(fake_clock):
+    policy = make_policy(fake_clock, capacity=100, trip_after=2, open_duration=100, trial_timeout=600)
+    _trip(policy, fake_clock)
+    fake_clock.advance(100)
+    assert policy.acquire()[0]
+    fake_clock.advance(599)
+    assert policy.acquire() == (False, "正在试探")
+    fake_clock.advance(1)
+    assert not policy.acquire()[0]
+    assert policy.breaker == BREAKER_OPEN
+
+
+def test_state_persists_across_instances(tmp_path, fake_clock):
+    state_path = tmp_path / "restart_policy.json"
+    policy = make_policy(fake_clock, state_path=state_path, capacity=100, trip_after=2)
+    _trip(policy, fake_clock)
+
+    restored = make_policy(fake_clock, state_path=state_path, capacity=100, trip_after=2)
+    assert restored.breaker == BREAKER_OPEN
+    assert not restored.acquire()[0]
+    assert restored.snapshot()["open_until"] == policy.snapshot()["open_until"]
+
+    restored.reset()
+    assert make_policy(fake_clock, state_path=state_path).breaker == BREAKER_CLOSED
+
+
+# ---- 与真实的重启编排器和假Gateway进程一起运行 ----
+
+FAKE_GATEWAY = textwrap.dedent('''
+    import sys
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    if sys.argv[2] == "crash":
+        sys.exit(3)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    HTTPServer(("127.0.0.1", int(sys.argv[1])), Handler).serve_forever()
+''')
+
+
+@pytest.fixture
+def fake_gateway(tmp_path, free_port):
+    script = tmp_path / "fake_openclaw_gateway.py"
+    script.write_text(FAKE_GATEWAY)
+    port = free_port
+    orchestrators = []
+
+    def make(mode: str) -> GatewayRestartOrchestrator:
+        orchestrator = GatewayRestartOrchestrator(
+            start_command=[sys.executable, str(script), str(port), mode],
+            status_url=f"http://127.0.0.1:{port}/status",
+            process_pattern=str(script),
+            stop_timeout=5,
+            ready_timeout=10,
+        )
+        orchestrators.append(orchestrator)
+        return orchestrator
+
+    yield make
+    for orchestrator in orchestrators:
+        orchestrator.stop(graceful=False)
+
+
+def _supervise(policy, orchestrator, clock, attempts):
+    """模拟监控：每次需要重启时先申请，允许时真正重启并上报结果"""
+    results = []
+    for _ in range(attempts):
+        allowed, _ = policy.acquire()
+        if allowed:
+            result = orchestrator.restart()
+            policy.record_result(result["success"])
+            results.append(result["success"])
+        clock.advance(policy.max_backoff)
+    return results
+
+
+def test_crashing_gateway_trips_breaker(fake_gateway, fake_clock):
+    opened = []
+    policy = make_policy(fake_clock, capacity=100, trip_after=3, max_backoff=60, on_open=opened.append)
+    results = _supervise(policy, fake_gateway("crash"), fake_clock, attempts=6)
+    assert results == [False, False, False]
+    assert policy.breaker == BREAKER_OPEN
+    assert len(opened) == 1
+
+
+def test_healthy_gateway_restart_keeps_breaker_closed(fake_gateway, fake_clock):
+    policy = make_policy(fake_clock)
+    orchestrator = fake_gateway("serve")
+    assert policy.acquire()[0]
+    result = orchestrator.restart()
+    assert result["success"], result.get("error")
+    policy.record_result(True)
+    fake_clock.advance(121)
+    policy.record_healthy()
+    assert policy.breaker == BREAKER_CLOSED
+    assert policy.snapshot()["consecutive_failures"] == 0
@@ -0,0 +1,88 @@
+import os
+import time
+
+from network.rule_loader import CompiledRuleSet, RuleSetLoader
+
+
+def write_rules(path, text, mtime=None):
+    path.write_text(text, encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_rule_file_syntax(tmp_path):
+    path = write_rules(tmp_path / "direct.txt", """
+# 国内站点
+baidu.com
+*.qq.com          # 仅子域名
+cdn-*.example.com
+10.0.0.0/8
+192.168.1.1-192.168.1.9
+2001:db8::/32
+""")
+    rules = CompiledRuleSet.compile(path, "off")
+    assert rules.lookup("www.baidu.com") == "off"
+    assert rules.lookup("qq.com") is None
+    assert rules.lookup("mail.qq.com") == "off"
+    assert rules.lookup("cdn-01.example.com") == "off"
+    assert rules.lookup("www.example.com") is None
+    assert rules.lookup("10.2.3.4") == "off"
+    assert rules.lookup("192.168.1.5") == "off"
+    assert rules.lookup("192.168.1.10") is None
+    assert rules.lookup("2001:db8::1") == "off"
+    stats = rules.stats()
+    assert (stats["domains"], stats["networks"], stats["patterns"]) == (2, 3, 1)
+
+
+def test_files_match_in_the_order_added(tmp_path):
+    loader = RuleSetLoader()
+    loader.add_file(write_rules(tmp_path / "direct.txt", "example.com\n"), "off")
+    loader.add_file(write_rules(tmp_path / "proxy.txt", "example.com\nopenai.com\n"), "on")
+    assert loader.lookup("www.example.com") == "off"
+    assert loader.lookup("api.openai.com") == "on"
+    assert loader.lookup("unknown.io") is None
+
+
+def test_reload_only_when_mtime_changes(tmp_path):
+    path = write_rules(tmp_path / "proxy.txt", "openai.com\n", mtime=1000)
+    loader = RuleSetLoader()
+    loader.add_file(path, "on")
+    assert not loader.reload_if_changed()
+
+    write_rules(path, "github.com\n", mtime=2000)
+    assert loader.reload_if_changed()
+    assert loader.lookup("api.openai.com") is None
+    assert loader.lookup("github.com") == "on"
+    assert loader.reload_count == 1
+
+
+def test_unreadable_file_keeps_previous_rules(tmp_path):
+    path = write_rules(tmp_path / "proxy.txt", "openai.com\n")
+    loader = RuleSetLoader()
+    loader.add_file(path, "on")
+    path.unlink()
+    assert not loader.reload_if_changed()
+    assert loader.lookup("openai.com") == "on"
+    assert "proxy.txt" in loader.last_error
+
+    path.write_bytes(b"\xff\xfe invalid utf-8")
+    assert not loader.reload_if_changed()
+    assert loader.lookup("openai.com") == "on"
+
+
+def test_background_reload(tmp_path):
+    path = write_rules(tmp_path / "direct.txt", "baidu.com\n", mtime=1000)
+    loader = RuleSetLoader(check_interval=0.05)
+    loader.add_file(path, "off")
+    loader.start()
+    try:
+        write_rules(path, "qq.com\n", mtime=2000)
+        deadline = time.monotonic() + 5
+        while loader.lookup("qq.com") is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert loader.lookup("qq.com") == "off"
+        assert loader.lookup("baidu.com") is None
+    finally:
+        loader.stop()
+    assert loader._watcher is None
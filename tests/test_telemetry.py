@@ -0,0 +1,114 @@
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from monitor.telemetry import METRICS, ResourceSampler, RingBuffer, linear_trend, percentile
+
+
+class StaticTracker:
+    def __init__(self, processes):
+        self._processes = processes
+
+    def processes(self):
+        return list(self._processes)
+
+
+def fill(sampler, name, values, start=1_000_000.0, step=60.0):
+    """直接写入样本（其余指标补0），模拟按step秒采样"""
+    for i, value in enumerate(values):
+        sampler.timestamps.append(start + i * step)
+        for metric in METRICS:
+            sampler.series[metric].append(value if metric == name else 0.0)
+
+
+def test_ring_buffer_wraps_in_order():
+    buffer = RingBuffer(4)
+    assert buffer.values() == [] and buffer.last() is None
+    for value in range(1, 7):
+        buffer.append(value)
+    assert buffer.values() == [3.0, 4.0, 5.0, 6.0]
+    assert buffer.last() == 6.0
+    assert len(buffer) == 4
+    assert buffer.memory_bytes() == 4 * 8
+
+
+def test_percentile_interpolates():
+    assert percentile([], 0.5) is None
+    assert percentile([5.0], 0.99) == 5.0
+    assert percentile([0.0, 10.0], 0.5) == 5.0
+    assert percentile(list(range(101)), 0.95) == pytest.approx(95.0)
+
+
+def test_linear_trend():
+    assert linear_trend([0, 1, 2, 3], [1, 3, 5, 7]) == pytest.approx((2.0, 1.0))
+    assert linear_trend([0, 1, 2], [4, 4, 4]) == (0.0, 0.0)
+    assert linear_trend([1], [1]) == (0.0, 0.0)
+
+
+def test_steady_growth_is_reported_as_leak():
+    sampler = ResourceSampler(StaticTracker([]), min_leak_samples=30, rss_leak_mb_per_hour=100)
+    fill(sampler, "rss_mb", [100 + i * 3 for i in range(40)])  # 每分钟3MB，即每小时180MB
+    warnings = sampler.check_leaks()
+    assert list(warnings) == ["rss_mb"]
+    assert "180.0/小时" in warnings["rss_mb"]
+    assert sampler.active_warnings == warnings
+
+
+def test_noisy_or_slow_growth_is_not_a_leak():
+    sampler = ResourceSampler(StaticTracker([]), min_leak_samples=30, fd_leak_per_hour=200)
+    fill(sampler, "num_fds", [100 + (i % 2) * 50 for i in range(40)])
+    assert sampler.check_leaks() == {}
+    fill(sampler, "num_fds", [100 + i for i in range(40)], start=2_000_000.0)  # 每小时60个
+    assert sampler.check_leaks() == {}
+
+
+def test_too_few_samples_are_not_judged():
+    sampler = ResourceSampler(StaticTracker([]), min_leak_samples=30)
+    fill(sampler, "rss_mb", [100 + i * 10 for i in range(29)])
+    assert sampler.check_leaks() == {}
+
+
+def test_capacity_bounds_memory_and_summary_window():
+    sampler = ResourceSampler(StaticTracker([]), capacity=10)
+    fill(sampler, "num_threads", range(25))
+    summary = sampler.summary()
+    assert summary["samples"] == 10
+    assert summary["num_threads"]["last"] == 24
+    assert summary["num_threads"]["p50"] == 19.5
+    assert summary["num_threads"]["trend_per_hour"] == pytest.approx(60.0)
+    # 只看最近120秒（3个样本）
+    assert sampler.summary(window=120)["num_threads"]["p50"] == 23
+    assert sampler.memory_bytes() == (len(METRICS) + 1) * 10 * 8
+
+
+def test_sample_sums_process_tree():
+    child_code = "import time; time.sleep(60)"
+    parent_code = f"import subprocess, sys, time; subprocess.Popen([sys.executable, '-c', {child_code!r}]); time.sleep(60)"
+    parent = subprocess.Popen([sys.executable, "-c", parent_code])
+    try:
+        process = psutil.Process(parent.pid)
+        for _ in range(100):
+            if process.children():
+                break
+            time.sleep(0.05)
+        sampler = ResourceSampler(StaticTracker([process]))
+        first = sampler.sample()
+        second = sampler.sample()
+        assert len(sampler._processes) == 2
+        assert second["rss_mb"] > 0 and second["num_threads"] >= 2 and second["num_fds"] >= 2
+        assert first["read_bytes_per_s"] == 0.0
+        assert len(sampler.timestamps) == 2
+    finally:
+        for child in psutil.Process(parent.pid).children(recursive=True):
+            child.kill()
+        parent.kill()
+        parent.wait()
+
+
+def test_sample_without_gateway():
+    sampler = ResourceSampler(StaticTracker([]))
+    assert sampler.sample() is None
+    assert len(sampler.timestamps) == 0
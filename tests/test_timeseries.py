@@ -0,0 +1,132 @@
+import fcntl
+import math
+import multiprocessing
+import os
+import time
+
+from monitor.timeseries import TimeSeriesStore
+
+
+def _store(root, **kwargs):
+    settings = dict(segment_seconds=100, flush_interval=3600, flush_bytes=1 << 20)
+    settings.update(kwargs)
+    return TimeSeriesStore(root, **settings)
+
+
+def test_append_query_and_rotation(tmp_path):
+    store = _store(tmp_path)
+    for i in range(500):
+        store.append("gateway.running", float(i % 2), timestamp=1000.0 + i)
+    store.flush()
+
+    assert len(store._writers["gateway.running"].segments) == 5
+    samples = list(store.query("gateway.running", 1150, 1250))
+    assert [t for t, _ in samples] == [1150.0 + i for i in range(100)]
+    (bucket,) = store.aggregate("gateway.running", 1000, 1500, 500)
+    assert bucket["count"] == 500 and bucket["mean"] == 0.5
+    store.close()
+
+
+def test_clock_regression_keeps_timestamps_monotonic(tmp_path):
+    store = _store(tmp_path)
+    store.append("latency", 1.0, timestamp=2000.0)
+    store.append("latency", math.nan, timestamp=1990.0)
+    store.flush()
+    samples = list(store.query("latency", 0, 3000))
+    assert [t for t, _ in samples] == [2000.0, 2000.0]
+    assert math.isnan(samples[1][1])
+    store.close()
+
+
+def test_two_stores_share_one_directory(tmp_path):
+    # 两个实例各自缓存段列表，相当于两个进程
+    first = _store(tmp_path)
+    second = _store(tmp_path)
+    first.append("network.event", 1.0, timestamp=1000.0)
+    first.flush()
+    second.append("network.event", 2.0, timestamp=1050.0)
+    second.append("network.event", 3.0, timestamp=1150.0)  # 第二个实例轮转
+    second.flush()
+    first.append("network.event", 4.0, timestamp=1160.0)  # 必须写入第二个实例创建的段
+    first.append("network.event", 5.0, timestamp=1120.0)  # 早于磁盘上的末条记录
+    first.flush()
+
+    reader = _store(tmp_path)
+    samples = list(reader.query("network.event", 0, 5000))
+    assert [v for _, v in samples] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert [t for t, _ in samples] == [1000.0, 1050.0, 1150.0, 1160.0, 1160.0]
+    assert [segment.start for segment in reader._writers["network.event"].segments] == [1000.0, 1150.0]
+    assert list(first.query("network.event", 1100, 1200)) == samples[2:]
+    for store in (first, second, reader):
+        store.close()
+
+
+def test_retention_in_other_process_is_noticed(tmp_path):
+    first = _store(tmp_path, retention_days=300 / 86400)
+    second = _store(tmp_path, retention_days=300 / 86400)
+    for i in range(3):
+        first.append("gateway.running", 1.0, timestamp=1000.0 + i * 100)
+    first.flush()
+    assert len(list(second.query("gateway.running", 0, 5000))) == 3
+
+    first.append("gateway.running", 1.0, timestamp=1700.0)  # 删除已过期的段
+    first.flush()
+    assert [t for t, _ in second.query("gateway.running", 0, 5000)] == [1200.0, 1700.0]
+    second.append("gateway.running", 0.0, timestamp=1710.0)
+    second.flush()
+    assert [t for t, _ in first.query("gateway.running", 0, 5000)] == [1200.0, 1700.0, 1710.0]
+    first.close()
+    second.close()
+
+
+def test_append_does_not_wait_for_disk(tmp_path):
+    store = _store(tmp_path, flush_interval=0.05)
+    store.append("gateway.running", 1.0, timestamp=1000.0)
+    store.flush()
+
+    # 另一个进程持有序列锁时，append仍立即返回，后台线程在锁释放后落盘
+    lock_fd = os.open(tmp_path / "gateway.running" / ".lock", os.O_RDWR)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+    try:
+        started = time.monotonic()
+        for i in range(100):
+            store.append("gateway.running", 0.0, timestamp=1001.0 + i)
+        assert time.monotonic() - started < 0.5
+        time.sleep(0.2)
+    finally:
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        os.close(lock_fd)
+
+    deadline = time.monotonic() + 5
+    while store.disk_bytes("gateway.running") < 101 * 16 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert store.disk_bytes("gateway.running") == 101 * 16
+    store.close()
+
+
+def _writer_process(root, offset, count):
+    store = _store(root, segment_seconds=5, flush_interval=0, flush_bytes=1)
+    for i in range(count):
+        store.append("shared", float(offset), timestamp=1000.0 + i * 0.5)
+    store.close()
+
+
+def test_concurrent_processes_append_to_same_series(tmp_path):
+    count = 200
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_writer_process, args=(str(tmp_path), n, count)) for n in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    reader = _store(tmp_path)
+    samples = list(reader.query("shared", 0, 1e9))
+    assert len(samples) == 3 * count
+    timestamps = [t for t, _ in samples]
+    assert timestamps == sorted(timestamps)
+    assert sorted(v for _, v in samples) == sorted(float(n) for n in range(3) for _ in range(count))
+    starts = [segment.start for segment in reader._writers["shared"].segments]
+    assert starts == sorted(set(starts))
+    reader.close()